@@ -2,34 +2,75 @@
 from __future__ import annotations
 
 import os
-from functools import lru_cache
+import struct
 from typing import Optional
 
-from supabase import Client, create_client
+import asyncpg
+from fastapi import HTTPException
 
+_pool: Optional[asyncpg.Pool] = None
 
-def _get_env(name: str) -> str:
-    v = os.environ.get(name)
-    if not v:
-        raise RuntimeError(f"Missing required environment variable: {name}")
-    return v
 
+def _encode_vector(values: list[float]) -> bytes:
+    # pgvector binary format: dimensions, unused, then big-endian float4s.
+    return struct.pack(f">HH{len(values)}f", len(values), 0, *values)
 
-@lru_cache
-def supabase_client() -> Client:
+
+def _decode_vector(data: bytes) -> list[float]:
+    dimensions, _ = struct.unpack_from(">HH", data)
+    return list(struct.unpack_from(f">{dimensions}f", data, 4))
+
+
+async def init_connection(conn: asyncpg.Connection) -> None:
+    """Register the pgvector codec so embeddings round-trip as list[float]."""
+    await conn.set_type_codec(
+        "vector",
+        schema="public",
+        encoder=_encode_vector,
+        decoder=_decode_vector,
+        format="binary",
+    )
+
+
+def acquire_timeout() -> float:
+    return float(os.environ.get("DATABASE_POOL_ACQUIRE_TIMEOUT", "5"))
+
+
+async def init_db_pool() -> Optional[asyncpg.Pool]:
     """
-    Returns a cached Supabase client built from env vars.
+    Creates the shared asyncpg pool from DATABASE_URL (None if unset).
 
-    Uses SUPABASE_URL and SUPABASE_ANON_KEY by default.
-    If you prefer service role in backend, set SUPABASE_SERVICE_ROLE_KEY
-    and change the selection below to prefer it.
+    asyncpg prepares every query it runs and caches the statement per
+    connection, so hot queries skip parsing/planning after first use. Set
+    DATABASE_STATEMENT_CACHE_SIZE=0 behind a transaction-mode pooler
+    (pgbouncer / Supabase pooler on port 6543), which can't keep them.
     """
-    url = _get_env("SUPABASE_URL")
-    key: Optional[str] = os.environ.get("SUPABASE_SERVICE_ROLE_KEY") or os.environ.get(
-        "SUPABASE_ANON_KEY"
-    )
-    if not key:
-        raise RuntimeError(
-            "Set SUPABASE_ANON_KEY or SUPABASE_SERVICE_ROLE_KEY in your environment."
+    global _pool
+    url = os.environ.get("DATABASE_URL")
+    if _pool is None and url:
+        _pool = await asyncpg.create_pool(
+            url,
+            min_size=int(os.environ.get("DATABASE_POOL_MIN_SIZE", "1")),
+            max_size=int(os.environ.get("DATABASE_POOL_MAX_SIZE", "10")),
+            command_timeout=float(os.environ.get("DATABASE_COMMAND_TIMEOUT", "10")),
+            max_inactive_connection_lifetime=float(
+                os.environ.get("DATABASE_POOL_MAX_IDLE_SECONDS", "300")
+            ),
+            statement_cache_size=int(os.environ.get("DATABASE_STATEMENT_CACHE_SIZE", "100")),
+            init=init_connection,
         )
-    return create_client(url, key)
+    return _pool
+
+
+async def close_db_pool() -> None:
+    global _pool
+    if _pool is not None:
+        await _pool.close()
+        _pool = None
+
+
+async def get_db_pool() -> asyncpg.Pool:
+    """FastAPI dependency returning the pool created at startup."""
+    if _pool is None:
+        raise HTTPException(status_code=503, detail="Database is not configured")
+    return _pool
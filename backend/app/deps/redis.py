@@ -0,0 +1,27 @@
+# backend/app/deps/redis.py
+from __future__ import annotations
+
+import os
+from functools import lru_cache
+from typing import Optional
+
+from redis.asyncio import Redis
+
+
+@lru_cache
+def redis_client() -> Optional[Redis]:
+    """
+    Returns a cached async Redis client built from REDIS_URL.
+
+    Returns None when REDIS_URL is unset so callers can skip caching and
+    shared state instead of failing.
+    """
+    url = os.environ.get("REDIS_URL")
+    if not url:
+        return None
+    return Redis.from_url(url, decode_responses=True)
+
+
+async def get_redis() -> Optional[Redis]:
+    """FastAPI dependency returning the shared async Redis client (or None)."""
+    return redis_client()
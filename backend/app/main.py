@@ -1,25 +1,122 @@
 # app/main.py
+import json
+import os
+import time
+from contextlib import asynccontextmanager
 from typing import Optional
 
-from fastapi import FastAPI, HTTPException
+import asyncpg
+from fastapi import Depends, FastAPI, Header, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, Response, StreamingResponse
 from pydantic import BaseModel
 from sentence_transformers import SentenceTransformer
 
+from app.deps.db import close_db_pool, get_db_pool, init_db_pool
+from app.deps.redis import redis_client
+from app.routers import feedback, outfit
 from app.schemas.weather import WeatherResponse
+from app.services.admission import AdmissionMiddleware
+from app.services.comfort import feedback_buffer
+from app.services.embeddings import EMBEDDING_MODEL_NAME, embed_texts
+from app.services.metrics import HTTP_REQUEST_DURATION, metrics_payload
+from app.services.image_jobs import (
+    ImageAnalysisJob,
+    ImageAnalysisJobCreate,
+    ImageAnalysisJobError,
+    ImageAnalysisJobItem,
+    get_image_analysis_job,
+    retry_image_analysis_item,
+    stream_image_analysis_job,
+    submit_image_analysis_job,
+)
 from app.services.open_weather import fetch_weather, OpenWeatherError
 from app.services.outfit_langchain import (
     ExplanationRequest,
     ImageAnalysisRequest,
     OutfitImageAnalysisDetails,
     OutfitExplanationDetails,
+    WeatherTagBatchRequest,
+    WeatherTagEstimate,
     analyze_outfit_image,
+    close_langchain_clients,
+    estimate_weather_tags_batch,
+    explanation_prompt_stats,
     generate_outfit_explanation,
+    stream_outfit_explanation,
+    warm_langchain_clients,
+)
+from app.services.precompute import precompute_scheduler, record_activity
+from app.services.recommendations import RecommendRequest, recommend_many, weather_context
+from app.services.rerank import explanation_request
+from app.services.tracing import (
+    profile_path,
+    profiling_authorized,
+    save_profile,
+    server_timing,
+    span,
+    start_profiler,
+    start_trace,
 )
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # ✅ Build LangChain chains and the provider connection pool once per process
+    warm_langchain_clients()
+    # ✅ One asyncpg pool per process (skipped when DATABASE_URL is unset)
+    pool = await init_db_pool()
+    if pool is not None:
+        feedback_buffer.start(pool)
+    # ✅ Warm caches ahead of each user's morning peak (PRECOMPUTE_ENABLED)
+    precompute_scheduler.start(pool, model)
+    yield
+    await precompute_scheduler.close()
+    await close_langchain_clients()
+    await feedback_buffer.close()
+    await close_db_pool()
+
+
+app = FastAPI(lifespan=lifespan)
+# ✅ Per-endpoint-class slots; added first so it runs inside the timing middlewares
+app.add_middleware(AdmissionMiddleware)
+app.include_router(feedback.router)
+app.include_router(outfit.router)
+
+
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    # ✅ Label by route template (/outfit/analyze-image/jobs/{job_id}), not raw path
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        HTTP_REQUEST_DURATION.labels(
+            request.method, getattr(route, "path", "unmatched"), str(status)
+        ).observe(time.perf_counter() - started)
+
+
+@app.middleware("http")
+async def trace_request(request: Request, call_next):
+    # ✅ Per-stage timings in Server-Timing; X-Profile: <PROFILE_TOKEN> adds a flame graph
+    spans = start_trace()
+    profiler = start_profiler() if profiling_authorized(request.headers.get("x-profile")) else None
+    started = time.perf_counter()
+    try:
+        response = await call_next(request)
+    finally:
+        profile_id = save_profile(profiler, f"{request.method} {request.url.path}") if profiler else None
+    response.headers["Server-Timing"] = server_timing(spans, time.perf_counter() - started)
+    if profile_id:
+        response.headers["X-Profile-Id"] = profile_id
+    return response
 
 # ✅ Load embedding model once at startup
-model = SentenceTransformer("sentence-transformers/all-MiniLM-L6-v2")
+model = SentenceTransformer(EMBEDDING_MODEL_NAME)
 
 
 # ✅ Embedding request/response models
@@ -36,6 +133,21 @@ async def health():
     return {"status": "ok"}
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    body, content_type = metrics_payload()
+    return Response(content=body, media_type=content_type)
+
+
+@app.get("/debug/profiles/{profile_id}", include_in_schema=False)
+async def download_profile(profile_id: str, x_profile: Optional[str] = Header(None)):
+    """HTML flame graph saved for a request sent with X-Profile (see X-Profile-Id)."""
+    path = profile_path(profile_id) if profiling_authorized(x_profile) else None
+    if path is None:
+        raise HTTPException(status_code=404, detail="Not Found")
+    return FileResponse(path, media_type="text/html")
+
+
 # ✅ Embedding endpoint (no need for embed_server.py anymore)
 @app.post("/embed", response_model=EmbedResponse)
 async def embed(req: EmbedRequest):
@@ -43,26 +155,158 @@ async def embed(req: EmbedRequest):
     Embedding endpoint that converts text to vector embeddings.
     Uses sentence-transformers/all-MiniLM-L6-v2 model.
     """
-    emb = model.encode([req.text])[0].tolist()
+    emb = (await embed_texts(model, [req.text]))[0]
     return {"embedding": emb}
 
 
+def _deadline_seconds(latency_budget_ms: Optional[float]) -> Optional[float]:
+    return latency_budget_ms / 1000 if latency_budget_ms else None
+
+
+@app.post("/outfit/recommend")
+async def recommend_outfit_items(
+    req: RecommendRequest,
+    pool: asyncpg.Pool = Depends(get_db_pool),
+):
+    """
+    Retrieve, rerank and explain in one call. The Next.js
+    /api/outfits/recommend route calls this first and only falls back to its
+    own retrieval when it fails. Reranked results are cached per weather
+    context, and the precompute scheduler fills that cache before peak.
+    """
+    user_key = req.user_key.strip()
+    if not user_key:
+        raise HTTPException(status_code=400, detail="Missing user_key")
+    context = weather_context(req)
+    await record_activity(user_key, style=context["style"], occasion=context["occasion"])
+
+    result = (await recommend_many(pool, model, user_key, [context], limit=req.limit))[0]
+    details = await generate_outfit_explanation(explanation_request(result))
+    return {
+        "outfit": result["outfit"],
+        "alternatives": result["alternatives"],
+        "explanation": details.summary,
+        "explanation_details": details,
+        "missing_categories": result["missing_categories"],
+        "weather_context": context,
+    }
+
+
 @app.post("/outfit/explain", response_model=OutfitExplanationDetails)
-async def explain_outfit(req: ExplanationRequest):
+async def explain_outfit(
+    req: ExplanationRequest,
+    x_latency_budget_ms: Optional[float] = Header(None),
+):
     """
     Generate a structured explanation for already-selected outfit items.
     Retrieval and reranking happen before this endpoint is called.
+    Returns the deterministic fallback if the LLM misses the latency budget
+    (X-Latency-Budget-Ms can tighten the configured one).
+    """
+    return await generate_outfit_explanation(req, _deadline_seconds(x_latency_budget_ms))
+
+
+@app.post("/outfit/explain/prompt-stats")
+async def explain_prompt_stats(req: ExplanationRequest):
+    """
+    Report prompt token counts for the full vs compacted explanation payload,
+    without calling the LLM.
+    """
+    return explanation_prompt_stats(req)
+
+
+@app.post("/outfit/explain/stream")
+async def explain_outfit_stream(req: ExplanationRequest):
     """
-    return await generate_outfit_explanation(req)
+    Server-sent events variant of /outfit/explain.
+    Emits the deterministic fallback first, then LLM fields as they are
+    generated, and ends with a "final" OutfitExplanationDetails event.
+    """
+
+    async def events():
+        async for event, data in stream_outfit_explanation(req):
+            yield f"event: {event}\ndata: {json.dumps(data, ensure_ascii=True)}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @app.post("/outfit/analyze-image", response_model=OutfitImageAnalysisDetails)
-async def analyze_outfit_image_endpoint(req: ImageAnalysisRequest):
+async def analyze_outfit_image_endpoint(
+    req: ImageAnalysisRequest,
+    x_latency_budget_ms: Optional[float] = Header(None),
+):
     """
     Analyze a search-result product image and infer wardrobe weather tags.
     The user still reviews and edits these tags before saving.
     """
-    return await analyze_outfit_image(req)
+    return await analyze_outfit_image(req, _deadline_seconds(x_latency_budget_ms))
+
+
+@app.post("/outfit/analyze-image/jobs", response_model=ImageAnalysisJob, status_code=202)
+async def submit_image_analysis_job_endpoint(req: ImageAnalysisJobCreate):
+    """
+    Queue a bulk wardrobe import. Items are analyzed in the background with
+    bounded concurrency; poll or stream the job for progress and results.
+    """
+    try:
+        return await submit_image_analysis_job(req)
+    except ImageAnalysisJobError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.get("/outfit/analyze-image/jobs/{job_id}", response_model=ImageAnalysisJob)
+async def get_image_analysis_job_endpoint(job_id: str):
+    try:
+        return await get_image_analysis_job(job_id)
+    except ImageAnalysisJobError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
+@app.get("/outfit/analyze-image/jobs/{job_id}/events")
+async def stream_image_analysis_job_endpoint(job_id: str):
+    """Server-sent events with job progress and each finished item."""
+    try:
+        await get_image_analysis_job(job_id)
+    except ImageAnalysisJobError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+    async def events():
+        async for event, data in stream_image_analysis_job(job_id):
+            yield f"event: {event}\ndata: {json.dumps(data, ensure_ascii=True)}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.post(
+    "/outfit/analyze-image/jobs/{job_id}/items/{index}/retry",
+    response_model=ImageAnalysisJobItem,
+)
+async def retry_image_analysis_item_endpoint(job_id: str, index: int):
+    """Re-run a single finished item, e.g. one that was resolved with the fallback."""
+    try:
+        return await retry_image_analysis_item(job_id, index)
+    except ImageAnalysisJobError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.post("/outfit/weather-tags/batch", response_model=list[WeatherTagEstimate])
+async def weather_tags_batch_endpoint(req: WeatherTagBatchRequest):
+    """
+    Estimate weather tags for many catalog items with the keyword heuristics.
+    Runs in a worker thread so large batches don't stall the event loop.
+    """
+    max_items = int(os.getenv("WEATHER_TAG_BATCH_MAX_ITEMS", "10000"))
+    if len(req.items) > max_items:
+        raise HTTPException(status_code=400, detail=f"At most {max_items} items per batch")
+    return await run_in_threadpool(estimate_weather_tags_batch, req.items)
 
 
 @app.get("/weather/openweather", response_model=WeatherResponse)
@@ -71,13 +315,24 @@ async def openweather_endpoint(
     lat: Optional[float] = None,
     lon: Optional[float] = None,
     units: str = "imperial",
+    x_user_key: Optional[str] = Header(None),
+    x_timezone: Optional[str] = Header(None),
 ):
     """
     Backend endpoint that your Next.js app calls via /api/weather/openweather.
-    It just forwards to fetch_weather.
+    It forwards to fetch_weather and remembers the caller's location cell and
+    timezone for the precompute scheduler (X-User-Key, X-Timezone).
     """
     try:
-        weather = await fetch_weather(q=q, lat=lat, lon=lon, units=units)
-        return weather
+        weather = await fetch_weather(q=q, lat=lat, lon=lon, units=units, redis=redis_client())
     except OpenWeatherError as e:
         raise HTTPException(status_code=400, detail=str(e))
+    with span("record_activity"):
+        await record_activity(
+            x_user_key,
+            lat=weather.coords.lat,
+            lon=weather.coords.lon,
+            units=units,
+            tz=x_timezone,
+        )
+    return weather
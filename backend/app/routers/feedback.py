@@ -1,6 +1,7 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
-from ..deps.db import supabase_client  # adjust to your actual dep path
+
+from ..services.comfort import FeedbackBufferFull, feedback_buffer, record_feedback
 
 router = APIRouter(prefix="/feedback", tags=["feedback"])
 
@@ -10,8 +11,14 @@ class FeedbackIn(BaseModel):
     outfit_id: str | None = None
     thumbs_up: bool | None = None
 
-@router.post("")
+@router.post("", status_code=202)
 async def submit_feedback(data: FeedbackIn):
-    sb = supabase_client()
-    res = sb.table("feedback").insert(data.model_dump(exclude_none=True)).execute()
-    return {"inserted": len(res.data or [])}
+    # Rows are written in batches by the feedback buffer started with the app.
+    # Without a database it never starts, so don't queue rows it can't flush.
+    if not feedback_buffer.ready:
+        raise HTTPException(status_code=503, detail="Database is not configured")
+    try:
+        offset = await record_feedback(data.model_dump())
+    except FeedbackBufferFull as exc:
+        raise HTTPException(status_code=503, detail=str(exc), headers={"Retry-After": "1"})
+    return {"queued": 1, "comfort_offset": offset}
@@ -1,4 +1,11 @@
-from fastapi import APIRouter, Query
+from typing import Optional
+
+import asyncpg
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+from app.deps.db import get_db_pool
+from app.services.comfort import comfort_offset_for
+from app.services.wardrobe_store import fetch_wardrobe
 
 # 👇 must exist at top level
 router = APIRouter(prefix="/outfit", tags=["outfit"])
@@ -6,8 +13,22 @@ router = APIRouter(prefix="/outfit", tags=["outfit"])
 @router.get("", name="recommend_outfit")
 async def recommend_outfit(
     temp_c: float = Query(..., description="Ambient temperature in °C"),
-    comfort_offset: float = 0.0,
+    user_id: Optional[str] = Query(None, description="Personalize with this user's comfort offset"),
+    comfort_offset: Optional[float] = Query(None, description="Override the learned offset"),
 ):
-    # TODO: call services.comfort/rules later
+    if comfort_offset is None:
+        comfort_offset = await comfort_offset_for(user_id) if user_id else 0.0
     tier = "light-jacket" if temp_c + comfort_offset < 18 else "t-shirt"
     return {"tier": tier, "offset": comfort_offset}
+
+@router.get("/items", name="list_outfit_items")
+async def list_outfit_items(
+    user_key: str = Query(..., description="Whose wardrobe to list"),
+    category: Optional[str] = Query(None, description="Only items in this category"),
+    limit: int = Query(500, ge=1, le=1000),
+    pool: asyncpg.Pool = Depends(get_db_pool),
+):
+    user_key = user_key.strip()
+    if not user_key:
+        raise HTTPException(status_code=400, detail="Missing user_key")
+    return {"items": await fetch_wardrobe(pool, user_key, category=category, limit=limit)}
@@ -0,0 +1,331 @@
+"""
+Stream a CSV or JSONL wardrobe file into outfit_items.
+
+    python -m app.script.import_wardrobe outfit_items.csv --user-key guest-demo-123
+    python -m app.script.import_wardrobe items.jsonl --dry-run
+
+Stages run concurrently and are joined by bounded queues, so a slow stage
+applies backpressure instead of buffering the whole file:
+read rows -> fill weather tags -> embed in batches -> COPY into Postgres.
+"""
+import argparse
+import asyncio
+import csv
+import json
+import math
+import os
+import sys
+import time
+import uuid
+from decimal import Decimal
+from typing import Any, Iterator
+
+import asyncpg
+from sentence_transformers import SentenceTransformer
+
+from app.deps.db import acquire_timeout, init_connection
+from app.services.embeddings import EMBEDDING_MODEL_NAME, textify
+from app.services.outfit_langchain import WeatherTagRequest, estimate_weather_tags_batch
+
+CATEGORIES = {"upper", "lower", "accessories", "shoes"}
+TAG_FIELDS = (
+    "warmth_score",
+    "water_resistance",
+    "wind_block",
+    "breathability",
+    "coverage_top",
+    "coverage_bottom",
+    "footwear_type",
+    "min_temp_c",
+    "max_temp_c",
+)
+COLUMNS = (
+    "id",
+    "user_key",
+    "category",
+    "label",
+    "image_url",
+    "brand",
+    "store_url",
+    "description",
+    "color",
+    *TAG_FIELDS,
+    "embedding",
+)
+
+_DONE = None
+
+
+class Stats:
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self.read = 0
+        self.skipped = 0
+        self.tagged = 0
+        self.embedded = 0
+        self.written = 0
+        self.stage_seconds = {"read": 0.0, "tag": 0.0, "embed": 0.0, "write": 0.0}
+
+    def report(self, dry_run: bool) -> dict[str, Any]:
+        elapsed = time.perf_counter() - self.started
+        return {
+            "dry_run": dry_run,
+            "rows_read": self.read,
+            "rows_skipped": self.skipped,
+            "rows_tagged": self.tagged,
+            "rows_embedded": self.embedded,
+            "rows_written": self.written,
+            "elapsed_seconds": round(elapsed, 3),
+            "rows_per_second": round(self.tagged / elapsed, 1) if elapsed else 0.0,
+            "stage_seconds": {name: round(value, 3) for name, value in self.stage_seconds.items()},
+        }
+
+
+def _rows(path: str) -> Iterator[dict[str, Any]]:
+    with open(path, newline="", encoding="utf-8") as fh:
+        if path.endswith((".jsonl", ".ndjson")):
+            for line in fh:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from csv.DictReader(fh)
+
+
+def _next_chunk(rows: Iterator[dict[str, Any]], size: int) -> list[dict[str, Any]]:
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            break
+    return chunk
+
+
+def _clean(value: Any) -> Any:
+    if isinstance(value, str):
+        value = value.strip()
+        return value or None
+    return value
+
+
+def _valid(row: dict[str, Any]) -> bool:
+    """Check the values _record converts, so a bad row is skipped, not fatal."""
+    try:
+        if row.get("id"):
+            row["id"] = str(uuid.UUID(str(row["id"])))
+        for field in ("warmth_score", "min_temp_c", "max_temp_c"):
+            if row.get(field) is not None and not math.isfinite(float(row[field])):
+                return False
+    except (TypeError, ValueError):
+        return False
+    return True
+
+
+def _prepare(rows: list[dict[str, Any]], user_key: str | None, stats: Stats) -> list[dict]:
+    """Normalize rows and fill any weather tags the file doesn't provide."""
+    prepared = []
+    for raw in rows:
+        row = {key: _clean(value) for key, value in raw.items()}
+        row["user_key"] = row.get("user_key") or user_key
+        if not row.get("label") or not row["user_key"] or not _valid(row):
+            stats.skipped += 1
+            continue
+        if row.get("category") not in CATEGORIES:
+            row["category"] = None
+        prepared.append(row)
+
+    estimates = estimate_weather_tags_batch(
+        [
+            WeatherTagRequest(
+                label=row["label"],
+                description=row.get("description"),
+                brand=row.get("brand"),
+                category_hint=row["category"],
+            )
+            for row in prepared
+        ]
+    )
+    for row, estimate in zip(prepared, estimates):
+        row["category"] = row["category"] or estimate["category"] or "upper"
+        for field in TAG_FIELDS:
+            if row.get(field) is None:
+                row[field] = estimate[field]
+    return prepared
+
+
+def _decimal(value: Any) -> Decimal | None:
+    return None if value is None else Decimal(str(value))
+
+
+def _record(row: dict[str, Any], embedding: list[float] | None) -> tuple:
+    return (
+        uuid.UUID(row["id"]) if row.get("id") else uuid.uuid4(),
+        row["user_key"],
+        row["category"],
+        row["label"],
+        row.get("image_url"),
+        row.get("brand"),
+        row.get("store_url"),
+        row.get("description"),
+        row.get("color"),
+        None if row.get("warmth_score") is None else int(float(row["warmth_score"])),
+        row.get("water_resistance"),
+        row.get("wind_block"),
+        row.get("breathability"),
+        row.get("coverage_top"),
+        row.get("coverage_bottom"),
+        row.get("footwear_type"),
+        _decimal(row.get("min_temp_c")),
+        _decimal(row.get("max_temp_c")),
+        embedding,
+    )
+
+
+async def _reader(path: str, out: asyncio.Queue, chunk_size: int, stats: Stats) -> None:
+    rows = _rows(path)
+    while True:
+        started = time.perf_counter()
+        chunk = await asyncio.to_thread(_next_chunk, rows, chunk_size)
+        stats.stage_seconds["read"] += time.perf_counter() - started
+        if not chunk:
+            break
+        stats.read += len(chunk)
+        await out.put(chunk)
+    await out.put(_DONE)
+
+
+async def _tagger(inp: asyncio.Queue, out: asyncio.Queue, user_key, stats: Stats) -> None:
+    while (chunk := await inp.get()) is not _DONE:
+        started = time.perf_counter()
+        prepared = await asyncio.to_thread(_prepare, chunk, user_key, stats)
+        stats.stage_seconds["tag"] += time.perf_counter() - started
+        stats.tagged += len(prepared)
+        if prepared:
+            await out.put(prepared)
+    await out.put(_DONE)
+
+
+async def _embedder(
+    inp: asyncio.Queue,
+    out: asyncio.Queue,
+    model: SentenceTransformer | None,
+    batch_size: int,
+    stats: Stats,
+) -> None:
+    async def flush(batch: list[dict[str, Any]]) -> None:
+        embeddings: list[list[float] | None] = [None] * len(batch)
+        if model is not None:
+            started = time.perf_counter()
+            vectors = await asyncio.to_thread(
+                model.encode, [textify(row) for row in batch], batch_size=min(batch_size, 256)
+            )
+            stats.stage_seconds["embed"] += time.perf_counter() - started
+            embeddings = [vector.tolist() for vector in vectors]
+            stats.embedded += len(batch)
+        await out.put([_record(row, embedding) for row, embedding in zip(batch, embeddings)])
+
+    pending: list[dict[str, Any]] = []
+    while (rows := await inp.get()) is not _DONE:
+        pending.extend(rows)
+        while len(pending) >= batch_size:
+            await flush(pending[:batch_size])
+            pending = pending[batch_size:]
+    if pending:
+        await flush(pending)
+    await out.put(_DONE)
+
+
+async def _writer(inp: asyncio.Queue, pool: asyncpg.Pool | None, stats: Stats) -> None:
+    while (records := await inp.get()) is not _DONE:
+        if pool is None:
+            continue
+        started = time.perf_counter()
+        async with pool.acquire(timeout=acquire_timeout()) as conn:
+            await conn.copy_records_to_table("outfit_items", records=records, columns=COLUMNS)
+        stats.stage_seconds["write"] += time.perf_counter() - started
+        stats.written += len(records)
+    # pass the sentinel on to the next writer
+    await inp.put(_DONE)
+
+
+async def _run_stages(*stages) -> None:
+    """
+    Run every stage to completion. If one fails, cancel the rest and re-raise,
+    so a dead stage can't leave the others blocked on a full or empty queue.
+    """
+    tasks = [asyncio.ensure_future(stage) for stage in stages]
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+        for task in done:
+            if (exc := task.exception()) is not None:
+                raise exc
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def run_import(
+    path: str,
+    *,
+    user_key: str | None = None,
+    dry_run: bool = False,
+    embed: bool = True,
+    chunk_size: int = 1000,
+    embed_batch_size: int = 512,
+    queue_size: int = 4,
+    writers: int = 2,
+) -> dict[str, Any]:
+    stats = Stats()
+    model = SentenceTransformer(EMBEDDING_MODEL_NAME) if embed else None
+    pool = None
+    if not dry_run:
+        pool = await asyncpg.create_pool(
+            os.environ["DATABASE_URL"], min_size=1, max_size=writers, init=init_connection
+        )
+
+    raw_rows: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+    tagged_rows: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+    records: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+    try:
+        await _run_stages(
+            _reader(path, raw_rows, chunk_size, stats),
+            _tagger(raw_rows, tagged_rows, user_key, stats),
+            _embedder(tagged_rows, records, model, embed_batch_size, stats),
+            *(_writer(records, pool, stats) for _ in range(writers)),
+        )
+    finally:
+        if pool is not None:
+            await pool.close()
+    return stats.report(dry_run)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("path", help="CSV or JSONL (.jsonl/.ndjson) file")
+    parser.add_argument("--user-key", help="user_key for rows that don't have one")
+    parser.add_argument("--dry-run", action="store_true", help="tag and embed, skip the insert")
+    parser.add_argument("--no-embed", action="store_true", help="insert without embeddings")
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--embed-batch-size", type=int, default=512)
+    parser.add_argument("--queue-size", type=int, default=4)
+    parser.add_argument("--writers", type=int, default=2)
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(
+        run_import(
+            args.path,
+            user_key=args.user_key,
+            dry_run=args.dry_run,
+            embed=not args.no_embed,
+            chunk_size=args.chunk_size,
+            embed_batch_size=args.embed_batch_size,
+            queue_size=args.queue_size,
+            writers=max(args.writers, 1),
+        )
+    )
+    json.dump(report, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""
+Per-endpoint-class admission control.
+
+Every route belongs to a class with its own concurrency pool, so a burst of
+slow vision calls or CPU-heavy encodes can't take the event loop and worker
+threads away from /weather/openweather and /health:
+
+- default: everything not listed in ENDPOINT_CLASSES (weather, health, jobs)
+- cpu: sentence-transformers encodes and batch tag estimation
+- llm: explanation routes
+- vision: synchronous image analysis
+
+A request that finds its pool full waits in a bounded FIFO queue for up to the
+class's queue timeout. When the queue is full or the wait times out, the
+request gets a fast 503 with Retry-After. For classes with DEGRADE on, routes
+in DEGRADABLE_ROUTES instead run without a slot and the LLM code serves its
+deterministic fallback rather than calling the provider (see
+request_degraded()). /outfit/recommend also retrieves and encodes before it
+explains, so it is always shed rather than run unbounded.
+
+Pools are per process: each uvicorn worker has its own event loop to protect.
+Settings are ADMISSION_{CLASS}_CONCURRENCY, _QUEUE_SIZE, _QUEUE_TIMEOUT_SECONDS,
+_RETRY_AFTER_SECONDS and _DEGRADE; ADMISSION_ENABLED=false turns it all off.
+"""
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from contextvars import ContextVar
+from typing import Literal
+
+from starlette.responses import JSONResponse
+from starlette.routing import Match, Route
+
+from app.services.metrics import observe_admission
+from app.services.tracing import span
+
+logger = logging.getLogger(__name__)
+
+Admission = Literal["ok", "queue_full", "queue_timeout"]
+
+ENDPOINT_CLASSES = {
+    "/embed": "cpu",
+    "/outfit/weather-tags/batch": "cpu",
+    "/outfit/recommend": "llm",
+    "/outfit/explain": "llm",
+    "/outfit/explain/stream": "llm",
+    "/outfit/analyze-image": "vision",
+}
+
+# Routes whose only expensive step is the provider call, so a degraded run
+# costs about as much as serving the fallback.
+DEGRADABLE_ROUTES = {"/outfit/explain", "/outfit/explain/stream", "/outfit/analyze-image"}
+
+# concurrency, queue size, queue timeout (s), Retry-After (s), degrade
+_DEFAULTS = {
+    "default": (256, 512, 1.0, 1, False),
+    "cpu": (max(os.cpu_count() or 1, 2), 64, 2.0, 1, False),
+    "llm": (64, 128, 1.0, 2, True),
+    "vision": (8, 16, 2.0, 5, True),
+}
+
+_degraded: ContextVar[bool] = ContextVar("admission_degraded", default=False)
+
+
+def request_degraded() -> bool:
+    """True while handling a request that was admitted without a slot."""
+    return _degraded.get()
+
+
+def _env_float(name: str, default: float) -> float:
+    return float(os.getenv(name) or default)
+
+
+class EndpointPool:
+    """A concurrency cap with a bounded FIFO queue and a queue-time deadline."""
+
+    def __init__(self, name: str) -> None:
+        concurrency, queue_size, queue_timeout, retry_after, degrade = _DEFAULTS[name]
+        prefix = f"ADMISSION_{name.upper()}"
+        self.name = name
+        self.concurrency = max(int(_env_float(f"{prefix}_CONCURRENCY", concurrency)), 1)
+        self.queue_size = max(int(_env_float(f"{prefix}_QUEUE_SIZE", queue_size)), 0)
+        self.queue_timeout_s = _env_float(f"{prefix}_QUEUE_TIMEOUT_SECONDS", queue_timeout)
+        self.retry_after_s = int(_env_float(f"{prefix}_RETRY_AFTER_SECONDS", retry_after))
+        self.degrade = os.getenv(f"{prefix}_DEGRADE", str(degrade)).lower() == "true"
+        self.active = 0
+        self._waiters: deque[asyncio.Future] = deque()
+
+    async def acquire(self) -> Admission:
+        if self.active < self.concurrency and not self._waiters:
+            self.active += 1
+            return "ok"
+        if len(self._waiters) >= self.queue_size:
+            return "queue_full"
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, self.queue_timeout_s)
+        except asyncio.TimeoutError:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just as the deadline hit.
+                return "ok"
+            self._discard(waiter)
+            return "queue_timeout"
+        except BaseException:
+            if waiter.done() and not waiter.cancelled():
+                # Cancelled after the handoff: pass the slot on.
+                self.release()
+            else:
+                self._discard(waiter)
+            raise
+        return "ok"
+
+    def _discard(self, waiter: asyncio.Future) -> None:
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass  # release() already skipped it
+
+    def release(self) -> None:
+        # Hand the slot straight to the oldest live waiter so it can't be barged.
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+
+class AdmissionMiddleware:
+    """
+    ASGI middleware that holds the route's class slot until the response body
+    is sent, so streamed explanations count against the llm pool too.
+    """
+
+    def __init__(self, app) -> None:
+        self.app = app
+        self.enabled = os.getenv("ADMISSION_ENABLED", "true").lower() != "false"
+        self.pools = {name: EndpointPool(name) for name in _DEFAULTS}
+        self._static_routes: dict[tuple[str, str], Route] = {}
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http" or not self.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        route = self._match_route(scope)
+        path = getattr(route, "path", None)
+        pool = self.pools[ENDPOINT_CLASSES.get(path, "default")]
+        started = time.perf_counter()
+        with span("queue"):
+            admission = await pool.acquire()
+
+        if admission == "ok":
+            observe_admission(pool.name, time.perf_counter() - started)
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                pool.release()
+            return
+
+        if pool.degrade and path in DEGRADABLE_ROUTES:
+            observe_admission(pool.name, time.perf_counter() - started, admission, "degraded")
+            token = _degraded.set(True)
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                _degraded.reset(token)
+            return
+
+        observe_admission(pool.name, time.perf_counter() - started, admission, "rejected")
+        logger.info("Rejected %s %s: %s pool %s", scope["method"], scope["path"], pool.name, admission)
+        # Label the 503 with its route template in request metrics; routing never ran.
+        if route is not None:
+            scope["route"] = route
+        response = JSONResponse(
+            {"detail": f"Server busy ({pool.name} requests), retry shortly"},
+            status_code=503,
+            headers={"Retry-After": str(pool.retry_after_s)},
+        )
+        await response(scope, receive, send)
+
+    def _match_route(self, scope):
+        key = (scope["method"], scope["path"])
+        route = self._static_routes.get(key)
+        if route is not None:
+            return route
+        app = scope.get("app")
+        for route in getattr(getattr(app, "router", None), "routes", ()):
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                # Paths without parameters always resolve to the same route;
+                # parameterised paths and mounts are matched every time so
+                # the cache stays bounded by the route table.
+                if isinstance(route, Route) and not route.param_convertors:
+                    self._static_routes[key] = route
+                return route
+        return None
@@ -0,0 +1,226 @@
+import asyncio
+import logging
+import os
+from collections import OrderedDict
+from typing import Any, Optional
+
+import asyncpg
+
+from app.deps.redis import redis_client
+from app.services.wardrobe_store import insert_feedback
+
+logger = logging.getLogger(__name__)
+
+_COMFORT_PREFIX = "comfort:"
+_COMFORT_TTL_SECONDS = 180 * 24 * 60 * 60
+
+# Exponentially weighted update of one user's offset, atomic across workers.
+# The first report is taken as-is; later ones move the estimate by alpha.
+# KEYS: comfort hash
+# ARGV: reported offset, alpha, max abs offset, ttl seconds
+# Returns the new offset and sample count as strings.
+_UPDATE_LUA = """
+local s = redis.call('HMGET', KEYS[1], 'offset', 'n')
+local reported = tonumber(ARGV[1])
+local offset = tonumber(s[1])
+local n = tonumber(s[2]) or 0
+local bound = tonumber(ARGV[3])
+if offset == nil or n == 0 then
+  offset = reported
+else
+  offset = offset + tonumber(ARGV[2]) * (reported - offset)
+end
+offset = math.max(-bound, math.min(bound, offset))
+n = n + 1
+redis.call('HSET', KEYS[1], 'offset', offset, 'n', n)
+redis.call('EXPIRE', KEYS[1], tonumber(ARGV[4]))
+return {tostring(offset), tostring(n)}
+"""
+
+
+def _alpha() -> float:
+    return min(max(float(os.getenv("COMFORT_EWMA_ALPHA", "0.3")), 0.01), 1.0)
+
+
+def _max_offset() -> float:
+    return float(os.getenv("COMFORT_MAX_OFFSET_C", "10"))
+
+
+class ComfortModel:
+    """
+    Running per-user comfort offset (°C added to the ambient temperature).
+
+    Each comfort report moves the estimate by COMFORT_EWMA_ALPHA toward the
+    reported value, so recent feedback dominates without keeping history.
+    Estimates live in Redis when configured, so every worker reads the latest
+    value with one HMGET, never a feedback-table scan. A bounded in-process
+    LRU is the fallback when Redis is missing, errors, or has no entry.
+    """
+
+    def __init__(self) -> None:
+        self._local: OrderedDict[str, tuple[float, int]] = OrderedDict()
+        self._max_users = int(os.getenv("COMFORT_CACHE_MAX_USERS", "100000"))
+        self._update_script = None
+
+    def _remember(self, user_id: str, offset: float, samples: int) -> None:
+        self._local[user_id] = (offset, samples)
+        self._local.move_to_end(user_id)
+        while len(self._local) > self._max_users:
+            self._local.popitem(last=False)
+
+    def _script(self, redis):
+        if self._update_script is None or self._update_script.registered_client is not redis:
+            self._update_script = redis.register_script(_UPDATE_LUA)
+        return self._update_script
+
+    async def observe(self, user_id: str, reported: float) -> float:
+        redis = redis_client()
+        if redis is not None:
+            try:
+                offset, samples = await self._script(redis)(
+                    keys=[f"{_COMFORT_PREFIX}{user_id}"],
+                    args=[reported, _alpha(), _max_offset(), _COMFORT_TTL_SECONDS],
+                )
+                self._remember(user_id, float(offset), int(samples))
+                return float(offset)
+            except Exception as exc:
+                logger.warning("Comfort model using local state: %s", exc.__class__.__name__)
+
+        bound = _max_offset()
+        previous, samples = self._local.get(user_id, (reported, 0))
+        offset = reported if samples == 0 else previous + _alpha() * (reported - previous)
+        offset = max(-bound, min(bound, offset))
+        self._remember(user_id, offset, samples + 1)
+        return offset
+
+    async def offset(self, user_id: str) -> float:
+        """Current estimate for user_id (0.0 when they have no comfort reports)."""
+        redis = redis_client()
+        if redis is not None:
+            try:
+                value = await redis.hmget(f"{_COMFORT_PREFIX}{user_id}", "offset", "n")
+                if value[0] is not None:
+                    self._remember(user_id, float(value[0]), int(value[1] or 0))
+                    return float(value[0])
+            except Exception as exc:
+                logger.warning("Comfort lookup skipped Redis: %s", exc.__class__.__name__)
+
+        cached = self._local.get(user_id)
+        if cached is not None:
+            self._local.move_to_end(user_id)
+            return cached[0]
+        return 0.0
+
+
+class FeedbackBufferFull(RuntimeError):
+    """Raised when feedback arrives faster than the database can absorb it."""
+
+
+class FeedbackBuffer:
+    """
+    Collects feedback rows in memory and writes them with one executemany per
+    batch: when FEEDBACK_BATCH_SIZE rows are waiting or every
+    FEEDBACK_FLUSH_INTERVAL_SECONDS, whichever comes first. Rows from a
+    failed flush are put back and retried on the next one.
+    """
+
+    def __init__(self) -> None:
+        self._rows: list[dict[str, Any]] = []
+        self._pool: Optional[asyncpg.Pool] = None
+        self._task: Optional[asyncio.Task] = None
+        self._wake = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._batch_size = max(int(os.getenv("FEEDBACK_BATCH_SIZE", "200")), 1)
+        self._max_rows = max(int(os.getenv("FEEDBACK_BUFFER_MAX_ROWS", "10000")), self._batch_size)
+        self._interval = float(os.getenv("FEEDBACK_FLUSH_INTERVAL_SECONDS", "1.0"))
+
+    @property
+    def pending(self) -> int:
+        return len(self._rows)
+
+    @property
+    def ready(self) -> bool:
+        """True once start() has given the buffer a database pool."""
+        return self._pool is not None
+
+    def start(self, pool: asyncpg.Pool) -> None:
+        self._pool = pool
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        """
+        Stop the flush loop and write whatever is still buffered, retrying
+        failed batches up to FEEDBACK_CLOSE_RETRIES times before dropping them.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        retries = max(int(os.getenv("FEEDBACK_CLOSE_RETRIES", "3")), 0)
+        failures = 0
+        while self._rows and self._pool is not None:
+            if await self.flush():
+                continue
+            failures += 1
+            if failures > retries:
+                break
+            await asyncio.sleep(min(0.5 * 2 ** (failures - 1), 5))
+        if self._rows:
+            logger.error("Dropped %s feedback rows that could not be written", len(self._rows))
+            self._rows.clear()
+
+    def add(self, row: dict[str, Any]) -> None:
+        if len(self._rows) >= self._max_rows:
+            raise FeedbackBufferFull("Feedback buffer is full")
+        self._rows.append(row)
+        if len(self._rows) >= self._batch_size:
+            self._wake.set()
+
+    async def flush(self) -> int:
+        """Write up to one batch; returns the number of rows written."""
+        async with self._flush_lock:
+            if not self._rows or self._pool is None:
+                return 0
+            batch = self._rows[: self._batch_size]
+            del self._rows[: len(batch)]
+            try:
+                return await insert_feedback(self._pool, batch)
+            except Exception as exc:
+                logger.warning("Feedback flush of %s rows failed: %s", len(batch), exc)
+                # Oldest rows go back in front; drop what no longer fits.
+                self._rows[:0] = batch[: max(self._max_rows - len(self._rows), 0)]
+                return 0
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self._interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            while await self.flush() and len(self._rows) >= self._batch_size:
+                pass
+
+
+comfort_model = ComfortModel()
+feedback_buffer = FeedbackBuffer()
+
+
+async def record_feedback(row: dict[str, Any]) -> Optional[float]:
+    """
+    Queue a feedback row for the database and fold any comfort report into
+    the user's running offset. Returns the updated offset, if any.
+    """
+    feedback_buffer.add(row)
+    user_id, reported = row.get("user_id"), row.get("comfort_offset")
+    if user_id and reported is not None:
+        return await comfort_model.observe(user_id, float(reported))
+    return None
+
+
+async def comfort_offset_for(user_id: str) -> float:
+    return await comfort_model.offset(user_id)
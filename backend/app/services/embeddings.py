@@ -0,0 +1,83 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+
+from app.deps.redis import redis_client
+from app.services.metrics import observe_cache, observe_encode
+from app.services.tracing import span
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+EMBEDDING_DIMENSIONS = 384
+
+_EMBEDDING_CACHE_PREFIX = "emb:"
+
+
+def textify(row):
+    parts = [
+        f"label: {row['label']}",
+        f"description: {row.get('description') or ''}",
+        f"category: {row.get('category') or ''}",
+        f"color: {row.get('color') or ''}",
+        f"warmth: {row.get('warmth_score') or ''}",
+        f"water: {row.get('water_resistance') or ''}",
+        f"wind: {row.get('wind_block') or ''}",
+        f"breathability: {row.get('breathability') or ''}",
+        f"coverage_top: {row.get('coverage_top') or ''}",
+        f"coverage_bottom: {row.get('coverage_bottom') or ''}",
+        f"footwear: {row.get('footwear_type') or ''}",
+        f"temp_min: {row.get('min_temp_c') or ''}",
+        f"temp_max: {row.get('max_temp_c') or ''}",
+    ]
+    return ". ".join(parts)
+
+
+def _embedding_cache_key(text: str) -> str:
+    digest = hashlib.sha256(f"{EMBEDDING_MODEL_NAME}\n{text}".encode()).hexdigest()
+    return f"{_EMBEDDING_CACHE_PREFIX}{digest}"
+
+
+async def embed_texts(model, texts: list[str]) -> list[list[float]]:
+    """
+    Encode texts with model, reusing vectors cached in Redis. Misses are encoded
+    in one batch on a worker thread so the event loop keeps serving requests.
+    """
+    vectors: list[list[float] | None] = [None] * len(texts)
+    keys = [_embedding_cache_key(text) for text in texts]
+    redis = redis_client()
+    if redis is not None:
+        try:
+            with span("embedding_cache"):
+                cached_values = await redis.mget(keys)
+            for index, cached in enumerate(cached_values):
+                if cached:
+                    vectors[index] = json.loads(cached)
+        except Exception as exc:
+            logger.warning("Embedding cache read skipped: %s", exc.__class__.__name__)
+
+    misses = [index for index, vector in enumerate(vectors) if vector is None]
+    if redis is not None:
+        observe_cache("embedding", True, len(texts) - len(misses))
+        observe_cache("embedding", False, len(misses))
+    if misses:
+        started = time.perf_counter()
+        with span("encode"):
+            encoded = await asyncio.to_thread(model.encode, [texts[index] for index in misses])
+        observe_encode(len(misses), time.perf_counter() - started)
+        for index, vector in zip(misses, encoded):
+            vectors[index] = vector.tolist()
+        if redis is not None:
+            ttl = int(os.getenv("EMBEDDING_CACHE_TTL_SECONDS", str(7 * 24 * 60 * 60)))
+            try:
+                with span("embedding_cache_write"):
+                    async with redis.pipeline(transaction=False) as pipe:
+                        for index in misses:
+                            pipe.set(keys[index], json.dumps(vectors[index]), ex=ttl)
+                        await pipe.execute()
+            except Exception as exc:
+                logger.warning("Embedding cache write skipped: %s", exc.__class__.__name__)
+    return vectors
@@ -0,0 +1,290 @@
+import asyncio
+import logging
+import os
+import time
+import uuid
+from typing import AsyncIterator, Literal
+
+from pydantic import BaseModel, Field
+
+from app.deps.redis import redis_client
+from app.services.outfit_langchain import (
+    ImageAnalysisRequest,
+    OutfitImageAnalysisDetails,
+    analyze_outfit_image,
+    fallback_image_analysis,
+    openai_enabled,
+)
+
+logger = logging.getLogger(__name__)
+
+JobItemStatus = Literal["pending", "running", "done", "fallback"]
+JobStatus = Literal["running", "completed"]
+
+_JOB_PREFIX = "image-job:"
+_JOB_TTL_SECONDS = 24 * 60 * 60
+
+# In-process job storage used when Redis is not configured.
+_local_jobs: dict[str, dict[str, str]] = {}
+# Running item tasks, held so they are not garbage-collected mid-flight.
+_job_tasks: set[asyncio.Task] = set()
+_job_semaphore: asyncio.Semaphore | None = None
+# Jobs with unfinished items in this process, kept alive by _heartbeat().
+_active_jobs: dict[str, int] = {}
+_heartbeat_task: asyncio.Task | None = None
+
+
+class ImageAnalysisJobCreate(BaseModel):
+    items: list[ImageAnalysisRequest] = Field(min_length=1)
+
+
+class ImageAnalysisJobItem(BaseModel):
+    index: int
+    status: JobItemStatus = "pending"
+    attempts: int = 0
+    request: ImageAnalysisRequest
+    result: OutfitImageAnalysisDetails | None = None
+
+
+class ImageAnalysisJob(BaseModel):
+    job_id: str
+    status: JobStatus
+    created_at: float
+    total: int
+    completed: int
+    fallback: int
+    items: list[ImageAnalysisJobItem] = Field(default_factory=list)
+
+
+class ImageAnalysisJobError(RuntimeError):
+    """Raised for user-fixable job problems (unknown job, too many items)."""
+
+
+def _max_items() -> int:
+    return int(os.getenv("IMAGE_JOB_MAX_ITEMS", "500"))
+
+
+def _max_attempts() -> int:
+    return max(int(os.getenv("IMAGE_JOB_MAX_ATTEMPTS", "3")), 1)
+
+
+def _heartbeat_interval() -> float:
+    return float(os.getenv("IMAGE_JOB_HEARTBEAT_SECONDS", "10"))
+
+
+def _stale_after() -> float:
+    return float(os.getenv("IMAGE_JOB_STALE_SECONDS", "60"))
+
+
+def _semaphore() -> asyncio.Semaphore:
+    """Process-wide cap on concurrent vision calls across every running job."""
+    global _job_semaphore
+    if _job_semaphore is None:
+        _job_semaphore = asyncio.Semaphore(int(os.getenv("IMAGE_JOB_CONCURRENCY", "4")))
+    return _job_semaphore
+
+
+async def _save(job_id: str, fields: dict[str, str]) -> None:
+    redis = redis_client()
+    if redis is not None:
+        try:
+            key = f"{_JOB_PREFIX}{job_id}"
+            await redis.hset(key, mapping=fields)
+            await redis.expire(key, _JOB_TTL_SECONDS)
+            return
+        except Exception as exc:
+            logger.warning("Image job storage using local state: %s", exc.__class__.__name__)
+    _evict_local_jobs()
+    _local_jobs.setdefault(job_id, {}).update(fields)
+
+
+def _evict_local_jobs() -> None:
+    """Drop local jobs older than the Redis TTL; the dict is in creation order."""
+    cutoff = time.time() - _JOB_TTL_SECONDS
+    for job_id in list(_local_jobs):
+        if float(_local_jobs[job_id].get("created_at", 0)) >= cutoff:
+            break
+        if job_id not in _active_jobs:
+            del _local_jobs[job_id]
+
+
+async def _load(job_id: str) -> dict[str, str]:
+    redis = redis_client()
+    if redis is not None:
+        try:
+            fields = await redis.hgetall(f"{_JOB_PREFIX}{job_id}")
+            if fields:
+                return fields
+        except Exception as exc:
+            logger.warning("Image job storage using local state: %s", exc.__class__.__name__)
+    return dict(_local_jobs.get(job_id, {}))
+
+
+async def _save_item(job_id: str, item: ImageAnalysisJobItem) -> None:
+    await _save(job_id, {f"item:{item.index}": item.model_dump_json()})
+
+
+async def get_image_analysis_job(job_id: str) -> ImageAnalysisJob:
+    fields = await _load(job_id)
+    if "created_at" not in fields:
+        raise ImageAnalysisJobError("Job not found")
+
+    items = sorted(
+        (
+            ImageAnalysisJobItem.model_validate_json(value)
+            for key, value in fields.items()
+            if key.startswith("item:")
+        ),
+        key=lambda item: item.index,
+    )
+    heartbeat = float(fields.get("heartbeat") or fields["created_at"])
+    if time.time() - heartbeat > _stale_after():
+        await _resolve_stale_items(job_id, items)
+
+    completed = sum(item.status in ("done", "fallback") for item in items)
+    return ImageAnalysisJob(
+        job_id=job_id,
+        status="completed" if completed == len(items) else "running",
+        created_at=float(fields["created_at"]),
+        total=len(items),
+        completed=completed,
+        fallback=sum(item.status == "fallback" for item in items),
+        items=items,
+    )
+
+
+async def _resolve_stale_items(job_id: str, items: list[ImageAnalysisJobItem]) -> None:
+    """
+    Finish items whose worker stopped heartbeating (e.g. it was restarted)
+    with the keyword fallback, so the job completes and they can be retried.
+    """
+    for item in items:
+        if item.status in ("pending", "running"):
+            logger.warning("Image job %s item %s is stale; using the fallback", job_id, item.index)
+            item.result = fallback_image_analysis(item.request)
+            item.status = "fallback"
+            await _save_item(job_id, item)
+
+
+async def _heartbeat() -> None:
+    while _active_jobs:
+        now = str(time.time())
+        for job_id in list(_active_jobs):
+            await _save(job_id, {"heartbeat": now})
+        await asyncio.sleep(_heartbeat_interval())
+
+
+async def _run_item(job_id: str, item: ImageAnalysisJobItem) -> None:
+    max_attempts = _max_attempts()
+    retryable = openai_enabled() and bool(item.request.image_url)
+    admission_wait_s = float(os.getenv("IMAGE_JOB_ADMISSION_WAIT_SECONDS", "60"))
+    result: OutfitImageAnalysisDetails | None = None
+
+    try:
+        while True:
+            # Hold a slot only for the call itself, not for the retry backoff.
+            async with _semaphore():
+                item.attempts += 1
+                item.status = "running"
+                await _save_item(job_id, item)
+
+                result = await analyze_outfit_image(
+                    item.request, admission_wait_s=admission_wait_s
+                )
+            if result.source == "vision" or not retryable or item.attempts >= max_attempts:
+                break
+            await asyncio.sleep(min(2 ** item.attempts, 30))
+    except Exception as exc:
+        logger.warning("Image job %s item %s failed: %s", job_id, item.index, exc)
+
+    item.result = result or fallback_image_analysis(item.request)
+    item.status = "done" if item.result.source == "vision" else "fallback"
+    await _save_item(job_id, item)
+
+
+def _schedule(job_id: str, item: ImageAnalysisJobItem) -> None:
+    global _heartbeat_task
+    _active_jobs[job_id] = _active_jobs.get(job_id, 0) + 1
+    task = asyncio.create_task(_run_item(job_id, item))
+    _job_tasks.add(task)
+    task.add_done_callback(_job_tasks.discard)
+    task.add_done_callback(lambda _: _item_finished(job_id))
+    if _heartbeat_task is None or _heartbeat_task.done():
+        _heartbeat_task = asyncio.create_task(_heartbeat())
+
+
+def _item_finished(job_id: str) -> None:
+    remaining = _active_jobs.get(job_id, 0) - 1
+    if remaining > 0:
+        _active_jobs[job_id] = remaining
+    else:
+        _active_jobs.pop(job_id, None)
+
+
+async def submit_image_analysis_job(payload: ImageAnalysisJobCreate) -> ImageAnalysisJob:
+    """
+    Store a new job and start analyzing its items in the background.
+    Items share a process-wide concurrency cap (IMAGE_JOB_CONCURRENCY) and wait
+    for the OpenAI limiter instead of falling back when it is saturated.
+
+    The worker running a job refreshes its heartbeat every
+    IMAGE_JOB_HEARTBEAT_SECONDS. If the worker dies, the job's unfinished items
+    are resolved with the fallback once the heartbeat is IMAGE_JOB_STALE_SECONDS
+    old, instead of staying "running" forever.
+    """
+    if len(payload.items) > _max_items():
+        raise ImageAnalysisJobError(f"At most {_max_items()} items per job")
+
+    job_id = uuid.uuid4().hex
+    items = [
+        ImageAnalysisJobItem(index=index, request=request)
+        for index, request in enumerate(payload.items)
+    ]
+    now = str(time.time())
+    fields = {"created_at": now, "heartbeat": now}
+    fields.update({f"item:{item.index}": item.model_dump_json() for item in items})
+    await _save(job_id, fields)
+
+    for item in items:
+        _schedule(job_id, item)
+    return await get_image_analysis_job(job_id)
+
+
+async def retry_image_analysis_item(job_id: str, index: int) -> ImageAnalysisJobItem:
+    """Re-run one finished item, e.g. after a fallback result."""
+    job = await get_image_analysis_job(job_id)
+    if index < 0 or index >= job.total:
+        raise ImageAnalysisJobError("Item not found")
+    item = job.items[index]
+    if item.status in ("pending", "running"):
+        raise ImageAnalysisJobError("Item is still being analyzed")
+
+    item = ImageAnalysisJobItem(index=index, request=item.request)
+    await _save(job_id, {f"item:{index}": item.model_dump_json(), "heartbeat": str(time.time())})
+    _schedule(job_id, item)
+    return item
+
+
+async def stream_image_analysis_job(
+    job_id: str,
+    poll_interval: float = 0.5,
+) -> AsyncIterator[tuple[str, dict]]:
+    """
+    Yield (event, data) pairs: one "progress" snapshot, then an "item" event
+    each time an item finishes, and a final "completed" event.
+    Polls storage so it works from any worker.
+    """
+    job = await get_image_analysis_job(job_id)
+    yield "progress", job.model_dump(exclude={"items"})
+
+    seen: set[int] = set()
+    while True:
+        for item in job.items:
+            if item.status in ("done", "fallback") and item.index not in seen:
+                seen.add(item.index)
+                yield "item", item.model_dump()
+        if job.status == "completed":
+            yield "completed", job.model_dump(exclude={"items"})
+            return
+        await asyncio.sleep(poll_interval)
+        job = await get_image_analysis_job(job_id)
@@ -0,0 +1,73 @@
+import re
+from typing import Iterable, Mapping
+
+
+def _trie_pattern(keywords: Iterable[str]) -> str:
+    """
+    Build a regex alternation factored into a prefix trie, e.g.
+    rain, raincoat, rain boot -> rain(?:coat|\\ boot)?
+    Greedy optional groups make each match the longest keyword at that position.
+    """
+    trie: dict = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: dict) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+        return f"(?:{body})?" if "" in node else body
+
+    return build(trie)
+
+
+class KeywordMatcher:
+    """
+    Finds every named keyword group present in a text with one regex pass.
+
+    Matches have the same substring semantics as `keyword in text`. The regex
+    returns the longest keyword at each position without overlaps, so each hit
+    also credits the keywords it contains. Keywords that could start inside a
+    hit and run past its end are rechecked directly.
+    """
+
+    def __init__(self, groups: Mapping[str, Iterable[str]]):
+        keyword_groups: dict[str, set[str]] = {}
+        for group, keywords in groups.items():
+            for keyword in keywords:
+                keyword_groups.setdefault(keyword, set()).add(group)
+
+        keywords = sorted(keyword_groups)
+        self._pattern = re.compile(_trie_pattern(keywords))
+        self._groups_for_hit: dict[str, frozenset[str]] = {}
+        self._straddlers: dict[str, tuple[str, ...]] = {}
+        for hit in keywords:
+            contained = [keyword for keyword in keywords if keyword in hit]
+            self._groups_for_hit[hit] = frozenset().union(
+                *(keyword_groups[keyword] for keyword in contained)
+            )
+            self._straddlers[hit] = tuple(
+                keyword
+                for keyword in keywords
+                if keyword not in contained
+                and any(
+                    hit.endswith(keyword[:size])
+                    for size in range(1, min(len(keyword), len(hit)))
+                )
+            )
+        self._keyword_groups = {
+            keyword: frozenset(groups) for keyword, groups in keyword_groups.items()
+        }
+
+    def groups(self, text: str) -> frozenset[str]:
+        found: set[str] = set()
+        for hit in self._pattern.findall(text):
+            found |= self._groups_for_hit[hit]
+            for keyword in self._straddlers[hit]:
+                if keyword in text:
+                    found |= self._keyword_groups[keyword]
+        return frozenset(found)
@@ -0,0 +1,136 @@
+"""
+Prometheus metrics for the backend hot paths, exposed on GET /metrics.
+
+Cache hit ratios are derived in queries, e.g.
+    sum by (cache) (rate(cache_requests_total{result="hit"}[5m]))
+      / sum by (cache) (rate(cache_requests_total[5m]))
+
+With several uvicorn/gunicorn workers, set PROMETHEUS_MULTIPROC_DIR to a
+shared empty directory so /metrics aggregates every process.
+"""
+import os
+from typing import Any
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+_LLM_BUCKETS = (0.25, 0.5, 1, 2, 3, 4, 6, 8, 12, 20, 30, 60)
+_BATCH_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Request latency by route template.",
+    ("method", "route", "status"),
+    buckets=_LATENCY_BUCKETS,
+)
+UPSTREAM_REQUEST_DURATION = Histogram(
+    "upstream_request_duration_seconds",
+    "Latency of calls to third-party APIs.",
+    ("upstream", "status"),
+    buckets=_LATENCY_BUCKETS,
+)
+CACHE_REQUESTS = Counter(
+    "cache_requests_total",
+    "Cache lookups by cache and result (hit, miss).",
+    ("cache", "result"),
+)
+EMBEDDING_BATCH_SIZE = Histogram(
+    "embedding_encode_batch_size",
+    "Texts per model.encode call.",
+    buckets=_BATCH_BUCKETS,
+)
+EMBEDDING_ENCODE_DURATION = Histogram(
+    "embedding_encode_duration_seconds",
+    "Wall time of model.encode calls.",
+    buckets=_LATENCY_BUCKETS,
+)
+LLM_CALL_DURATION = Histogram(
+    "llm_call_duration_seconds",
+    "Latency of LLM calls by operation and limiter outcome.",
+    ("operation", "outcome"),
+    buckets=_LLM_BUCKETS,
+)
+LLM_TOKENS = Counter(
+    "llm_tokens_total",
+    "Tokens reported by the provider.",
+    ("operation", "kind"),
+)
+ADMISSION_QUEUE_WAIT = Histogram(
+    "admission_queue_wait_seconds",
+    "Time requests waited for an endpoint-class slot.",
+    ("endpoint_class",),
+    buckets=_LATENCY_BUCKETS,
+)
+ADMISSION_SHED = Counter(
+    "admission_shed_total",
+    "Requests that did not get a slot, by reason (queue_full, queue_timeout) and action (rejected, degraded).",
+    ("endpoint_class", "reason", "action"),
+)
+LLM_RESULTS = Counter(
+    "llm_results_total",
+    "Results served by source (langchain, vision, fallback).",
+    ("operation", "source"),
+)
+
+
+def observe_cache(cache: str, hit: bool, count: int = 1) -> None:
+    CACHE_REQUESTS.labels(cache, "hit" if hit else "miss").inc(count)
+
+
+def observe_upstream(upstream: str, status: int | str, seconds: float) -> None:
+    UPSTREAM_REQUEST_DURATION.labels(upstream, str(status)).observe(seconds)
+
+
+def observe_encode(batch_size: int, seconds: float) -> None:
+    EMBEDDING_BATCH_SIZE.observe(batch_size)
+    EMBEDDING_ENCODE_DURATION.observe(seconds)
+
+
+def observe_llm_call(operation: str, outcome: str, seconds: float) -> None:
+    LLM_CALL_DURATION.labels(operation, outcome).observe(seconds)
+
+
+def observe_admission(
+    endpoint_class: str, wait_s: float, reason: str = "ok", action: str = "admitted"
+) -> None:
+    ADMISSION_QUEUE_WAIT.labels(endpoint_class).observe(wait_s)
+    if action != "admitted":
+        ADMISSION_SHED.labels(endpoint_class, reason, action).inc()
+
+
+def record_llm_result(operation: str, source: str) -> None:
+    LLM_RESULTS.labels(operation, source).inc()
+
+
+class LLMTokenUsage(BaseCallbackHandler):
+    """Counts prompt/completion tokens from each chat model response."""
+
+    def __init__(self, operation: str):
+        self.operation = operation
+
+    def on_llm_end(self, response: LLMResult, **kwargs: Any) -> None:
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+                if usage:
+                    LLM_TOKENS.labels(self.operation, "prompt").inc(usage.get("input_tokens", 0))
+                    LLM_TOKENS.labels(self.operation, "completion").inc(usage.get("output_tokens", 0))
+
+
+def metrics_payload() -> tuple[bytes, str]:
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
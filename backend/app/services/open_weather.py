@@ -1,20 +1,39 @@
 import os
 import json
+import time
 from typing import Optional, Tuple
 import httpx
 
+from app.services.metrics import observe_cache, observe_upstream
+from app.services.tracing import span
+
 from app.schemas.weather import (
     WeatherResponse, Coords, CurrentWeather, HourlyItem, DailyItem
 )
 
 # Environment / Endpoint constants
 OWM_KEY = os.getenv("OWM_API_KEY")
-GEOCODE = "https://api.openweathermap.org/geo/1.0/direct"
-ONECALL = "https://api.openweathermap.org/data/3.0/onecall"
+OWM_BASE_URL = os.getenv("OWM_BASE_URL", "https://api.openweathermap.org").rstrip("/")
+GEOCODE = f"{OWM_BASE_URL}/geo/1.0/direct"
+ONECALL = f"{OWM_BASE_URL}/data/3.0/onecall"
+GEOCODE_CACHE_TTL = 30 * 24 * 60 * 60  # place names rarely move
 
 class OpenWeatherError(RuntimeError):
     """Raised for user-fixable problems (missing key, bad location, etc.)."""
     ...
+
+
+async def _timed_get(client: httpx.AsyncClient, upstream: str, url: str, params: dict) -> httpx.Response:
+    """GET that records upstream latency by status ("error" if no response)."""
+    started = time.perf_counter()
+    status: int | str = "error"
+    try:
+        with span(upstream):
+            r = await client.get(url, params=params)
+        status = r.status_code
+        return r
+    finally:
+        observe_upstream(upstream, status, time.perf_counter() - started)
     
     
 
@@ -30,7 +49,7 @@ async def _geocode(q: str) -> Tuple[float, float]:
 
     params = {"q": q, "limit": 1, "appid": OWM_KEY}
     async with httpx.AsyncClient(timeout=15) as client:
-        r = await client.get(GEOCODE, params=params)
+        r = await _timed_get(client, "geocode", GEOCODE, params)
         # 404 from OWM means "not found"; other 4xx/5xx will raise below
         if r.status_code == 404:
             raise OpenWeatherError("Location not found")
@@ -60,9 +79,36 @@ async def _onecall(lat: float, lon: float, units: str) -> dict:
         "appid": OWM_KEY
     }
     async with httpx.AsyncClient(timeout=20) as client:
-        r = await client.get(ONECALL, params=params)
+        r = await _timed_get(client, "onecall", ONECALL, params)
         r.raise_for_status()
-        return r.json()
+        with span("onecall_json"):
+            return r.json()
+
+
+async def _cached_geocode(q: str, redis=None) -> Tuple[float, float]:
+    """
+    _geocode with a long-lived Redis cache keyed on the normalized place string.
+    Cache errors are non-fatal, like the weather cache.
+    """
+    cache_key = f"geo:{' '.join(q.lower().split())}"
+    if redis:
+        try:
+            with span("geocode_cache"):
+                cached = await redis.get(cache_key)
+            observe_cache("geocode", bool(cached))
+            if cached:
+                lat, lon = cached.split(",")
+                return float(lat), float(lon)
+        except Exception:
+            pass
+
+    lat, lon = await _geocode(q)
+    if redis:
+        try:
+            await redis.set(cache_key, f"{lat},{lon}", ex=GEOCODE_CACHE_TTL)
+        except Exception:
+            pass
+    return lat, lon
 
 
 def _shape(payload: dict, lat: float, lon: float, units: str) -> WeatherResponse:
@@ -122,7 +168,8 @@ async def fetch_weather(
     lon: Optional[float] = None,
     units: str = "metric",
     redis=None,              # pass an async redis client from deps/redis.py
-    cache_ttl: int = 600     # default cache: 10 minutes
+    cache_ttl: int = 600,    # default cache: 10 minutes
+    refresh: bool = False,   # skip the cache read (prefetch), still write
 ) -> WeatherResponse:
     """
     Public entry point used by the router.
@@ -134,29 +181,34 @@ async def fetch_weather(
     if lat is None or lon is None:
         if not q:
             raise OpenWeatherError("Provide q or lat/lon")
-        lat, lon = await _geocode(q)
+        lat, lon = await _cached_geocode(q, redis)
 
     # Build a stable cache key rounded to 4 decimal places (~11m precision)
     cache_key = f"owm:{units}:{round(lat,4)}:{round(lon,4)}"
 
     # Try Redis cache first (non-fatal on cache errors)
-    if redis:
+    if redis and not refresh:
         try:
-            cached = await redis.get(cache_key)
+            with span("weather_cache"):
+                cached = await redis.get(cache_key)
+            observe_cache("weather", bool(cached))
             if cached:
                 # Pydantic v2 helper to rebuild from JSON
-                return WeatherResponse.model_validate_json(cached)
+                with span("weather_validate"):
+                    return WeatherResponse.model_validate_json(cached)
         except Exception:
             pass
 
     # Hit OWM API and shape the response
     data = await _onecall(lat, lon, units)
-    shaped = _shape(data, lat, lon, units)
+    with span("shape"):
+        shaped = _shape(data, lat, lon, units)
 
     # Save to Redis for a short TTL to balance freshness vs quota
     if redis:
         try:
-            await redis.set(cache_key, shaped.model_dump_json(), ex=cache_ttl)
+            with span("weather_cache_write"):
+                await redis.set(cache_key, shaped.model_dump_json(), ex=cache_ttl)
         except Exception:
             pass
 
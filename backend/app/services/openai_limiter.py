@@ -0,0 +1,332 @@
+import asyncio
+import logging
+import os
+import random
+import time
+import uuid
+from typing import Literal
+
+from app.deps.redis import redis_client
+
+logger = logging.getLogger(__name__)
+
+Outcome = Literal["success", "failure", "neutral"]
+CircuitState = Literal["closed", "open", "half_open"]
+
+_STATE_KEY = "openai:limiter"
+_INFLIGHT_KEY = "openai:limiter:inflight"
+
+# Token bucket refill, AIMD concurrency cap, and circuit breaker in one atomic
+# step so every worker sees the same budget.
+# KEYS: state hash, inflight zset
+# ARGV: now_ms, permit_id, capacity, refill_per_ms, initial_limit, permit_ttl_ms
+_ACQUIRE_LUA = """
+local s = redis.call('HMGET', KEYS[1], 'tokens', 'ts', 'limit', 'circuit', 'open_until', 'probe_until')
+local now = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[3])
+local tokens = tonumber(s[1]) or capacity
+local ts = tonumber(s[2]) or now
+local limit = tonumber(s[3]) or tonumber(ARGV[5])
+local circuit = s[4] or 'closed'
+local open_until = tonumber(s[5]) or 0
+local probe_until = tonumber(s[6]) or 0
+local ttl = tonumber(ARGV[6])
+
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * tonumber(ARGV[4]))
+redis.call('ZREMRANGEBYSCORE', KEYS[2], '-inf', now)
+local inflight = redis.call('ZCARD', KEYS[2])
+
+local granted = 0
+local probe = 0
+local reason = 'ok'
+if circuit == 'open' and now < open_until then
+  reason = 'open'
+else
+  if circuit == 'open' then
+    circuit = 'half_open'
+  end
+  if circuit == 'half_open' and now < probe_until then
+    reason = 'half_open'
+  elseif inflight >= math.floor(limit) then
+    reason = 'concurrency'
+  elseif tokens < 1 then
+    reason = 'rate'
+  else
+    granted = 1
+    tokens = tokens - 1
+    redis.call('ZADD', KEYS[2], now + ttl, ARGV[2])
+    if circuit == 'half_open' then
+      probe = 1
+      probe_until = now + ttl
+    end
+  end
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now, 'limit', limit,
+  'circuit', circuit, 'probe_until', probe_until)
+redis.call('PEXPIRE', KEYS[1], 86400000)
+redis.call('PEXPIRE', KEYS[2], ttl)
+return {granted, probe, reason}
+"""
+
+# KEYS: state hash, inflight zset
+# ARGV: now_ms, permit_id, outcome, probe, min_limit, max_limit,
+#       failure_threshold, base_open_ms, max_open_ms, initial_limit
+_RELEASE_LUA = """
+redis.call('ZREM', KEYS[2], ARGV[2])
+local s = redis.call('HMGET', KEYS[1], 'limit', 'circuit', 'failures', 'open_ms')
+local now = tonumber(ARGV[1])
+local outcome = ARGV[3]
+local probe = ARGV[4] == '1'
+local min_limit = tonumber(ARGV[5])
+local max_limit = tonumber(ARGV[6])
+local base_open = tonumber(ARGV[8])
+local limit = tonumber(s[1]) or tonumber(ARGV[10])
+local circuit = s[2] or 'closed'
+local failures = tonumber(s[3]) or 0
+local open_ms = tonumber(s[4]) or base_open
+
+if outcome == 'success' then
+  limit = math.min(max_limit, limit + 1 / math.max(limit, 1))
+  failures = 0
+  if probe then
+    circuit = 'closed'
+    open_ms = base_open
+  end
+  redis.call('HSET', KEYS[1], 'probe_until', 0)
+elseif outcome == 'failure' then
+  limit = math.max(min_limit, limit / 2)
+  failures = failures + 1
+  if probe then
+    open_ms = math.min(tonumber(ARGV[9]), open_ms * 2)
+  end
+  if probe or (circuit == 'closed' and failures >= tonumber(ARGV[7])) then
+    circuit = 'open'
+    redis.call('HSET', KEYS[1], 'open_until', now + open_ms, 'probe_until', 0)
+  end
+elseif probe then
+  redis.call('HSET', KEYS[1], 'probe_until', 0)
+end
+
+redis.call('HSET', KEYS[1], 'limit', limit, 'circuit', circuit,
+  'failures', failures, 'open_ms', open_ms)
+return circuit
+"""
+
+
+def _env_float(name: str, default: float) -> float:
+    return float(os.getenv(name) or default)
+
+
+def classify_openai_error(exc: Exception) -> Outcome:
+    """
+    Map a provider exception to a limiter outcome.
+
+    Throttling, server errors, timeouts, and connection errors are congestion
+    signals; anything else (bad request, schema mismatch) leaves the limits alone.
+    """
+    status_code = getattr(exc, "status_code", None)
+    if status_code is None:
+        name = exc.__class__.__name__
+        return "failure" if "Timeout" in name or "Connection" in name else "neutral"
+    return "failure" if status_code == 429 or status_code >= 500 else "neutral"
+
+
+class OpenAIPermit:
+    """A granted slot for one provider call; release it exactly once."""
+
+    def __init__(self, limiter: "OpenAILimiter", permit_id: str, probe: bool, shared: bool):
+        self.limiter = limiter
+        self.permit_id = permit_id
+        self.probe = probe
+        self.shared = shared
+        self._released = False
+
+    async def release(self, outcome: Outcome) -> None:
+        if self._released:
+            return
+        self._released = True
+        await self.limiter._release(self, outcome)
+
+
+class OpenAILimiter:
+    """
+    Admission control for OpenAI calls, shared across workers through Redis.
+
+    - A token bucket caps request rate at OPENAI_REQUESTS_PER_MINUTE.
+    - An AIMD concurrency cap grows by ~1 per window of successes and halves on
+      throttling or provider failures.
+    - A circuit breaker opens after OPENAI_CIRCUIT_FAILURE_THRESHOLD consecutive
+      failures, then lets single probe requests through (half-open) instead of
+      staying dark; each failed probe doubles the open time up to
+      OPENAI_RATE_LIMIT_COOLDOWN_SECONDS.
+
+    Without Redis (or when Redis errors) the same policy runs in-process.
+    """
+
+    def __init__(self) -> None:
+        requests_per_minute = _env_float("OPENAI_REQUESTS_PER_MINUTE", 500)
+        self.capacity = _env_float("OPENAI_BURST", max(requests_per_minute / 6, 1))
+        self.refill_per_ms = requests_per_minute / 60_000
+        self.min_limit = _env_float("OPENAI_MIN_CONCURRENCY", 1)
+        self.max_limit = _env_float("OPENAI_MAX_CONCURRENCY", 32)
+        self.initial_limit = min(
+            self.max_limit, _env_float("OPENAI_INITIAL_CONCURRENCY", 8)
+        )
+        self.failure_threshold = int(_env_float("OPENAI_CIRCUIT_FAILURE_THRESHOLD", 3))
+        self.base_open_ms = max(_env_float("OPENAI_CIRCUIT_OPEN_SECONDS", 15), 1) * 1000
+        self.max_open_ms = max(
+            _env_float("OPENAI_RATE_LIMIT_COOLDOWN_SECONDS", 300) * 1000, self.base_open_ms
+        )
+        self.permit_ttl_ms = _env_float("OPENAI_PERMIT_TTL_SECONDS", 120) * 1000
+        self._acquire_script = None
+        self._release_script = None
+        self._local: dict[str, float | str] = {}
+        self._local_inflight: dict[str, float] = {}
+
+    def _scripts(self, redis):
+        if self._acquire_script is None or self._acquire_script.registered_client is not redis:
+            self._acquire_script = redis.register_script(_ACQUIRE_LUA)
+            self._release_script = redis.register_script(_RELEASE_LUA)
+        return self._acquire_script, self._release_script
+
+    async def acquire(self) -> tuple[OpenAIPermit | None, str]:
+        """
+        Try to take a slot without waiting.
+        Returns (permit, "ok") or (None, reason) where reason is one of
+        "open", "half_open", "concurrency", or "rate".
+        """
+        permit_id = uuid.uuid4().hex
+        now = time.time() * 1000
+        redis = redis_client()
+        if redis is not None:
+            try:
+                acquire_script, _ = self._scripts(redis)
+                granted, probe, reason = await acquire_script(
+                    keys=[_STATE_KEY, _INFLIGHT_KEY],
+                    args=[
+                        now,
+                        permit_id,
+                        self.capacity,
+                        self.refill_per_ms,
+                        self.initial_limit,
+                        self.permit_ttl_ms,
+                    ],
+                )
+                if not int(granted):
+                    return None, str(reason)
+                return OpenAIPermit(self, permit_id, bool(int(probe)), shared=True), "ok"
+            except Exception as exc:
+                logger.warning("OpenAI limiter using local state: %s", exc.__class__.__name__)
+
+        return self._acquire_local(permit_id, now)
+
+    async def acquire_wait(self, timeout: float) -> tuple[OpenAIPermit | None, str]:
+        """Like acquire(), but keep retrying with backoff for up to timeout seconds."""
+        deadline = time.monotonic() + timeout
+        delay = 0.05
+        while True:
+            permit, reason = await self.acquire()
+            remaining = deadline - time.monotonic()
+            if permit is not None or remaining <= 0:
+                return permit, reason
+            await asyncio.sleep(min(delay * random.uniform(0.5, 1.5), remaining))
+            delay = min(delay * 2, 1.0)
+
+    async def _release(self, permit: OpenAIPermit, outcome: Outcome) -> None:
+        now = time.time() * 1000
+        if permit.shared:
+            redis = redis_client()
+            if redis is not None:
+                try:
+                    _, release_script = self._scripts(redis)
+                    circuit = await release_script(
+                        keys=[_STATE_KEY, _INFLIGHT_KEY],
+                        args=[
+                            now,
+                            permit.permit_id,
+                            outcome,
+                            int(permit.probe),
+                            self.min_limit,
+                            self.max_limit,
+                            self.failure_threshold,
+                            self.base_open_ms,
+                            self.max_open_ms,
+                            self.initial_limit,
+                        ],
+                    )
+                    if circuit == "open" and outcome == "failure":
+                        logger.warning("OpenAI circuit breaker open")
+                    return
+                except Exception as exc:
+                    logger.warning(
+                        "OpenAI limiter release failed: %s", exc.__class__.__name__
+                    )
+                    return
+
+        self._release_local(permit, outcome, now)
+
+    def _acquire_local(self, permit_id: str, now: float) -> tuple[OpenAIPermit | None, str]:
+        state = self._local
+        tokens = float(state.get("tokens", self.capacity))
+        ts = float(state.get("ts", now))
+        tokens = min(self.capacity, tokens + max(0.0, now - ts) * self.refill_per_ms)
+        limit = float(state.get("limit", self.initial_limit))
+        circuit = str(state.get("circuit", "closed"))
+        probe_until = float(state.get("probe_until", 0))
+        self._local_inflight = {
+            key: expires for key, expires in self._local_inflight.items() if expires > now
+        }
+        state["tokens"] = tokens
+        state["ts"] = now
+
+        if circuit == "open":
+            if now < float(state.get("open_until", 0)):
+                return None, "open"
+            circuit = state["circuit"] = "half_open"
+        if circuit == "half_open" and now < probe_until:
+            return None, "half_open"
+        if len(self._local_inflight) >= int(limit):
+            return None, "concurrency"
+        if tokens < 1:
+            return None, "rate"
+
+        state["tokens"] = tokens - 1
+        self._local_inflight[permit_id] = now + self.permit_ttl_ms
+        probe = circuit == "half_open"
+        if probe:
+            state["probe_until"] = now + self.permit_ttl_ms
+        return OpenAIPermit(self, permit_id, probe, shared=False), "ok"
+
+    def _release_local(self, permit: OpenAIPermit, outcome: Outcome, now: float) -> None:
+        state = self._local
+        self._local_inflight.pop(permit.permit_id, None)
+        limit = float(state.get("limit", self.initial_limit))
+        circuit = str(state.get("circuit", "closed"))
+        failures = int(state.get("failures", 0))
+        open_ms = float(state.get("open_ms", self.base_open_ms))
+
+        if outcome == "success":
+            limit = min(self.max_limit, limit + 1 / max(limit, 1))
+            failures = 0
+            if permit.probe:
+                circuit = "closed"
+                open_ms = self.base_open_ms
+            state["probe_until"] = 0
+        elif outcome == "failure":
+            limit = max(self.min_limit, limit / 2)
+            failures += 1
+            if permit.probe:
+                open_ms = min(self.max_open_ms, open_ms * 2)
+            if permit.probe or (circuit == "closed" and failures >= self.failure_threshold):
+                circuit = "open"
+                state["open_until"] = now + open_ms
+                state["probe_until"] = 0
+                logger.warning("OpenAI circuit breaker open")
+        elif permit.probe:
+            state["probe_until"] = 0
+
+        state.update(limit=limit, circuit=circuit, failures=failures, open_ms=open_ms)
+
+
+openai_limiter = OpenAILimiter()
@@ -1,13 +1,47 @@
+import asyncio
+import hashlib
 import json
 import logging
 import os
 import time
-from typing import Any, Literal
-
+from functools import lru_cache
+from typing import Any, AsyncIterator, Literal, TypeVar
+
+import httpx
+from langchain_core.messages import HumanMessage, SystemMessage
+from langchain_core.output_parsers.openai_tools import JsonOutputKeyToolsParser
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.runnables import Runnable
+from langchain_openai import ChatOpenAI
 from pydantic import BaseModel, Field
 
+from app.deps.redis import redis_client
+from app.services.admission import request_degraded
+from app.services.keyword_matcher import KeywordMatcher
+from app.services.metrics import (
+    LLMTokenUsage,
+    observe_cache,
+    observe_llm_call,
+    record_llm_result,
+)
+from app.services.openai_limiter import (
+    OpenAIPermit,
+    Outcome,
+    classify_openai_error,
+    openai_limiter,
+)
+from app.services.prompt_compaction import compact_explanation_text, prompt_token_report
+from app.services.tracing import span
+
 logger = logging.getLogger(__name__)
-_rate_limited_until = 0.0
+T = TypeVar("T")
+
+_STREAMED_EXPLANATION_FIELDS = ("summary", "item_reasons", "outfit_reason")
+_EXPLANATION_CACHE_PREFIX = "explain:"
+
+# Late LLM calls that outlived their latency budget but are still allowed to
+# finish (and fill the explanation cache); held here so they are not GC'd.
+_background_tasks: set[asyncio.Task] = set()
 
 OutfitCategory = Literal["upper", "lower", "accessories", "shoes"]
 WaterResistance = Literal["none", "resistant", "waterproof"]
@@ -59,14 +93,34 @@ class ExplanationRequest(BaseModel):
     missing_categories: list[str] = Field(default_factory=list)
 
 
-class ImageAnalysisRequest(BaseModel):
-    image_url: str
+class WeatherTagRequest(BaseModel):
     label: str | None = None
     description: str | None = None
     brand: str | None = None
     category_hint: OutfitCategory | None = None
 
 
+class ImageAnalysisRequest(WeatherTagRequest):
+    image_url: str
+
+
+class WeatherTagBatchRequest(BaseModel):
+    items: list[WeatherTagRequest] = Field(min_length=1)
+
+
+class WeatherTagEstimate(BaseModel):
+    category: OutfitCategory | None = None
+    water_resistance: WaterResistance | None = None
+    wind_block: WeatherLevel | None = None
+    breathability: WeatherLevel | None = None
+    coverage_top: CoverageTop | None = None
+    coverage_bottom: CoverageBottom | None = None
+    footwear_type: FootwearType | None = None
+    warmth_score: int
+    min_temp_c: float
+    max_temp_c: float
+
+
 class OutfitImageAnalysis(BaseModel):
     category: OutfitCategory | None = Field(
         default=None,
@@ -142,6 +196,10 @@ def _openai_api_key() -> str | None:
     return os.getenv("OPENAI_API_KEY") or os.getenv("GPT_key")
 
 
+def openai_enabled() -> bool:
+    return bool(_openai_api_key())
+
+
 def _openai_model(default: str = "gpt-4o-mini") -> str:
     return os.getenv("OPENAI_MODEL") or os.getenv("GPT_MODEL") or default
 
@@ -150,34 +208,170 @@ def _openai_vision_model(default: str = "gpt-4o-mini") -> str:
     return os.getenv("OPENAI_VISION_MODEL") or _openai_model(default)
 
 
-def _openai_cooldown_active() -> bool:
-    return time.monotonic() < _rate_limited_until
+_EXPLANATION_PROMPT = ChatPromptTemplate.from_messages(
+    [
+        (
+            "system",
+            "You explain a weather-based outfit recommendation. "
+            "Return structured JSON matching the schema exactly. "
+            "Use only the selected wardrobe items provided. "
+            "Do not invent wardrobe items, brands, colors, or weather facts. "
+            "For item_reasons, include one concise reason for each selected item, "
+            "covering why that exact clothing item was chosen. "
+            "For outfit_reason, explain why the selected clothes fit together as an outfit, "
+            "using coverage, warmth, rain, wind, comfort, style, and occasion when provided. "
+            "Do not make medical or safety claims. "
+            "Keep the writing concise and user-friendly.",
+        ),
+        (
+            "human",
+            "Weather, selected outfit items, item metadata, item scores, style, "
+            "occasion, and missing categories:\n{payload}",
+        ),
+    ]
+)
+
+_IMAGE_ANALYSIS_SYSTEM = (
+    "You analyze a product image for a weather-aware wardrobe app. "
+    "Return structured metadata for the single visible clothing item. "
+    "Use the supplied title, brand, description, and category hint as context, "
+    "but prefer visible image evidence for color, coverage, and item type. "
+    "Use null for properties that cannot be inferred. "
+    "Never claim waterproofing, wind protection, fabric, or insulation unless it is "
+    "strongly implied by visible construction or supplied product text. "
+    "Always estimate warmth_score, min_temp_c, and max_temp_c; those three fields must "
+    "be numeric conservative estimates even when the exact fabric is unknown. "
+    "Temperature ranges are approximate Celsius comfort estimates."
+)
+
+
+@lru_cache
+def _openai_http_client() -> httpx.AsyncClient:
+    """
+    Shared keep-alive connection pool for every ChatOpenAI client, so requests
+    reuse warm TLS connections to the provider instead of opening new ones.
+    """
+    max_connections = int(os.getenv("OPENAI_MAX_CONNECTIONS", "20"))
+    return httpx.AsyncClient(
+        timeout=httpx.Timeout(60.0, connect=10.0),
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+            keepalive_expiry=120.0,
+        ),
+    )
+
 
+@lru_cache(maxsize=8)
+def _explanation_llm(model: str, api_key: str) -> ChatOpenAI:
+    return ChatOpenAI(
+        model=model,
+        temperature=0,
+        api_key=api_key,
+        http_async_client=_openai_http_client(),
+        stream_usage=True,
+        callbacks=[LLMTokenUsage("explanation")],
+    )
 
-def _record_openai_error(exc: Exception, context: str) -> None:
-    global _rate_limited_until
 
-    status_code = getattr(exc, "status_code", None)
-    if status_code == 429:
-        cooldown_seconds = int(os.getenv("OPENAI_RATE_LIMIT_COOLDOWN_SECONDS", "300"))
-        _rate_limited_until = time.monotonic() + max(cooldown_seconds, 1)
+@lru_cache(maxsize=8)
+def _explanation_chain(model: str, api_key: str) -> Runnable:
+    llm = _explanation_llm(model, api_key)
+    return _EXPLANATION_PROMPT | llm.with_structured_output(OutfitExplanation)
+
+
+@lru_cache(maxsize=8)
+def _explanation_stream_chain(model: str, api_key: str) -> Runnable:
+    """
+    Tool-calling variant of the explanation chain whose parser yields partial
+    dicts while the model is still generating, so fields can be streamed.
+    """
+    llm = _explanation_llm(model, api_key).bind_tools(
+        [OutfitExplanation], tool_choice=OutfitExplanation.__name__
+    )
+    parser = JsonOutputKeyToolsParser(key_name=OutfitExplanation.__name__, first_tool_only=True)
+    return _EXPLANATION_PROMPT | llm | parser
+
+
+@lru_cache(maxsize=8)
+def _image_analyzer(model: str, api_key: str) -> Runnable:
+    llm = ChatOpenAI(
+        model=model,
+        temperature=0,
+        api_key=api_key,
+        max_retries=1,
+        http_async_client=_openai_http_client(),
+        callbacks=[LLMTokenUsage("image_analysis")],
+    )
+    return llm.with_structured_output(OutfitImageAnalysis)
+
+
+def warm_langchain_clients() -> None:
+    """Build the explanation chain and image analyzer once at startup."""
+    api_key = _openai_api_key()
+    if not api_key:
+        return
+    _explanation_chain(_openai_model(), api_key)
+    _explanation_stream_chain(_openai_model(), api_key)
+    _image_analyzer(_openai_vision_model(), api_key)
+
+
+async def close_langchain_clients() -> None:
+    """Drop cached chains and close the shared provider connection pool."""
+    _explanation_chain.cache_clear()
+    _explanation_stream_chain.cache_clear()
+    _explanation_llm.cache_clear()
+    _image_analyzer.cache_clear()
+    if _openai_http_client.cache_info().currsize:
+        await _openai_http_client().aclose()
+    _openai_http_client.cache_clear()
+
 
+def _record_openai_error(exc: Exception, context: str) -> Outcome:
+    status_code = getattr(exc, "status_code", None)
     logger.warning(
         "%s fallback: %s%s",
         context,
         exc.__class__.__name__,
         f" status={status_code}" if status_code else "",
     )
+    return classify_openai_error(exc)
+
+
+def _latency_budget(env_name: str, default: float, requested: float | None = None) -> float | None:
+    """
+    Seconds a caller will wait for the LLM before using the fallback.
+    A per-request budget can only tighten the configured one; 0 disables it.
+    """
+    configured = float(os.getenv(env_name) or default)
+    budgets = [budget for budget in (configured, requested) if budget and budget > 0]
+    return min(budgets) if budgets else None
+
+
+async def _await_within_budget(
+    task: "asyncio.Task[T]", budget: float | None, finish_late: bool
+) -> T | None:
+    """
+    Wait for task up to budget seconds. On timeout return None and either let
+    the task finish in the background or cancel it.
+    """
+    if budget is None:
+        return await task
+    try:
+        return await asyncio.wait_for(asyncio.shield(task), budget)
+    except asyncio.TimeoutError:
+        if finish_late:
+            _background_tasks.add(task)
+            task.add_done_callback(_background_tasks.discard)
+        else:
+            task.cancel()
+        return None
 
 
 def _context_text(*values: str | None) -> str:
     return " ".join(value for value in values if value).lower()
 
 
-def _has_any(text: str, keywords: tuple[str, ...]) -> bool:
-    return any(keyword in text for keyword in keywords)
-
-
 def _clamp_int(value: int | float | None, min_value: int, max_value: int) -> int | None:
     if value is None:
         return None
@@ -206,14 +400,42 @@ def _temperature_range_for_warmth(warmth_score: int) -> tuple[float, float]:
     return ranges[warmth_score]
 
 
-def _estimate_category(payload: ImageAnalysisRequest, text: str) -> OutfitCategory | None:
+# Keyword groups for the heuristic weather tagger, matched in one pass per item.
+_WEATHER_TAG_KEYWORDS = {
+    "shoes": ("shoe", "sneaker", "boot", "loafer", "sandal", "heel"),
+    "lower": ("pants", "jeans", "trouser", "shorts", "skirt", "leggings"),
+    "accessories": ("hat", "cap", "beanie", "scarf", "glove", "umbrella", "bag"),
+    "top_jacket": ("jacket", "coat", "parka", "raincoat", "shell", "anorak"),
+    "top_long_sleeve": ("hoodie", "sweater", "sweatshirt", "long sleeve", "flannel"),
+    "top_short_sleeve": ("t-shirt", "tee", "polo", "short sleeve", "tank"),
+    "shorts": ("shorts", "skort"),
+    "footwear_boot": ("boot", "chelsea", "hiking"),
+    "footwear_open": ("sandal", "slide", "flip flop", "open toe"),
+    "waterproof": ("waterproof", "gore-tex", "rain boot", "raincoat"),
+    "water_resistant": ("water resistant", "water-resistant", "repellent", "shell", "rain"),
+    "wind_high": ("windproof", "hardshell", "shell", "parka", "raincoat"),
+    "wind_medium": ("jacket", "coat", "hoodie", "sweatshirt", "boot"),
+    "breathability_high": ("mesh", "linen", "tank", "sandal", "shorts", "running"),
+    "breathability_low": ("waterproof", "raincoat", "shell", "leather", "insulated"),
+    "warmth_heavy": ("parka", "puffer", "down", "insulated", "winter", "ski", "snow"),
+    "warmth_warm": ("fleece", "wool", "sherpa", "thermal", "coat"),
+    "warmth_mid": ("hoodie", "sweater", "sweatshirt"),
+    "warmth_light": ("tank", "sandal", "flip flop", "linen"),
+}
+
+_WEATHER_TAG_MATCHER = KeywordMatcher(_WEATHER_TAG_KEYWORDS)
+
+
+def _estimate_category(
+    payload: WeatherTagRequest, text: str, groups: frozenset[str]
+) -> OutfitCategory | None:
     if payload.category_hint:
         return payload.category_hint
-    if _has_any(text, ("shoe", "sneaker", "boot", "loafer", "sandal", "heel")):
+    if "shoes" in groups:
         return "shoes"
-    if _has_any(text, ("pants", "jeans", "trouser", "shorts", "skirt", "leggings")):
+    if "lower" in groups:
         return "lower"
-    if _has_any(text, ("hat", "cap", "beanie", "scarf", "glove", "umbrella", "bag")):
+    if "accessories" in groups:
         return "accessories"
     if text:
         return "upper"
@@ -221,7 +443,7 @@ def _estimate_category(payload: ImageAnalysisRequest, text: str) -> OutfitCatego
 
 
 def _estimate_weather_tags(
-    payload: ImageAnalysisRequest,
+    payload: WeatherTagRequest,
     analysis: OutfitImageAnalysis | None = None,
 ) -> dict[str, Any]:
     text = _context_text(
@@ -232,7 +454,10 @@ def _estimate_weather_tags(
         payload.description,
         payload.brand,
     )
-    category = (analysis.category if analysis else None) or _estimate_category(payload, text)
+    groups = _WEATHER_TAG_MATCHER.groups(text)
+    category = (analysis.category if analysis else None) or _estimate_category(
+        payload, text, groups
+    )
 
     coverage_top = analysis.coverage_top if analysis else None
     coverage_bottom = analysis.coverage_bottom if analysis else None
@@ -242,36 +467,36 @@ def _estimate_weather_tags(
     breathability = analysis.breathability if analysis else None
 
     if category == "upper" and coverage_top is None:
-        if _has_any(text, ("jacket", "coat", "parka", "raincoat", "shell", "anorak")):
+        if "top_jacket" in groups:
             coverage_top = "jacket"
-        elif _has_any(text, ("hoodie", "sweater", "sweatshirt", "long sleeve", "flannel")):
+        elif "top_long_sleeve" in groups:
             coverage_top = "long_sleeve"
-        elif _has_any(text, ("t-shirt", "tee", "polo", "short sleeve", "tank")):
+        elif "top_short_sleeve" in groups:
             coverage_top = "short_sleeve"
     if category == "lower" and coverage_bottom is None:
-        coverage_bottom = "shorts" if _has_any(text, ("shorts", "skort")) else "full_length"
+        coverage_bottom = "shorts" if "shorts" in groups else "full_length"
     if category == "shoes" and footwear_type is None:
-        if _has_any(text, ("boot", "chelsea", "hiking")):
+        if "footwear_boot" in groups:
             footwear_type = "boot"
-        elif _has_any(text, ("sandal", "slide", "flip flop", "open toe")):
+        elif "footwear_open" in groups:
             footwear_type = "open"
         else:
             footwear_type = "closed"
 
     if water_resistance is None:
-        if _has_any(text, ("waterproof", "gore-tex", "rain boot", "raincoat")):
+        if "waterproof" in groups:
             water_resistance = "waterproof"
-        elif _has_any(text, ("water resistant", "water-resistant", "repellent", "shell", "rain")):
+        elif "water_resistant" in groups:
             water_resistance = "resistant"
     if wind_block is None:
-        if _has_any(text, ("windproof", "hardshell", "shell", "parka", "raincoat")):
+        if "wind_high" in groups:
             wind_block = "high"
-        elif _has_any(text, ("jacket", "coat", "hoodie", "sweatshirt", "boot")):
+        elif "wind_medium" in groups:
             wind_block = "medium"
     if breathability is None:
-        if _has_any(text, ("mesh", "linen", "tank", "sandal", "shorts", "running")):
+        if "breathability_high" in groups:
             breathability = "high"
-        elif _has_any(text, ("waterproof", "raincoat", "shell", "leather", "insulated")):
+        elif "breathability_low" in groups:
             breathability = "low"
         else:
             breathability = "medium"
@@ -293,13 +518,13 @@ def _estimate_weather_tags(
         elif category == "accessories":
             warmth_score = 2
 
-        if _has_any(text, ("parka", "puffer", "down", "insulated", "winter", "ski", "snow")):
+        if "warmth_heavy" in groups:
             warmth_score = max(warmth_score, 8)
-        elif _has_any(text, ("fleece", "wool", "sherpa", "thermal", "coat")):
+        elif "warmth_warm" in groups:
             warmth_score = max(warmth_score, 6)
-        elif _has_any(text, ("hoodie", "sweater", "sweatshirt")):
+        elif "warmth_mid" in groups:
             warmth_score = max(warmth_score, 5)
-        elif _has_any(text, ("tank", "sandal", "flip flop", "linen")):
+        elif "warmth_light" in groups:
             warmth_score = min(warmth_score, 2)
 
     min_temp_c = _clamp_float(analysis.min_temp_c if analysis else None, -20, 50)
@@ -325,6 +550,11 @@ def _estimate_weather_tags(
     }
 
 
+def estimate_weather_tags_batch(items: list[WeatherTagRequest]) -> list[dict[str, Any]]:
+    """Keyword-heuristic weather tags for many catalog items at once (no LLM calls)."""
+    return [_estimate_weather_tags(item) for item in items]
+
+
 def _item_label(item: dict[str, Any]) -> str:
     label = item.get("label")
     category = item.get("category")
@@ -335,6 +565,42 @@ def _item_label(item: dict[str, Any]) -> str:
     return "selected item"
 
 
+def _full_explanation_text(payload: ExplanationRequest) -> str:
+    return json.dumps(payload.model_dump(), ensure_ascii=True)
+
+
+def _explanation_prompt_input(payload: ExplanationRequest) -> dict[str, str]:
+    if os.getenv("OUTFIT_EXPLAIN_COMPACT_PROMPT", "true").lower() == "false":
+        return {"payload": _full_explanation_text(payload)}
+
+    compact_text = compact_explanation_text(payload.model_dump())
+    if logger.isEnabledFor(logging.DEBUG):
+        report = prompt_token_report(_full_explanation_text(payload), compact_text, _openai_model())
+        logger.debug("Explanation prompt tokens: %s", report)
+    return {"payload": compact_text}
+
+
+def explanation_prompt_stats(payload: ExplanationRequest) -> dict[str, Any]:
+    """Prompt token counts for the full and compacted explanation payloads."""
+    return prompt_token_report(
+        _full_explanation_text(payload),
+        compact_explanation_text(payload.model_dump()),
+        _openai_model(),
+    )
+
+
+def _langchain_explanation_details(explanation: OutfitExplanation) -> OutfitExplanationDetails:
+    return OutfitExplanationDetails(
+        summary=explanation.summary,
+        item_reasons=explanation.item_reasons,
+        outfit_reason=explanation.outfit_reason,
+        reasons=explanation.reasons,
+        warnings=explanation.warnings,
+        missing_items_advice=explanation.missing_items_advice,
+        source="langchain",
+    )
+
+
 def fallback_explanation(payload: ExplanationRequest) -> OutfitExplanationDetails:
     weather = payload.weather_context
     selected = [_item_label(item) for item in payload.selected_items]
@@ -420,105 +686,215 @@ def fallback_image_analysis(payload: ImageAnalysisRequest) -> OutfitImageAnalysi
     )
 
 
-async def generate_outfit_explanation(payload: ExplanationRequest) -> OutfitExplanationDetails:
-    if _openai_cooldown_active():
-        logger.info("LangChain explanation fallback: OpenAI rate-limit cooldown active")
-        return fallback_explanation(payload)
+def _explanation_cache_key(model: str, prompt_input: dict[str, str]) -> str:
+    digest = hashlib.sha256(f"{model}\n{prompt_input['payload']}".encode()).hexdigest()
+    return f"{_EXPLANATION_CACHE_PREFIX}{digest}"
 
-    api_key = _openai_api_key()
-    if not api_key:
-        logger.info("LangChain explanation fallback: missing OPENAI_API_KEY or GPT_key")
-        return fallback_explanation(payload)
 
-    model = _openai_model()
+async def _cached_explanation(cache_key: str) -> OutfitExplanationDetails | None:
+    redis = redis_client()
+    if redis is None:
+        return None
+    try:
+        with span("explain_cache"):
+            cached = await redis.get(cache_key)
+        observe_cache("explanation", bool(cached))
+        if cached:
+            return OutfitExplanationDetails.model_validate_json(cached)
+    except Exception:
+        pass
+    return None
 
+
+async def _cache_explanation(cache_key: str, details: OutfitExplanationDetails) -> None:
+    redis = redis_client()
+    if redis is None or details.source != "langchain":
+        return
     try:
-        from langchain_core.prompts import ChatPromptTemplate
-        from langchain_openai import ChatOpenAI
-
-        prompt = ChatPromptTemplate.from_messages(
-            [
-                (
-                    "system",
-                    "You explain a weather-based outfit recommendation. "
-                    "Return structured JSON matching the schema exactly. "
-                    "Use only the selected wardrobe items provided. "
-                    "Do not invent wardrobe items, brands, colors, or weather facts. "
-                    "For item_reasons, include one concise reason for each selected item, "
-                    "covering why that exact clothing item was chosen. "
-                    "For outfit_reason, explain why the selected clothes fit together as an outfit, "
-                    "using coverage, warmth, rain, wind, comfort, style, and occasion when provided. "
-                    "Do not make medical or safety claims. "
-                    "Keep the writing concise and user-friendly.",
-                ),
-                (
-                    "human",
-                    "Weather, selected outfit items, item metadata, item scores, style, "
-                    "occasion, and missing categories:\n{payload}",
-                ),
-            ]
-        )
+        ttl = int(os.getenv("OUTFIT_EXPLAIN_CACHE_TTL_SECONDS", "3600"))
+        await redis.set(cache_key, details.model_dump_json(), ex=ttl)
+    except Exception:
+        pass
+
+
+async def _langchain_explanation(
+    payload: ExplanationRequest,
+    model: str,
+    api_key: str,
+    prompt_input: dict[str, str],
+    cache_key: str,
+    permit: OpenAIPermit,
+) -> OutfitExplanationDetails:
+    outcome: Outcome = "neutral"
+    started = time.perf_counter()
 
-        llm = ChatOpenAI(model=model, temperature=0, api_key=api_key)
-        chain = prompt | llm.with_structured_output(OutfitExplanation)
-        explanation = await chain.ainvoke(
-            {"payload": json.dumps(payload.model_dump(), ensure_ascii=True)}
-        )
+    try:
+        chain = _explanation_chain(model, api_key)
+        with span("llm"):
+            explanation = await chain.ainvoke(prompt_input)
+        outcome = "success"
 
         if not isinstance(explanation, OutfitExplanation):
             return fallback_explanation(payload)
 
-        return OutfitExplanationDetails(
-            summary=explanation.summary,
-            item_reasons=explanation.item_reasons,
-            outfit_reason=explanation.outfit_reason,
-            reasons=explanation.reasons,
-            warnings=explanation.warnings,
-            missing_items_advice=explanation.missing_items_advice,
-            source="langchain",
-        )
+        details = _langchain_explanation_details(explanation)
+        await _cache_explanation(cache_key, details)
+        return details
     except Exception as exc:
-        _record_openai_error(exc, "LangChain explanation")
+        outcome = _record_openai_error(exc, "LangChain explanation")
+        return fallback_explanation(payload)
+    finally:
+        observe_llm_call("explanation", outcome, time.perf_counter() - started)
+        await permit.release(outcome)
+
+
+async def generate_outfit_explanation(
+    payload: ExplanationRequest,
+    deadline_s: float | None = None,
+) -> OutfitExplanationDetails:
+    """
+    Explain the selected outfit, falling back to the deterministic explanation
+    if the LLM is unavailable or misses its latency budget
+    (OUTFIT_EXPLAIN_BUDGET_SECONDS, optionally tightened by deadline_s).
+    """
+    details = await _generate_outfit_explanation(payload, deadline_s)
+    record_llm_result("explanation", details.source)
+    return details
+
+
+async def _generate_outfit_explanation(
+    payload: ExplanationRequest,
+    deadline_s: float | None,
+) -> OutfitExplanationDetails:
+    api_key = _openai_api_key()
+    if not api_key:
+        logger.info("LangChain explanation fallback: missing OPENAI_API_KEY or GPT_key")
         return fallback_explanation(payload)
 
+    model = _openai_model()
+    with span("prompt"):
+        prompt_input = _explanation_prompt_input(payload)
+        cache_key = _explanation_cache_key(model, prompt_input)
+    cached = await _cached_explanation(cache_key)
+    if cached is not None:
+        return cached
+
+    if request_degraded():
+        logger.info("LangChain explanation fallback: llm endpoint pool saturated")
+        return fallback_explanation(payload)
+
+    with span("limiter"):
+        permit, reason = await openai_limiter.acquire()
+    if permit is None:
+        logger.info("LangChain explanation fallback: OpenAI limiter %s", reason)
+        return fallback_explanation(payload)
+
+    task = asyncio.create_task(
+        _langchain_explanation(payload, model, api_key, prompt_input, cache_key, permit)
+    )
+    budget = _latency_budget("OUTFIT_EXPLAIN_BUDGET_SECONDS", 6.0, deadline_s)
+    finish_late = os.getenv("OUTFIT_EXPLAIN_FINISH_LATE", "true").lower() != "false"
+    details = await _await_within_budget(task, budget, finish_late)
+    if details is None:
+        logger.info("LangChain explanation fallback: latency budget %.2fs exceeded", budget)
+        return fallback_explanation(payload)
+    return details
 
-async def analyze_outfit_image(payload: ImageAnalysisRequest) -> OutfitImageAnalysisDetails:
-    if _openai_cooldown_active():
-        logger.info("Outfit image analysis fallback: OpenAI rate-limit cooldown active")
-        return fallback_image_analysis(payload)
+
+async def stream_outfit_explanation(
+    payload: ExplanationRequest,
+) -> AsyncIterator[tuple[str, dict[str, Any]]]:
+    """
+    Yield (event, data) pairs for a streamed explanation.
+
+    The deterministic fallback is sent first so the UI can render immediately,
+    followed by "field" events as summary, item_reasons, and outfit_reason are
+    generated, and a closing "final" event with the complete details.
+    """
+    async for event, data in _stream_outfit_explanation(payload):
+        if event == "final":
+            record_llm_result("explanation", data["source"])
+        yield event, data
+
+
+async def _stream_outfit_explanation(
+    payload: ExplanationRequest,
+) -> AsyncIterator[tuple[str, dict[str, Any]]]:
+    fallback = fallback_explanation(payload)
+    yield "fallback", fallback.model_dump()
 
     api_key = _openai_api_key()
     if not api_key:
-        logger.info("Outfit image analysis fallback: missing OPENAI_API_KEY or GPT_key")
-        return fallback_image_analysis(payload)
-
-    if not payload.image_url:
-        return fallback_image_analysis(payload)
+        logger.info("LangChain explanation stream fallback: missing OPENAI_API_KEY or GPT_key")
+        yield "final", fallback.model_dump()
+        return
 
-    model = _openai_vision_model()
+    model = _openai_model()
+    with span("prompt"):
+        prompt_input = _explanation_prompt_input(payload)
+        cache_key = _explanation_cache_key(model, prompt_input)
+    cached = await _cached_explanation(cache_key)
+    if cached is not None:
+        yield "final", cached.model_dump()
+        return
+
+    if request_degraded():
+        logger.info("LangChain explanation stream fallback: llm endpoint pool saturated")
+        yield "final", fallback.model_dump()
+        return
+
+    with span("limiter"):
+        permit, reason = await openai_limiter.acquire()
+    if permit is None:
+        logger.info("LangChain explanation stream fallback: OpenAI limiter %s", reason)
+        yield "final", fallback.model_dump()
+        return
+
+    outcome: Outcome = "neutral"
+    started = time.perf_counter()
 
     try:
-        from langchain_core.messages import HumanMessage, SystemMessage
-        from langchain_openai import ChatOpenAI
+        chain = _explanation_stream_chain(model, api_key)
+        latest: dict[str, Any] = {}
+        async for partial in chain.astream(prompt_input):
+            if not isinstance(partial, dict):
+                continue
+            for field in _STREAMED_EXPLANATION_FIELDS:
+                if field in partial and partial[field] != latest.get(field):
+                    yield "field", {"field": field, "value": partial[field]}
+            latest = partial
+
+        outcome = "success"
+        explanation = OutfitExplanation.model_validate(latest)
+    except Exception as exc:
+        outcome = _record_openai_error(exc, "LangChain explanation stream")
+        yield "final", fallback.model_dump()
+        return
+    finally:
+        observe_llm_call("explanation", outcome, time.perf_counter() - started)
+        await permit.release(outcome)
+
+    details = _langchain_explanation_details(explanation)
+    await _cache_explanation(cache_key, details)
+    yield "final", details.model_dump()
+
+
+async def _vision_image_analysis(
+    payload: ImageAnalysisRequest,
+    model: str,
+    api_key: str,
+    permit: OpenAIPermit,
+) -> OutfitImageAnalysisDetails:
+    outcome: Outcome = "neutral"
+    started = time.perf_counter()
 
+    try:
         supplied_context = {
             "product_title": payload.label,
             "product_description": payload.description,
             "brand": payload.brand,
             "category_hint": payload.category_hint,
         }
-        system = (
-            "You analyze a product image for a weather-aware wardrobe app. "
-            "Return structured metadata for the single visible clothing item. "
-            "Use the supplied title, brand, description, and category hint as context, "
-            "but prefer visible image evidence for color, coverage, and item type. "
-            "Use null for properties that cannot be inferred. "
-            "Never claim waterproofing, wind protection, fabric, or insulation unless it is "
-            "strongly implied by visible construction or supplied product text. "
-            "Always estimate warmth_score, min_temp_c, and max_temp_c; those three fields must "
-            "be numeric conservative estimates even when the exact fabric is unknown. "
-            "Temperature ranges are approximate Celsius comfort estimates."
-        )
         human = HumanMessage(
             content=[
                 {
@@ -533,9 +909,10 @@ async def analyze_outfit_image(payload: ImageAnalysisRequest) -> OutfitImageAnal
             ]
         )
 
-        llm = ChatOpenAI(model=model, temperature=0, api_key=api_key, max_retries=1)
-        analyzer = llm.with_structured_output(OutfitImageAnalysis)
-        analysis = await analyzer.ainvoke([SystemMessage(content=system), human])
+        analyzer = _image_analyzer(model, api_key)
+        with span("vision_llm"):
+            analysis = await analyzer.ainvoke([SystemMessage(content=_IMAGE_ANALYSIS_SYSTEM), human])
+        outcome = "success"
 
         if not isinstance(analysis, OutfitImageAnalysis):
             return fallback_image_analysis(payload)
@@ -561,5 +938,62 @@ async def analyze_outfit_image(payload: ImageAnalysisRequest) -> OutfitImageAnal
         )
         return OutfitImageAnalysisDetails(**result)
     except Exception as exc:
-        _record_openai_error(exc, "Outfit image analysis")
+        outcome = _record_openai_error(exc, "Outfit image analysis")
+        return fallback_image_analysis(payload)
+    finally:
+        observe_llm_call("image_analysis", outcome, time.perf_counter() - started)
+        await permit.release(outcome)
+
+
+async def analyze_outfit_image(
+    payload: ImageAnalysisRequest,
+    deadline_s: float | None = None,
+    admission_wait_s: float = 0.0,
+) -> OutfitImageAnalysisDetails:
+    """
+    Infer wardrobe metadata from a product image, falling back to the keyword
+    heuristics if the vision model is unavailable or misses its latency budget
+    (OUTFIT_ANALYZE_IMAGE_BUDGET_SECONDS, optionally tightened by deadline_s).
+    Background callers can wait up to admission_wait_s for a limiter slot
+    instead of falling back immediately.
+    """
+    analysis = await _analyze_outfit_image(payload, deadline_s, admission_wait_s)
+    record_llm_result("image_analysis", analysis.source)
+    return analysis
+
+
+async def _analyze_outfit_image(
+    payload: ImageAnalysisRequest,
+    deadline_s: float | None,
+    admission_wait_s: float,
+) -> OutfitImageAnalysisDetails:
+    api_key = _openai_api_key()
+    if not api_key:
+        logger.info("Outfit image analysis fallback: missing OPENAI_API_KEY or GPT_key")
+        return fallback_image_analysis(payload)
+
+    if not payload.image_url:
+        return fallback_image_analysis(payload)
+
+    if request_degraded():
+        logger.info("Outfit image analysis fallback: vision endpoint pool saturated")
+        return fallback_image_analysis(payload)
+
+    with span("limiter"):
+        if admission_wait_s > 0:
+            permit, reason = await openai_limiter.acquire_wait(admission_wait_s)
+        else:
+            permit, reason = await openai_limiter.acquire()
+    if permit is None:
+        logger.info("Outfit image analysis fallback: OpenAI limiter %s", reason)
+        return fallback_image_analysis(payload)
+
+    task = asyncio.create_task(
+        _vision_image_analysis(payload, _openai_vision_model(), api_key, permit)
+    )
+    budget = _latency_budget("OUTFIT_ANALYZE_IMAGE_BUDGET_SECONDS", 20.0, deadline_s)
+    analysis = await _await_within_budget(task, budget, finish_late=False)
+    if analysis is None:
+        logger.info("Outfit image analysis fallback: latency budget %.2fs exceeded", budget)
         return fallback_image_analysis(payload)
+    return analysis
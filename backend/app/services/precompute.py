@@ -0,0 +1,366 @@
+"""
+Warm caches for each active user shortly before their local morning peak.
+
+Requests record a small per-user profile (last weather cell, timezone, style).
+While PRECOMPUTE_ENABLED is on, one worker (elected through Redis) wakes every
+PRECOMPUTE_TICK_SECONDS. For users whose window starts within
+PRECOMPUTE_LEAD_MINUTES, it refreshes weather for their cell, embeds the
+weekly-panel query texts, reranks their wardrobe, and optionally
+pre-generates explanations within a per-tick budget.
+
+Setting the Redis key precompute:disabled stops it on every worker
+immediately, including mid-tick.
+"""
+import asyncio
+import logging
+import os
+import time
+import uuid
+from collections import OrderedDict
+from datetime import date, datetime, timedelta, timezone, tzinfo
+from typing import Any, Optional
+from zoneinfo import ZoneInfo
+
+import asyncpg
+
+from app.deps.redis import redis_client
+from app.schemas.weather import WeatherResponse
+from app.services.open_weather import fetch_weather
+from app.services.outfit_langchain import generate_outfit_explanation, openai_enabled
+from app.services.recommendations import RecommendRequest, recommend_many, weather_context
+from app.services.rerank import explanation_request, js_round
+
+logger = logging.getLogger(__name__)
+
+_PROFILE_PREFIX = "precompute:user:"
+_ACTIVE_KEY = "precompute:active"
+_KILL_KEY = "precompute:disabled"
+_LEADER_KEY = "precompute:leader"
+_DONE_PREFIX = "precompute:done:"
+_PROFILE_TTL_SECONDS = 14 * 24 * 60 * 60
+_PROFILE_REWRITE_SECONDS = 15 * 60
+
+# In-process profiles used when Redis is not configured. User keys come from
+# clients, so these are LRUs capped at PRECOMPUTE_MAX_USERS.
+_local_profiles: OrderedDict[str, dict[str, str]] = OrderedDict()
+# Users claimed per local date; dates past the claim TTL are dropped.
+_local_done: dict[date, set[str]] = {}
+# What this worker last wrote per user, so repeat requests skip Redis.
+_last_written: OrderedDict[str, tuple[tuple, float]] = OrderedDict()
+_DONE_TTL_SECONDS = 2 * 24 * 60 * 60
+
+
+def _env_flag(name: str, default: str = "false") -> bool:
+    return os.getenv(name, default).lower() in ("1", "true", "yes", "on")
+
+
+def _max_users() -> int:
+    return int(os.getenv("PRECOMPUTE_MAX_USERS", "50000"))
+
+
+def _remember(cache: OrderedDict, user_key: str, value: Any) -> None:
+    cache[user_key] = value
+    cache.move_to_end(user_key)
+    while len(cache) > _max_users():
+        cache.popitem(last=False)
+
+
+def _timezone_name(value: Optional[str]) -> Optional[str]:
+    if not value:
+        return None
+    try:
+        ZoneInfo(value)
+    except Exception:
+        return None
+    return value
+
+
+async def record_activity(
+    user_key: Optional[str],
+    *,
+    lat: Optional[float] = None,
+    lon: Optional[float] = None,
+    units: Optional[str] = None,
+    tz: Optional[str] = None,
+    style: Optional[str] = None,
+    occasion: Optional[str] = None,
+) -> None:
+    """Merge what a request tells us about a user into their profile."""
+    if not user_key:
+        return
+    fields = {
+        "lat": None if lat is None else str(round(lat, 4)),
+        "lon": None if lon is None else str(round(lon, 4)),
+        "units": units,
+        "tz": _timezone_name(tz),
+        "style": style,
+        "occasion": occasion,
+    }
+    fields = {name: value for name, value in fields.items() if value}
+    if not fields:
+        return
+
+    now = time.time()
+    signature = tuple(sorted(fields.items()))
+    previous = _last_written.get(user_key)
+    if previous and previous[0] == signature and now - previous[1] < _PROFILE_REWRITE_SECONDS:
+        return
+    _remember(_last_written, user_key, (signature, now))
+
+    redis = redis_client()
+    if redis is not None:
+        try:
+            key = f"{_PROFILE_PREFIX}{user_key}"
+            async with redis.pipeline(transaction=False) as pipe:
+                pipe.hset(key, mapping=fields)
+                pipe.expire(key, _PROFILE_TTL_SECONDS)
+                pipe.zadd(_ACTIVE_KEY, {user_key: now})
+                # Keep the index as small as the profiles it points at.
+                pipe.zremrangebyscore(_ACTIVE_KEY, "-inf", now - _PROFILE_TTL_SECONDS)
+                pipe.zremrangebyrank(_ACTIVE_KEY, 0, -_max_users() - 1)
+                await pipe.execute()
+            return
+        except Exception as exc:
+            logger.warning("Precompute profile using local state: %s", exc.__class__.__name__)
+    profile = _local_profiles.get(user_key, {})
+    profile.update(fields, seen=str(now))
+    _remember(_local_profiles, user_key, profile)
+
+
+async def _active_profiles() -> dict[str, dict[str, str]]:
+    active_days = float(os.getenv("PRECOMPUTE_ACTIVE_DAYS", "7"))
+    max_users = _max_users()
+    cutoff = time.time() - active_days * 24 * 60 * 60
+    redis = redis_client()
+    if redis is not None:
+        try:
+            await redis.zremrangebyscore(_ACTIVE_KEY, "-inf", cutoff)
+            users = await redis.zrevrange(_ACTIVE_KEY, 0, max_users - 1)
+            async with redis.pipeline(transaction=False) as pipe:
+                for user_key in users:
+                    pipe.hgetall(f"{_PROFILE_PREFIX}{user_key}")
+                profiles = await pipe.execute()
+            return {user_key: profile for user_key, profile in zip(users, profiles) if profile}
+        except Exception as exc:
+            logger.warning("Precompute profiles using local state: %s", exc.__class__.__name__)
+    return {
+        user_key: profile
+        for user_key, profile in _local_profiles.items()
+        if float(profile.get("seen", 0)) >= cutoff
+    }
+
+
+def _user_timezone(profile: dict[str, str]) -> tzinfo:
+    if profile.get("tz"):
+        return ZoneInfo(profile["tz"])
+    # No timezone reported: approximate the offset from longitude.
+    return timezone(timedelta(hours=js_round(float(profile["lon"]) / 15)))
+
+
+def _due_date(profile: dict[str, str], now: datetime) -> Optional[date]:
+    """The user's local date if their morning window opens within the lead time."""
+    if not profile.get("lat") or not profile.get("lon"):
+        return None
+    local = now.astimezone(_user_timezone(profile))
+    start = local.replace(
+        hour=int(os.getenv("PRECOMPUTE_WINDOW_START_HOUR", "6")), minute=0, second=0, microsecond=0
+    )
+    lead = timedelta(minutes=float(os.getenv("PRECOMPUTE_LEAD_MINUTES", "45")))
+    return local.date() if start - lead <= local < start else None
+
+
+def daily_contexts(
+    weather: WeatherResponse,
+    units: str,
+    style: Optional[str],
+    occasion: Optional[str],
+    days: int,
+) -> list[dict[str, Any]]:
+    """The weather contexts the weekly panel in WeatherClient.tsx sends to /recommend."""
+    current = weather.current
+    description = current.description if current.description is not None else "weather-based outfit"
+    wind = current.wind_speed
+    if wind is not None and units == "imperial":
+        wind = wind * 0.44704
+
+    contexts = []
+    for day in weather.daily[:days]:
+        temp = (day.min + day.max) / 2 if day.min is not None and day.max is not None else None
+        if temp is not None and units == "imperial":
+            temp = ((temp - 32) * 5) / 9
+        precip = f"{js_round(day.pop * 100)}% precip" if day.pop is not None else None
+        contexts.append(
+            weather_context(
+                RecommendRequest(
+                    user_key="",
+                    temp_c=temp,
+                    description=description,
+                    precip=precip,
+                    wind=wind,
+                    style=style,
+                    occasion=occasion,
+                )
+            )
+        )
+    return contexts
+
+
+class PrecomputeScheduler:
+    def __init__(self) -> None:
+        self._task: Optional[asyncio.Task] = None
+        self._pool: Optional[asyncpg.Pool] = None
+        self._model = None
+        self._worker_id = uuid.uuid4().hex
+
+    def start(self, pool: Optional[asyncpg.Pool], model) -> None:
+        if not _env_flag("PRECOMPUTE_ENABLED") or self._task is not None:
+            return
+        self._pool = pool
+        self._model = model
+        self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        interval = float(os.getenv("PRECOMPUTE_TICK_SECONDS", "300"))
+        while True:
+            try:
+                if await self._is_leader(interval):
+                    stats = await self.tick()
+                    if stats["users"]:
+                        logger.info("Precompute tick: %s", stats)
+            except Exception:
+                logger.exception("Precompute tick failed")
+            await asyncio.sleep(interval)
+
+    async def _is_leader(self, interval: float) -> bool:
+        redis = redis_client()
+        if redis is None:
+            return True
+        try:
+            leader = await redis.set(_LEADER_KEY, self._worker_id, nx=True, ex=max(int(interval), 1))
+            return bool(leader) or await redis.get(_LEADER_KEY) == self._worker_id
+        except Exception as exc:
+            logger.warning("Precompute leader check failed: %s", exc.__class__.__name__)
+            return False
+
+    async def killed(self) -> bool:
+        """Kill switch: env off, or the Redis key set by an operator."""
+        if not _env_flag("PRECOMPUTE_ENABLED"):
+            return True
+        redis = redis_client()
+        if redis is None:
+            return False
+        try:
+            return bool(await redis.exists(_KILL_KEY))
+        except Exception:
+            return False
+
+    async def _claim(self, user_key: str, local_date: date) -> bool:
+        """Precompute each user at most once per local day."""
+        key = f"{_DONE_PREFIX}{user_key}:{local_date.isoformat()}"
+        redis = redis_client()
+        if redis is not None:
+            try:
+                return bool(await redis.set(key, "1", nx=True, ex=_DONE_TTL_SECONDS))
+            except Exception as exc:
+                logger.warning("Precompute claim using local state: %s", exc.__class__.__name__)
+        expired = local_date - timedelta(seconds=_DONE_TTL_SECONDS)
+        for day in [day for day in _local_done if day <= expired]:
+            del _local_done[day]
+        claimed = _local_done.setdefault(local_date, set())
+        if user_key in claimed:
+            return False
+        claimed.add(user_key)
+        return True
+
+    async def tick(self, now: Optional[datetime] = None) -> dict[str, int]:
+        stats = {"users": 0, "cells": 0, "recommendations": 0, "explanations": 0, "errors": 0}
+        if await self.killed():
+            return stats
+
+        now = now or datetime.now(timezone.utc)
+        due: list[tuple[str, dict[str, str]]] = []
+        for user_key, profile in (await _active_profiles()).items():
+            try:
+                local_date = _due_date(profile, now)
+            except Exception:
+                continue
+            if local_date and await self._claim(user_key, local_date):
+                due.append((user_key, profile))
+        if not due:
+            return stats
+        stats["users"] = len(due)
+
+        semaphore = asyncio.Semaphore(max(int(os.getenv("PRECOMPUTE_CONCURRENCY", "4")), 1))
+        weather_ttl = int(os.getenv("PRECOMPUTE_WEATHER_TTL_SECONDS", "5400"))
+        result_ttl = int(os.getenv("PRECOMPUTE_RESULT_TTL_SECONDS", "5400"))
+        days = int(os.getenv("PRECOMPUTE_DAYS", "7"))
+        explain = _env_flag("PRECOMPUTE_EXPLANATIONS") and openai_enabled()
+        explanation_budget = [int(os.getenv("PRECOMPUTE_EXPLANATIONS_PER_TICK", "60"))]
+
+        # Users in the same cell share one weather refresh.
+        cells: dict[tuple[str, str, str], asyncio.Task] = {}
+
+        async def weather_for(profile: dict[str, str]) -> WeatherResponse:
+            cell = (profile["lat"], profile["lon"], profile.get("units") or "imperial")
+            if cell not in cells:
+                stats["cells"] += 1
+                cells[cell] = asyncio.create_task(
+                    fetch_weather(
+                        lat=float(cell[0]),
+                        lon=float(cell[1]),
+                        units=cell[2],
+                        redis=redis_client(),
+                        cache_ttl=weather_ttl,
+                        refresh=True,
+                    )
+                )
+            return await cells[cell]
+
+        async def warm(user_key: str, profile: dict[str, str]) -> None:
+            async with semaphore:
+                if await self.killed():
+                    return
+                try:
+                    weather = await weather_for(profile)
+                    if self._pool is None or self._model is None:
+                        return
+                    contexts = daily_contexts(
+                        weather,
+                        profile.get("units") or "imperial",
+                        profile.get("style") or os.getenv("PRECOMPUTE_DEFAULT_STYLE", "casual"),
+                        profile.get("occasion") or os.getenv("PRECOMPUTE_DEFAULT_OCCASION", "everyday"),
+                        days,
+                    )
+                    results = await recommend_many(
+                        self._pool,
+                        self._model,
+                        user_key,
+                        contexts,
+                        cache_ttl=result_ttl,
+                        refresh=True,
+                    )
+                    stats["recommendations"] += len(results)
+                    for result in results:
+                        if not explain or explanation_budget[0] <= 0 or await self.killed():
+                            break
+                        explanation_budget[0] -= 1
+                        details = await generate_outfit_explanation(explanation_request(result))
+                        stats["explanations"] += details.source == "langchain"
+                except Exception as exc:
+                    stats["errors"] += 1
+                    logger.warning("Precompute for %s failed: %s", user_key, exc)
+
+        await asyncio.gather(*(warm(user_key, profile) for user_key, profile in due))
+        return stats
+
+
+precompute_scheduler = PrecomputeScheduler()
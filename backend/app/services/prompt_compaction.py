@@ -0,0 +1,128 @@
+import json
+import logging
+from functools import lru_cache
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+# Keys are short but plain English, so the model reads them without a legend
+# (a legend costs more tokens than it saves on a 1-4 item outfit).
+_TAG_KEYS = {
+    "warmth_score": "warmth",
+    "water_resistance": "water",
+    "wind_block": "wind",
+    "breathability": "breathable",
+    "coverage_top": "top",
+    "coverage_bottom": "bottom",
+    "footwear_type": "shoes",
+}
+
+_MAX_DESCRIPTION_CHARS = 120
+_MAX_REASONS = 3
+
+
+def _round(value: Any, digits: int) -> float | int | None:
+    if not isinstance(value, (int, float)) or isinstance(value, bool):
+        return None
+    rounded = round(float(value), digits)
+    return int(rounded) if rounded.is_integer() else rounded
+
+
+def _drop_empty(values: dict[str, Any]) -> dict[str, Any]:
+    return {key: value for key, value in values.items() if value not in (None, "", [], {})}
+
+
+def _compact_text(value: Any, limit: int) -> str | None:
+    if not isinstance(value, str):
+        return None
+    text = " ".join(value.split())
+    return text if len(text) <= limit else text[: limit - 3].rstrip() + "..."
+
+
+def _compact_item(item: dict[str, Any]) -> dict[str, Any]:
+    metadata = item.get("metadata") or {}
+    tags_source = {**item, **metadata} if isinstance(metadata, dict) else item
+    scores = item.get("scores") if isinstance(item.get("scores"), dict) else {}
+    compact = {
+        "category": item.get("category"),
+        "item": item.get("label"),
+        "brand": item.get("brand"),
+        "color": item.get("color"),
+        "desc": _compact_text(item.get("description"), _MAX_DESCRIPTION_CHARS),
+        "reasons": [reason for reason in (item.get("reasons") or [])[:_MAX_REASONS] if reason],
+        "score": _round(scores.get("final"), 2),
+    }
+    compact.update({short: tags_source.get(key) for key, short in _TAG_KEYS.items()})
+    compact["warmth"] = _round(tags_source.get("warmth_score"), 0)
+    min_temp = _round(tags_source.get("min_temp_c"), 0)
+    max_temp = _round(tags_source.get("max_temp_c"), 0)
+    if min_temp is not None and max_temp is not None:
+        compact["comfort_c"] = f"{min_temp}..{max_temp}"
+    return _drop_empty(compact)
+
+
+def compact_explanation_payload(payload: dict[str, Any]) -> dict[str, Any]:
+    """
+    Project an ExplanationRequest dump down to the fields the explanation uses:
+    short plain keys, one rounded final score per item, flattened weather tags,
+    and no ids, image URLs, nulls or empties.
+    """
+    weather = payload.get("weather_context") or {}
+    return _drop_empty(
+        {
+            "weather": _drop_empty(
+                {
+                    "temp_c": _round(weather.get("temp_c"), 1),
+                    "desc": weather.get("description"),
+                    "precip": weather.get("precip"),
+                    "wind_ms": _round(weather.get("wind"), 1),
+                    "style": weather.get("style"),
+                    "occasion": weather.get("occasion"),
+                }
+            ),
+            "items": [_compact_item(item) for item in payload.get("selected_items") or []],
+            "missing": payload.get("missing_categories") or [],
+        }
+    )
+
+
+def compact_explanation_text(payload: dict[str, Any]) -> str:
+    return json.dumps(
+        compact_explanation_payload(payload), ensure_ascii=True, separators=(",", ":")
+    )
+
+
+@lru_cache(maxsize=8)
+def _encoding(model: str):
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("o200k_base")
+    except Exception as exc:
+        # tiktoken downloads its BPE files on first use; estimate when offline.
+        logger.info("Token counting estimated: %s", exc.__class__.__name__)
+        return None
+
+
+def count_tokens(text: str, model: str) -> int:
+    """Token count for text under model's tokenizer (~4 chars/token without tiktoken)."""
+    encoding = _encoding(model)
+    if encoding is None:
+        return max(1, len(text) // 4)
+    return len(encoding.encode(text))
+
+
+def prompt_token_report(full_text: str, compact_text: str, model: str) -> dict[str, Any]:
+    full_tokens = count_tokens(full_text, model)
+    compact_tokens = count_tokens(compact_text, model)
+    return {
+        "model": model,
+        "full_tokens": full_tokens,
+        "compact_tokens": compact_tokens,
+        "reduction": round(1 - compact_tokens / full_tokens, 3) if full_tokens else 0.0,
+    }
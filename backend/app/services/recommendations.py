@@ -0,0 +1,107 @@
+import hashlib
+import json
+import logging
+import os
+from typing import Any, Optional
+
+import asyncpg
+from pydantic import BaseModel
+
+from app.deps.redis import redis_client
+from app.services.embeddings import embed_texts
+from app.services.metrics import observe_cache
+from app.services.rerank import build_query_text, clamp_limit, rerank
+from app.services.wardrobe_store import match_outfits
+
+logger = logging.getLogger(__name__)
+
+_RECOMMENDATION_CACHE_PREFIX = "rec:"
+
+
+class RecommendRequest(BaseModel):
+    user_key: str
+    temp_c: float | None = None
+    description: str | None = None
+    precip: str | None = None
+    wind: float | None = None
+    style: str | None = None
+    occasion: str | None = None
+    limit: int | None = None
+
+
+def weather_context(payload: RecommendRequest) -> dict[str, Any]:
+    def text(value: Optional[str]) -> Optional[str]:
+        return (value or "").strip() or None
+
+    return {
+        "temp_c": payload.temp_c,
+        "description": text(payload.description),
+        "precip": text(payload.precip),
+        "wind": payload.wind,
+        "style": text(payload.style),
+        "occasion": text(payload.occasion),
+    }
+
+
+def _cache_key(user_key: str, context: dict[str, Any], limit: int) -> str:
+    digest = hashlib.sha256(
+        json.dumps([context, limit], sort_keys=True, separators=(",", ":")).encode()
+    ).hexdigest()
+    return f"{_RECOMMENDATION_CACHE_PREFIX}{user_key}:{digest}"
+
+
+async def recommend_many(
+    pool: asyncpg.Pool,
+    model,
+    user_key: str,
+    contexts: list[dict[str, Any]],
+    *,
+    limit: Any = None,
+    cache_ttl: Optional[int] = None,
+    refresh: bool = False,
+) -> list[dict[str, Any]]:
+    """
+    Retrieve and rerank the user's wardrobe for each weather context.
+    Results are cached per (user, context); misses embed their query texts
+    in one batch and run one match_outfits call each.
+    """
+    match_count = clamp_limit(limit)
+    keys = [_cache_key(user_key, context, match_count) for context in contexts]
+    results: list[Optional[dict[str, Any]]] = [None] * len(contexts)
+    redis = redis_client()
+    if redis is not None and not refresh:
+        try:
+            for index, cached in enumerate(await redis.mget(keys)):
+                if cached:
+                    results[index] = json.loads(cached)
+        except Exception as exc:
+            logger.warning("Recommendation cache read skipped: %s", exc.__class__.__name__)
+
+    misses = [index for index, result in enumerate(results) if result is None]
+    if redis is not None and not refresh:
+        observe_cache("recommendation", True, len(results) - len(misses))
+        observe_cache("recommendation", False, len(misses))
+    if not misses:
+        return results
+
+    embeddings = await embed_texts(model, [build_query_text(contexts[index]) for index in misses])
+    for index, embedding in zip(misses, embeddings):
+        rows = await match_outfits(
+            pool,
+            embedding,
+            user_key,
+            match_count=match_count,
+            temp_c=contexts[index]["temp_c"],
+        )
+        results[index] = rerank(rows, contexts[index])
+
+    if redis is not None:
+        ttl = cache_ttl or int(os.getenv("RECOMMENDATION_CACHE_TTL_SECONDS", "600"))
+        try:
+            async with redis.pipeline(transaction=False) as pipe:
+                for index in misses:
+                    pipe.set(keys[index], json.dumps(results[index]), ex=ttl)
+                await pipe.execute()
+        except Exception as exc:
+            logger.warning("Recommendation cache write skipped: %s", exc.__class__.__name__)
+    return results
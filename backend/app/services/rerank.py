@@ -0,0 +1,273 @@
+"""
+Weather-aware reranking of match_outfits candidates.
+
+Mirrors the scoring in weather-dress/src/app/api/outfits/recommend/route.ts so
+results computed here (ahead of time or by the backend endpoint) are the same
+ones the Next.js route would produce, down to the explanation payload.
+"""
+import math
+import re
+from decimal import Decimal
+from typing import Any, Optional
+
+from app.services.outfit_langchain import ExplanationRequest
+
+CATEGORIES = ("upper", "lower", "accessories", "shoes")
+_RAIN_RE = re.compile(r"\b(rain|drizzle|storm|thunder|shower|downpour|sleet)\b", re.IGNORECASE)
+
+
+def js_round(value: float) -> int:
+    """Math.round: halves round up, unlike Python's round-half-even."""
+    return math.floor(value + 0.5)
+
+
+def _clamp(value: float, low: float = 0.0, high: float = 1.0) -> float:
+    if not math.isfinite(value):
+        return low
+    return min(high, max(low, value))
+
+
+def _as_number(value: Any) -> Optional[float]:
+    if isinstance(value, Decimal):
+        value = float(value)
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or value != value:
+        return None
+    return value
+
+
+def _lower(value: Any) -> str:
+    return (value or "").lower()
+
+
+def clamp_limit(value: Any) -> int:
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+        return 32
+    return min(max(int(value), 4), 64)
+
+
+def build_query_text(context: dict[str, Any]) -> str:
+    parts = [
+        "weather-aware outfit recommendation",
+        f"style: {context['style']}" if context.get("style") else "",
+        f"occasion: {context['occasion']}" if context.get("occasion") else "",
+        f"temperature: {js_round(context['temp_c'])}C" if context.get("temp_c") is not None else "",
+        f"weather: {context['description']}" if context.get("description") else "",
+        f"wind: {js_round(context['wind'])} m/s" if context.get("wind") is not None else "",
+        f"precipitation: {context['precip']}" if context.get("precip") else "",
+    ]
+    return ". ".join(part for part in parts if part)
+
+
+def _has_rain(context: dict[str, Any]) -> bool:
+    return bool(_RAIN_RE.search(f"{context.get('description') or ''} {context.get('precip') or ''}"))
+
+
+def _is_windy(wind: Optional[float]) -> bool:
+    return wind is not None and wind >= 8
+
+
+def _score_temp(row: dict[str, Any], temp_c: Optional[float]) -> tuple[float, str]:
+    if temp_c is None:
+        return 0.6, "Flexible for unknown temperature"
+
+    low = _as_number(row.get("min_temp_c"))
+    high = _as_number(row.get("max_temp_c"))
+    if low is None and high is None:
+        return 0.55, "No temperature tag yet"
+
+    lower = -50 if low is None else low
+    upper = 60 if high is None else high
+    if lower <= temp_c <= upper:
+        return 1, "Temperature range matches"
+
+    distance = lower - temp_c if temp_c < lower else temp_c - upper
+    if distance <= 5:
+        return 0.65, "Near the tagged temperature range"
+    if distance <= 10:
+        return 0.35, "A stretch for the temperature"
+    return 0.15, "Outside the tagged temperature range"
+
+
+def _score_rain(row: dict[str, Any], rainy: bool) -> tuple[float, str]:
+    water = _lower(row.get("water_resistance"))
+    footwear = _lower(row.get("footwear_type"))
+
+    if not rainy:
+        return (0.85 if water in ("waterproof", "resistant") else 0.75), "Dry-weather ready"
+    if row.get("category") == "shoes" and footwear == "open":
+        return 0.05, "Open shoes are weak for rain"
+    if water == "waterproof":
+        return 1, "Waterproof for wet weather"
+    if water == "resistant":
+        return 0.8, "Water-resistant for rain"
+    return 0.25, "Limited rain protection"
+
+
+def _score_wind(row: dict[str, Any], windy: bool) -> tuple[float, str]:
+    wind_block = _lower(row.get("wind_block"))
+    if not windy:
+        return 0.75, "No strong wind adjustment needed"
+    if wind_block == "high":
+        return 1, "High wind block"
+    if wind_block == "medium":
+        return 0.75, "Moderate wind block"
+    if wind_block == "low":
+        return 0.35, "Low wind block"
+    return 0.45, "Wind protection is untagged"
+
+
+def _score_comfort(row: dict[str, Any], temp_c: Optional[float]) -> tuple[float, str]:
+    warmth = _as_number(row.get("warmth_score"))
+    breathability = _lower(row.get("breathability"))
+    top = _lower(row.get("coverage_top"))
+    bottom = _lower(row.get("coverage_bottom"))
+    footwear = _lower(row.get("footwear_type"))
+
+    score = 0.55
+    reasons: list[str] = []
+
+    if temp_c is not None and temp_c >= 25:
+        if breathability == "high":
+            score += 0.25
+            reasons.append("breathable for heat")
+        elif breathability == "medium":
+            score += 0.12
+            reasons.append("moderately breathable")
+        elif breathability == "low":
+            score -= 0.15
+            reasons.append("less breathable in heat")
+
+        if warmth is not None and warmth <= 3:
+            score += 0.25
+            reasons.append("low warmth for hot weather")
+        elif warmth is not None and warmth <= 6:
+            score += 0.1
+            reasons.append("not too warm")
+        elif warmth is not None:
+            score -= 0.25
+            reasons.append("may run warm")
+
+        if top == "short_sleeve":
+            score += 0.15
+        if top == "jacket":
+            score -= 0.25
+        if bottom == "shorts":
+            score += 0.1
+        if footwear == "boot":
+            score -= 0.15
+    elif temp_c is not None and temp_c <= 10:
+        if warmth is not None and warmth >= 7:
+            score += 0.3
+            reasons.append("warm for cold weather")
+        elif warmth is not None and warmth >= 4:
+            score += 0.15
+            reasons.append("moderate warmth")
+        elif warmth is not None:
+            score -= 0.2
+            reasons.append("light for cold weather")
+
+        if top == "jacket":
+            score += 0.2
+        if top == "long_sleeve":
+            score += 0.12
+        if bottom == "full_length":
+            score += 0.15
+        if footwear == "boot":
+            score += 0.2
+        if footwear == "closed":
+            score += 0.1
+    else:
+        if warmth is not None and 3 <= warmth <= 7:
+            score += 0.2
+            reasons.append("balanced warmth")
+        if breathability in ("high", "medium"):
+            score += 0.1
+            reasons.append("comfortable breathability")
+
+    return _clamp(score), reasons[0] if reasons else "Comfort tags are balanced"
+
+
+def score_candidate(row: dict[str, Any], context: dict[str, Any]) -> Optional[dict[str, Any]]:
+    if row.get("category") not in CATEGORIES or not row.get("id") or not row.get("label"):
+        return None
+
+    similarity = _as_number(row.get("similarity"))
+    vector = _clamp(similarity if similarity is not None else 0.0)
+    temp, temp_reason = _score_temp(row, context.get("temp_c"))
+    rain, rain_reason = _score_rain(row, _has_rain(context))
+    wind, wind_reason = _score_wind(row, _is_windy(context.get("wind")))
+    comfort, comfort_reason = _score_comfort(row, context.get("temp_c"))
+    final = _clamp(0.4 * vector + 0.25 * temp + 0.15 * rain + 0.1 * wind + 0.1 * comfort)
+
+    reasons: list[str] = []
+    for reason in (temp_reason, rain_reason, wind_reason, comfort_reason):
+        if reason and reason not in reasons:
+            reasons.append(reason)
+
+    return {
+        "id": str(row["id"]),
+        "label": row["label"],
+        "category": row["category"],
+        "image_url": row.get("image_url"),
+        "brand": row.get("brand"),
+        "color": row.get("color"),
+        "description": row.get("description"),
+        "similarity": vector,
+        "scores": {
+            "vector": vector,
+            "temp": temp,
+            "rain": rain,
+            "wind": wind,
+            "comfort": comfort,
+            "final": final,
+        },
+        "reasons": reasons[:4],
+        "metadata": {
+            "warmth_score": _as_number(row.get("warmth_score")),
+            "water_resistance": row.get("water_resistance"),
+            "wind_block": row.get("wind_block"),
+            "breathability": row.get("breathability"),
+            "coverage_top": row.get("coverage_top"),
+            "coverage_bottom": row.get("coverage_bottom"),
+            "footwear_type": row.get("footwear_type"),
+            "min_temp_c": _as_number(row.get("min_temp_c")),
+            "max_temp_c": _as_number(row.get("max_temp_c")),
+        },
+    }
+
+
+def rerank(rows: list[dict[str, Any]], context: dict[str, Any]) -> dict[str, Any]:
+    """Pick the best item per category plus up to three alternatives each."""
+    scored = [item for item in (score_candidate(row, context) for row in rows) if item]
+    scored.sort(key=lambda item: item["scores"]["final"], reverse=True)
+
+    grouped = {category: [item for item in scored if item["category"] == category] for category in CATEGORIES}
+    outfit = {category: (grouped[category][0] if grouped[category] else None) for category in CATEGORIES}
+    return {
+        "outfit": outfit,
+        "alternatives": {category: grouped[category][1:4] for category in CATEGORIES},
+        "missing_categories": [category for category in CATEGORIES if not outfit[category]],
+        "weather_context": context,
+    }
+
+
+def explanation_request(result: dict[str, Any]) -> ExplanationRequest:
+    """The /outfit/explain payload the Next.js route sends for a reranked outfit."""
+    selected = [result["outfit"][category] for category in CATEGORIES if result["outfit"][category]]
+    return ExplanationRequest(
+        weather_context=result["weather_context"],
+        selected_items=[
+            {
+                "category": item["category"],
+                "label": item["label"],
+                "brand": item["brand"],
+                "color": item["color"],
+                "description": item["description"],
+                "scores": item["scores"],
+                "reasons": item["reasons"],
+                "metadata": item["metadata"],
+            }
+            for item in selected
+        ],
+        missing_categories=result["missing_categories"],
+    )
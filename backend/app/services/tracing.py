@@ -0,0 +1,121 @@
+"""
+Per-request stage timing and opt-in profiling.
+
+`span("onecall")` times a block and records it on the current request's
+trace. Traces live in a context variable, so spans from tasks spawned by the
+request land on the same trace. Outside a request, spans cost one lookup.
+The middleware in main.py returns the totals as a Server-Timing header.
+
+A request that sends `X-Profile: <PROFILE_TOKEN>` also runs under
+pyinstrument (if installed). Its HTML flame graph is saved under PROFILE_DIR
+and can be downloaded from GET /debug/profiles/{profile_id}.
+"""
+import hmac
+import logging
+import os
+import re
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+_trace: ContextVar[Optional[list[tuple[str, float]]]] = ContextVar("trace", default=None)
+_PROFILE_ID_RE = re.compile(r"^[0-9a-f]{32}$")
+
+
+def start_trace() -> list[tuple[str, float]]:
+    spans: list[tuple[str, float]] = []
+    _trace.set(spans)
+    return spans
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    spans = _trace.get()
+    if spans is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        spans.append((name, time.perf_counter() - started))
+
+
+def server_timing(spans: list[tuple[str, float]], total_s: float) -> str:
+    """Server-Timing value with per-stage totals; repeated stages show a count."""
+    totals: dict[str, list[float]] = {}
+    for name, seconds in spans:
+        totals.setdefault(name, []).append(seconds)
+    entries = []
+    for name, durations in totals.items():
+        entry = f"{name};dur={sum(durations) * 1000:.1f}"
+        if len(durations) > 1:
+            entry += f';desc="x{len(durations)}"'
+        entries.append(entry)
+    entries.append(f"total;dur={total_s * 1000:.1f}")
+    return ", ".join(entries)
+
+
+def profiling_authorized(header_value: Optional[str]) -> bool:
+    token = os.getenv("PROFILE_TOKEN")
+    if not token or not header_value:
+        return False
+    return hmac.compare_digest(header_value.encode(), token.encode())
+
+
+def _profile_dir() -> str:
+    return os.getenv("PROFILE_DIR", "/tmp/weather-dress-profiles")
+
+
+def start_profiler():
+    """A running async-aware pyinstrument profiler, or None if unavailable."""
+    try:
+        from pyinstrument import Profiler
+    except ImportError:
+        logger.info("Request profiling skipped: pyinstrument is not installed")
+        return None
+    interval = float(os.getenv("PROFILE_INTERVAL_SECONDS", "0.001"))
+    profiler = Profiler(interval=interval, async_mode="enabled")
+    profiler.start()
+    return profiler
+
+
+def save_profile(profiler, label: str) -> Optional[str]:
+    """Stop the profiler, write its HTML flame graph, and return the profile id."""
+    try:
+        profiler.stop()
+        directory = _profile_dir()
+        os.makedirs(directory, exist_ok=True)
+        profile_id = uuid.uuid4().hex
+        with open(os.path.join(directory, f"{profile_id}.html"), "w", encoding="utf-8") as fh:
+            fh.write(profiler.output_html())
+        logger.info("Saved request profile %s for %s", profile_id, label)
+        _prune_profiles(directory)
+        return profile_id
+    except Exception as exc:
+        logger.warning("Request profile not saved: %s", exc)
+        return None
+
+
+def _prune_profiles(directory: str) -> None:
+    keep = int(os.getenv("PROFILE_MAX_FILES", "50"))
+    paths = sorted(
+        (os.path.join(directory, name) for name in os.listdir(directory) if name.endswith(".html")),
+        key=os.path.getmtime,
+    )
+    for path in paths[:-keep] if keep > 0 else paths:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def profile_path(profile_id: str) -> Optional[str]:
+    if not _PROFILE_ID_RE.match(profile_id):
+        return None
+    path = os.path.join(_profile_dir(), f"{profile_id}.html")
+    return path if os.path.exists(path) else None
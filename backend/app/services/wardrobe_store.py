@@ -0,0 +1,77 @@
+from decimal import Decimal
+from typing import Any, Optional, Sequence
+
+import asyncpg
+
+from app.deps.db import acquire_timeout
+
+# Statements are kept as module constants so each pooled connection prepares
+# them once and reuses the plan from asyncpg's statement cache.
+MATCH_OUTFITS_SQL = "select * from public.match_outfits($1, $2, $3, $4, $5)"
+
+WARDROBE_SQL = """
+select id, user_key, category, label, image_url, brand, store_url, description, color,
+       warmth_score, water_resistance, wind_block, breathability, coverage_top,
+       coverage_bottom, footwear_type, min_temp_c, max_temp_c, created_at, updated_at
+from public.outfit_items
+where user_key = $1 and ($2::text is null or category = $2)
+order by created_at
+limit $3
+"""
+
+FEEDBACK_COLUMNS = ("user_id", "comfort_offset", "outfit_id", "thumbs_up")
+
+INSERT_FEEDBACK_SQL = """
+insert into public.feedback (user_id, comfort_offset, outfit_id, thumbs_up)
+values ($1, $2, $3, $4)
+"""
+
+
+def _rows(records: Sequence[asyncpg.Record]) -> list[dict[str, Any]]:
+    return [dict(record) for record in records]
+
+
+async def match_outfits(
+    pool: asyncpg.Pool,
+    query_embedding: list[float],
+    user_key: str,
+    *,
+    match_count: int = 24,
+    category: Optional[str] = None,
+    temp_c: Optional[float] = None,
+) -> list[dict[str, Any]]:
+    async with pool.acquire(timeout=acquire_timeout()) as conn:
+        records = await conn.fetch(
+            MATCH_OUTFITS_SQL,
+            query_embedding,
+            match_count,
+            user_key,
+            category,
+            None if temp_c is None else Decimal(str(temp_c)),
+        )
+    return _rows(records)
+
+
+async def fetch_wardrobe(
+    pool: asyncpg.Pool,
+    user_key: str,
+    *,
+    category: Optional[str] = None,
+    limit: int = 500,
+) -> list[dict[str, Any]]:
+    """The user's items, oldest first, without embeddings."""
+    async with pool.acquire(timeout=acquire_timeout()) as conn:
+        records = await conn.fetch(WARDROBE_SQL, user_key, category, limit)
+    return _rows(records)
+
+
+async def insert_feedback(pool: asyncpg.Pool, rows: Sequence[dict[str, Any]]) -> int:
+    """Insert feedback rows in one round trip; returns the number written."""
+    if not rows:
+        return 0
+    async with pool.acquire(timeout=acquire_timeout()) as conn:
+        await conn.executemany(
+            INSERT_FEEDBACK_SQL,
+            [tuple(row.get(column) for column in FEEDBACK_COLUMNS) for row in rows],
+        )
+    return len(rows)
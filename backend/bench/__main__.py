@@ -0,0 +1,186 @@
+"""
+Offline benchmarks for the backend.
+
+    python -m bench fakes --port 9100 --openai-latency-ms 800 --onecall-error-rate 0.05
+    python -m bench micro --out bench/results/micro.json
+    python -m bench load --base-url http://127.0.0.1:8000 --scenario mixed --out bench/results/load.json
+    python -m bench compare old.json new.json --threshold 0.10
+
+Results are JSON with the git commit they were measured on; `compare` prints
+per-metric changes and exits non-zero when any regress past the threshold.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from typing import Any, Iterator
+
+from bench.fakes import UPSTREAMS, Fault
+
+
+def _git(*args: str) -> str | None:
+    try:
+        return subprocess.run(
+            ["git", *args], capture_output=True, text=True, check=True, timeout=10
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def _envelope(suite: str, params: dict[str, Any], results: dict[str, Any]) -> dict[str, Any]:
+    return {
+        "suite": suite,
+        "git_commit": _git("rev-parse", "HEAD"),
+        "git_dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "params": params,
+        "results": results,
+    }
+
+
+def _write(report: dict[str, Any], out: str | None) -> None:
+    text = json.dumps(report, indent=2)
+    if out:
+        os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+        with open(out, "w", encoding="utf-8") as fh:
+            fh.write(text + "\n")
+    print(text)
+
+
+def _numbers(value: Any, prefix: str = "") -> Iterator[tuple[str, float]]:
+    if isinstance(value, dict):
+        for key, child in value.items():
+            yield from _numbers(child, f"{prefix}.{key}" if prefix else key)
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        yield prefix, float(value)
+
+
+def _direction(path: str) -> int:
+    """+1 if higher is better, -1 if lower is better, 0 to skip."""
+    leaf = path.rsplit(".", 1)[-1]
+    if leaf in ("items_per_second", "throughput_rps"):
+        return 1
+    if leaf.endswith("_us") or ".latency_ms." in f".{path}" or leaf == "error_rate":
+        return -1
+    return 0
+
+
+def compare(old: dict[str, Any], new: dict[str, Any], threshold: float) -> int:
+    before = dict(_numbers(old["results"]))
+    after = dict(_numbers(new["results"]))
+    print(f"{old.get('git_commit', '?')[:10]} -> {new.get('git_commit', '?')[:10]}")
+    regressions = 0
+    for path in sorted(before.keys() & after.keys()):
+        direction = _direction(path)
+        if not direction or before[path] == 0:
+            continue
+        change = (after[path] - before[path]) / before[path]
+        worse = change * direction < -threshold
+        better = change * direction > threshold
+        regressions += worse
+        marker = "REGRESSED" if worse else ("improved" if better else "")
+        print(f"{path:60} {before[path]:>14.2f} {after[path]:>14.2f} {change:>+8.1%} {marker}")
+    return 1 if regressions else 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m bench", description=__doc__.split("\n\n")[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    fakes = commands.add_parser("fakes", help="serve fake OpenWeather/OpenAI/PostgREST upstreams")
+    fakes.add_argument("--host", default="127.0.0.1")
+    fakes.add_argument("--port", type=int, default=9100)
+    fakes.add_argument("--seed", type=int, default=0)
+    for upstream in UPSTREAMS:
+        fakes.add_argument(f"--{upstream}-latency-ms", type=float, default=0.0)
+        fakes.add_argument(f"--{upstream}-jitter-ms", type=float, default=0.0)
+        fakes.add_argument(f"--{upstream}-error-rate", type=float, default=0.0)
+        fakes.add_argument(f"--{upstream}-error-status", type=int, default=500)
+
+    micro = commands.add_parser("micro", help="in-process micro-benchmarks")
+    micro.add_argument("--quick", action="store_true", help="fewer, shorter rounds")
+    micro.add_argument("--no-encode", action="store_true", help="skip model.encode throughput")
+    micro.add_argument("--out")
+
+    load = commands.add_parser("load", help="load scenarios against a running app")
+    load.add_argument("--base-url", default="http://127.0.0.1:8000")
+    load.add_argument(
+        "--scenario", action="append", choices=["health", "embed", "weather", "explain", "mixed"]
+    )
+    load.add_argument("--concurrency", type=int, default=16)
+    load.add_argument("--duration", type=float, default=20.0)
+    load.add_argument("--warmup", type=float, default=2.0)
+    load.add_argument("--out")
+
+    diff = commands.add_parser("compare", help="compare two result files")
+    diff.add_argument("old")
+    diff.add_argument("new")
+    diff.add_argument("--threshold", type=float, default=0.10, help="relative change that counts")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "fakes":
+        import uvicorn
+
+        from bench.fakes import create_app
+
+        faults = {
+            upstream: Fault(
+                latency_ms=getattr(args, f"{upstream}_latency_ms"),
+                jitter_ms=getattr(args, f"{upstream}_jitter_ms"),
+                error_rate=getattr(args, f"{upstream}_error_rate"),
+                error_status=getattr(args, f"{upstream}_error_status"),
+            )
+            for upstream in UPSTREAMS
+        }
+        uvicorn.run(create_app(faults, seed=args.seed), host=args.host, port=args.port, log_level="warning")
+        return 0
+
+    if args.command == "micro":
+        from bench.micro import run
+
+        results = run(quick=args.quick, encode=not args.no_encode)
+        _write(_envelope("micro", {"quick": args.quick}, results), args.out)
+        return 0
+
+    if args.command == "load":
+        from bench.load import run_scenario
+
+        names = args.scenario or ["mixed"]
+        results = {
+            name: asyncio.run(
+                run_scenario(
+                    args.base_url,
+                    name,
+                    concurrency=args.concurrency,
+                    duration_s=args.duration,
+                    warmup_s=args.warmup,
+                )
+            )
+            for name in names
+        }
+        params = {
+            "base_url": args.base_url,
+            "concurrency": args.concurrency,
+            "duration_s": args.duration,
+            "scenarios": names,
+        }
+        _write(_envelope("load", params, results), args.out)
+        return 0
+
+    with open(args.old, encoding="utf-8") as fh:
+        old = json.load(fh)
+    with open(args.new, encoding="utf-8") as fh:
+        new = json.load(fh)
+    return compare(old, new, args.threshold)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,310 @@
+"""
+Local stand-ins for the upstreams the backend and frontend call, so benchmarks
+run offline and repeatably:
+
+- OpenWeather geocoding (/geo/1.0/direct) and One Call (/data/3.0/onecall)
+- OpenAI chat completions (/v1/chat/completions), including structured
+  output, tool calls, and streaming with usage
+- Supabase PostgREST (/rest/v1/{table}, /rest/v1/rpc/match_outfits)
+
+Each upstream gets latency and error injection, set with CLI flags and changed
+at runtime with POST /_faults/{upstream} {"latency_ms": 200, "error_rate": 0.1}.
+
+Point the backend at it with:
+    OWM_BASE_URL=http://127.0.0.1:9100 OWM_API_KEY=bench
+    OPENAI_BASE_URL=http://127.0.0.1:9100/v1 OPENAI_API_KEY=bench
+    SUPABASE_URL=http://127.0.0.1:9100
+"""
+import asyncio
+import hashlib
+import json
+import random
+import time
+import uuid
+from dataclasses import asdict, dataclass
+from typing import Any
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+
+UPSTREAMS = ("geocode", "onecall", "openai", "postgrest")
+CATEGORIES = ("upper", "lower", "accessories", "shoes")
+
+
+@dataclass
+class Fault:
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    error_rate: float = 0.0
+    error_status: int = 500
+
+    async def apply(self, rng: random.Random) -> Response | None:
+        delay = self.latency_ms + (rng.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0)
+        if delay > 0:
+            await asyncio.sleep(delay / 1000)
+        if self.error_rate and rng.random() < self.error_rate:
+            return JSONResponse({"error": {"message": "injected fault"}}, status_code=self.error_status)
+        return None
+
+
+def _seed(*parts: Any) -> int:
+    return int.from_bytes(hashlib.sha256(repr(parts).encode()).digest()[:8], "big")
+
+
+def geocode_payload(q: str) -> list[dict[str, Any]]:
+    rng = random.Random(_seed("geo", q.lower()))
+    return [{"name": q.split(",")[0], "lat": rng.uniform(-60, 60), "lon": rng.uniform(-180, 180)}]
+
+
+def onecall_payload(lat: float, lon: float, units: str = "metric") -> dict[str, Any]:
+    """A deterministic One Call 3.0 response: 48 hourly and 8 daily entries."""
+    rng = random.Random(_seed("onecall", round(lat, 2), round(lon, 2)))
+    base = rng.uniform(-5, 30)
+    if units == "imperial":
+        base = base * 9 / 5 + 32
+    now = int(time.time()) // 3600 * 3600
+    conditions = ["clear sky", "few clouds", "light rain", "moderate rain", "overcast clouds", "snow"]
+
+    def weather() -> list[dict[str, str]]:
+        description = rng.choice(conditions)
+        return [{"main": description.split()[-1].title(), "description": description, "icon": "10d"}]
+
+    return {
+        "lat": lat,
+        "lon": lon,
+        "timezone": "UTC",
+        "current": {
+            "dt": now,
+            "temp": round(base, 2),
+            "feels_like": round(base - 1.5, 2),
+            "humidity": rng.randint(30, 95),
+            "wind_speed": round(rng.uniform(0, 14), 2),
+            "weather": weather(),
+        },
+        "hourly": [
+            {
+                "dt": now + hour * 3600,
+                "temp": round(base + rng.uniform(-4, 4), 2),
+                "pop": round(rng.random(), 2),
+                "weather": weather(),
+            }
+            for hour in range(48)
+        ],
+        "daily": [
+            {
+                "dt": now + day * 86400,
+                "temp": {"min": round(base - rng.uniform(2, 6), 2), "max": round(base + rng.uniform(2, 6), 2)},
+                "pop": round(rng.random(), 2),
+                "wind_speed": round(rng.uniform(0, 14), 2),
+                "weather": weather(),
+            }
+            for day in range(8)
+        ],
+        "alerts": [],
+    }
+
+
+def wardrobe_rows(user_key: str, count: int) -> list[dict[str, Any]]:
+    """match_outfits-shaped rows with plausible weather tags."""
+    rng = random.Random(_seed("wardrobe", user_key))
+    rows = []
+    for index in range(count):
+        category = CATEGORIES[index % len(CATEGORIES)]
+        low = rng.randint(-10, 20)
+        rows.append(
+            {
+                "id": str(uuid.UUID(int=_seed(user_key, index) << 64 | index)),
+                "user_key": user_key,
+                "category": category,
+                "label": f"{category} item {index}",
+                "image_url": None,
+                "brand": rng.choice(["Acme", "Northwind", None]),
+                "store_url": None,
+                "description": rng.choice(["Lightweight cotton", "Insulated shell", "Waterproof leather", None]),
+                "color": rng.choice(["black", "navy", "olive", "white"]),
+                "warmth_score": rng.randint(1, 10),
+                "water_resistance": rng.choice(["none", "resistant", "waterproof"]),
+                "wind_block": rng.choice(["low", "medium", "high"]),
+                "breathability": rng.choice(["low", "medium", "high"]),
+                "coverage_top": rng.choice(["short_sleeve", "long_sleeve", "jacket"]) if category == "upper" else None,
+                "coverage_bottom": rng.choice(["shorts", "full_length"]) if category == "lower" else None,
+                "footwear_type": rng.choice(["open", "closed", "boot"]) if category == "shoes" else None,
+                "min_temp_c": low,
+                "max_temp_c": low + rng.randint(8, 18),
+                "similarity": round(rng.uniform(0.2, 0.9), 4),
+            }
+        )
+    return rows
+
+
+def _schema_instance(schema: dict[str, Any], defs: dict[str, Any]) -> Any:
+    """The smallest value that validates against a JSON schema (enough for our models)."""
+    if "$ref" in schema:
+        return _schema_instance(defs[schema["$ref"].split("/")[-1]], defs)
+    for key in ("anyOf", "oneOf"):
+        if key in schema:
+            options = [option for option in schema[key] if option.get("type") != "null"]
+            return _schema_instance(options[0] if options else {"type": "null"}, defs)
+    if "enum" in schema:
+        return schema["enum"][0]
+    kind = schema.get("type")
+    if kind == "object":
+        return {
+            name: _schema_instance(prop, defs) for name, prop in schema.get("properties", {}).items()
+        }
+    if kind == "array":
+        return [_schema_instance(schema.get("items", {}), defs)]
+    if kind == "string":
+        return "Benchmark text for this field."
+    if kind == "integer":
+        return max(int(schema.get("minimum", 5)), 5) if schema.get("maximum", 10) >= 5 else 1
+    if kind == "number":
+        return 0.8 if schema.get("maximum", 1) <= 1 else 12.0
+    if kind == "boolean":
+        return False
+    return None
+
+
+def _completion_content(body: dict[str, Any]) -> tuple[str | None, dict[str, Any] | None]:
+    """(content, tool_call) for a chat request, honouring tools and response_format."""
+    tools = body.get("tools") or []
+    if tools:
+        function = tools[0]["function"]
+        parameters = function.get("parameters", {})
+        arguments = _schema_instance(parameters, parameters.get("$defs", {}))
+        return None, {"name": function["name"], "arguments": json.dumps(arguments)}
+    response_format = body.get("response_format") or {}
+    if response_format.get("type") == "json_schema":
+        schema = response_format["json_schema"]["schema"]
+        return json.dumps(_schema_instance(schema, schema.get("$defs", {}))), None
+    return "Benchmark reply.", None
+
+
+def _usage(body: dict[str, Any], completion: str) -> dict[str, int]:
+    prompt_tokens = max(1, len(json.dumps(body.get("messages", []))) // 4)
+    completion_tokens = max(1, len(completion) // 4)
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens,
+    }
+
+
+def _stream_chunks(body: dict[str, Any], content: str | None, tool_call: dict | None):
+    model = body.get("model", "bench")
+    created = int(time.time())
+
+    def chunk(delta: dict[str, Any], finish: str | None = None, usage: dict | None = None) -> str:
+        payload = {
+            "id": "chatcmpl-bench",
+            "object": "chat.completion.chunk",
+            "created": created,
+            "model": model,
+            "choices": [] if usage else [{"index": 0, "delta": delta, "finish_reason": finish}],
+        }
+        if usage:
+            payload["usage"] = usage
+        return f"data: {json.dumps(payload)}\n\n"
+
+    text = content if content is not None else tool_call["arguments"]
+    if tool_call:
+        yield chunk(
+            {
+                "role": "assistant",
+                "tool_calls": [
+                    {"index": 0, "id": "call_bench", "type": "function",
+                     "function": {"name": tool_call["name"], "arguments": ""}}
+                ],
+            }
+        )
+    else:
+        yield chunk({"role": "assistant", "content": ""})
+    for start in range(0, len(text), 24):
+        piece = text[start : start + 24]
+        if tool_call:
+            yield chunk({"tool_calls": [{"index": 0, "function": {"arguments": piece}}]})
+        else:
+            yield chunk({"content": piece})
+    yield chunk({}, "tool_calls" if tool_call else "stop")
+    if (body.get("stream_options") or {}).get("include_usage"):
+        yield chunk({}, usage=_usage(body, text))
+    yield "data: [DONE]\n\n"
+
+
+def create_app(faults: dict[str, Fault] | None = None, seed: int = 0) -> FastAPI:
+    app = FastAPI(title="Weather Dress benchmark fakes")
+    app.state.faults = {name: Fault() for name in UPSTREAMS} | (faults or {})
+    app.state.rng = random.Random(seed)
+    app.state.tables: dict[str, list[dict[str, Any]]] = {}
+
+    async def fault(name: str) -> Response | None:
+        return await app.state.faults[name].apply(app.state.rng)
+
+    @app.get("/_faults")
+    async def get_faults():
+        return {name: asdict(value) for name, value in app.state.faults.items()}
+
+    @app.post("/_faults/{upstream}")
+    async def set_fault(upstream: str, request: Request):
+        current = asdict(app.state.faults[upstream])
+        app.state.faults[upstream] = Fault(**(current | await request.json()))
+        return asdict(app.state.faults[upstream])
+
+    @app.get("/geo/1.0/direct")
+    async def geocode(q: str, limit: int = 1):
+        return await fault("geocode") or geocode_payload(q)[:limit]
+
+    @app.get("/data/3.0/onecall")
+    async def onecall(lat: float, lon: float, units: str = "metric"):
+        return await fault("onecall") or onecall_payload(lat, lon, units)
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        injected = await fault("openai")
+        if injected:
+            return injected
+        body = await request.json()
+        content, tool_call = _completion_content(body)
+        if body.get("stream"):
+            return StreamingResponse(
+                _stream_chunks(body, content, tool_call), media_type="text/event-stream"
+            )
+        message: dict[str, Any] = {"role": "assistant", "content": content}
+        if tool_call:
+            message["tool_calls"] = [{"id": "call_bench", "type": "function", "function": tool_call}]
+        return {
+            "id": "chatcmpl-bench",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "bench"),
+            "choices": [
+                {"index": 0, "message": message, "finish_reason": "tool_calls" if tool_call else "stop"}
+            ],
+            "usage": _usage(body, content or tool_call["arguments"]),
+        }
+
+    @app.post("/rest/v1/rpc/match_outfits")
+    async def match_outfits(request: Request):
+        injected = await fault("postgrest")
+        if injected:
+            return injected
+        body = await request.json()
+        return wardrobe_rows(body.get("input_user_key") or "guest", int(body.get("match_count") or 24))
+
+    @app.get("/rest/v1/{table}")
+    async def select(table: str):
+        return await fault("postgrest") or app.state.tables.get(table, [])
+
+    @app.post("/rest/v1/{table}")
+    async def insert(table: str, request: Request):
+        injected = await fault("postgrest")
+        if injected:
+            return injected
+        body = await request.json()
+        rows = body if isinstance(body, list) else [body]
+        app.state.tables.setdefault(table, []).extend(rows)
+        if "return=representation" in request.headers.get("prefer", ""):
+            return JSONResponse(rows, status_code=201)
+        return Response(status_code=201)
+
+    return app
@@ -0,0 +1,156 @@
+"""
+Closed-loop load scenarios against a running backend (ideally wired to
+bench.fakes). Each worker sends its next request as soon as the previous one
+finishes, for a fixed duration.
+"""
+import asyncio
+import random
+import statistics
+import time
+from collections import Counter
+from typing import Any, Awaitable, Callable
+
+import httpx
+
+from bench.fakes import wardrobe_rows
+from app.services.rerank import rerank
+
+RequestFactory = Callable[[httpx.AsyncClient, random.Random], Awaitable[httpx.Response]]
+
+
+def _explain_payloads(count: int) -> list[dict[str, Any]]:
+    payloads = []
+    for index in range(count):
+        context = {
+            "temp_c": -5 + index * 1.5,
+            "description": ["clear sky", "light rain", "overcast clouds", "snow"][index % 4],
+            "precip": f"{(index * 7) % 100}% precip",
+            "wind": float(index % 15),
+            "style": "casual",
+            "occasion": "everyday",
+        }
+        result = rerank(wardrobe_rows(f"user-{index}", 32), context)
+        payloads.append(
+            {
+                "weather_context": context,
+                "selected_items": [item for item in result["outfit"].values() if item],
+                "missing_categories": result["missing_categories"],
+            }
+        )
+    return payloads
+
+
+def scenarios(*, cells: int = 50, texts: int = 200) -> dict[str, list[tuple[RequestFactory, int]]]:
+    """Scenario name -> weighted request factories."""
+    explain_payloads = _explain_payloads(24)
+
+    async def embed(client: httpx.AsyncClient, rng: random.Random) -> httpx.Response:
+        text = f"weather-aware outfit recommendation. temperature: {rng.randrange(texts)}C"
+        return await client.post("/embed", json={"text": text})
+
+    async def weather(client: httpx.AsyncClient, rng: random.Random) -> httpx.Response:
+        cell = rng.randrange(cells)
+        params = {"lat": round(-40 + cell * 1.37, 4), "lon": round(-120 + cell * 2.11, 4), "units": "metric"}
+        return await client.get("/weather/openweather", params=params)
+
+    async def geocoded_weather(client: httpx.AsyncClient, rng: random.Random) -> httpx.Response:
+        return await client.get("/weather/openweather", params={"q": f"City{rng.randrange(cells)},US"})
+
+    async def explain(client: httpx.AsyncClient, rng: random.Random) -> httpx.Response:
+        return await client.post("/outfit/explain", json=rng.choice(explain_payloads))
+
+    async def health(client: httpx.AsyncClient, rng: random.Random) -> httpx.Response:
+        return await client.get("/health")
+
+    return {
+        "health": [(health, 1)],
+        "embed": [(embed, 1)],
+        "weather": [(weather, 3), (geocoded_weather, 1)],
+        "explain": [(explain, 1)],
+        "mixed": [(weather, 4), (embed, 3), (explain, 2), (health, 1)],
+    }
+
+
+def _percentile(sorted_values: list[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(int(round(fraction * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+def _summary(latencies: list[float], statuses: Counter, errors: Counter, elapsed: float) -> dict[str, Any]:
+    ordered = sorted(latencies)
+    total = len(latencies) + sum(errors.values())
+    failed = sum(errors.values()) + sum(count for status, count in statuses.items() if status >= 500)
+    return {
+        "requests": total,
+        "throughput_rps": round(total / elapsed, 2) if elapsed else 0.0,
+        "error_rate": round(failed / total, 4) if total else 0.0,
+        "latency_ms": {
+            "mean": round(statistics.fmean(ordered) * 1000, 2) if ordered else 0.0,
+            "p50": round(_percentile(ordered, 0.50) * 1000, 2),
+            "p90": round(_percentile(ordered, 0.90) * 1000, 2),
+            "p99": round(_percentile(ordered, 0.99) * 1000, 2),
+            "max": round(ordered[-1] * 1000, 2) if ordered else 0.0,
+        },
+        "statuses": {str(status): count for status, count in sorted(statuses.items())},
+        "errors": dict(errors),
+    }
+
+
+async def run_scenario(
+    base_url: str,
+    scenario: str,
+    *,
+    concurrency: int = 16,
+    duration_s: float = 20.0,
+    warmup_s: float = 2.0,
+    seed: int = 1,
+    timeout_s: float = 30.0,
+) -> dict[str, Any]:
+    factories = scenarios()[scenario]
+    weighted = [factory for factory, weight in factories for _ in range(weight)]
+    per_route: dict[str, tuple[list[float], Counter, Counter]] = {}
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout_s, limits=limits) as client:
+        async def worker(index: int, until: float, record: bool) -> None:
+            rng = random.Random(seed * 1000 + index)
+            while time.perf_counter() < until:
+                factory = rng.choice(weighted)
+                latencies, statuses, errors = per_route.setdefault(
+                    factory.__name__, ([], Counter(), Counter())
+                )
+                started = time.perf_counter()
+                try:
+                    response = await factory(client, rng)
+                except httpx.HTTPError as exc:
+                    if record:
+                        errors[exc.__class__.__name__] += 1
+                    continue
+                if record:
+                    latencies.append(time.perf_counter() - started)
+                    statuses[response.status_code] += 1
+
+        if warmup_s > 0:
+            until = time.perf_counter() + warmup_s
+            await asyncio.gather(*(worker(index, until, False) for index in range(concurrency)))
+            per_route.clear()
+
+        started = time.perf_counter()
+        until = started + duration_s
+        await asyncio.gather(*(worker(index, until, True) for index in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    all_latencies = [value for latencies, _, _ in per_route.values() for value in latencies]
+    all_statuses = sum((statuses for _, statuses, _ in per_route.values()), Counter())
+    all_errors = sum((errors for _, _, errors in per_route.values()), Counter())
+    return {
+        "concurrency": concurrency,
+        "duration_s": round(elapsed, 2),
+        **_summary(all_latencies, all_statuses, all_errors, elapsed),
+        "routes": {
+            name: _summary(latencies, statuses, errors, elapsed)
+            for name, (latencies, statuses, errors) in sorted(per_route.items())
+        },
+    }
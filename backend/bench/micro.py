@@ -0,0 +1,150 @@
+"""
+In-process micro-benchmarks for the CPU-bound hot paths. Inputs are generated
+from fixed seeds so runs are comparable between commits.
+"""
+import random
+import statistics
+import time
+from typing import Any, Callable
+
+from app.services.open_weather import _shape
+from app.services.outfit_langchain import (
+    ExplanationRequest,
+    WeatherTagRequest,
+    _estimate_weather_tags,
+    estimate_weather_tags_batch,
+)
+from app.services.prompt_compaction import compact_explanation_text
+from app.services.rerank import build_query_text, rerank
+from bench.fakes import onecall_payload, wardrobe_rows
+
+_LABELS = [
+    "Waterproof rain jacket",
+    "Merino wool sweater",
+    "Linen short sleeve shirt",
+    "Insulated winter parka",
+    "Denim jeans",
+    "Running shorts",
+    "Leather ankle boots",
+    "Canvas sneakers",
+    "Wool beanie",
+    "Cotton t-shirt",
+    "Fleece hoodie",
+    "Open-toe sandals",
+]
+_DESCRIPTIONS = [
+    None,
+    "Lightweight and breathable for summer",
+    "Windproof shell with a fleece lining",
+    "Water-resistant coating, packable",
+    "Thick knit, warm for cold mornings",
+]
+
+
+def weather_tag_requests(count: int, seed: int = 7) -> list[WeatherTagRequest]:
+    rng = random.Random(seed)
+    return [
+        WeatherTagRequest(
+            label=rng.choice(_LABELS),
+            description=rng.choice(_DESCRIPTIONS),
+            brand=rng.choice([None, "Acme", "Northwind"]),
+            category_hint=rng.choice([None, "upper", "lower", "shoes", "accessories"]),
+        )
+        for _ in range(count)
+    ]
+
+
+def _timed(fn: Callable[[], Any], *, items: int, repeat: int, min_seconds: float) -> dict[str, Any]:
+    """
+    Call fn repeatedly in rounds of at least min_seconds and report the median
+    round, so one slow round (GC, scheduler) doesn't skew the result.
+    """
+    fn()  # warm caches and lazy imports
+    rounds: list[float] = []
+    for _ in range(repeat):
+        calls = 0
+        started = time.perf_counter()
+        while True:
+            fn()
+            calls += 1
+            elapsed = time.perf_counter() - started
+            if elapsed >= min_seconds:
+                break
+        rounds.append(elapsed / calls)
+    per_call = statistics.median(rounds)
+    return {
+        "items_per_call": items,
+        "median_call_us": round(per_call * 1e6, 2),
+        "best_call_us": round(min(rounds) * 1e6, 2),
+        "items_per_second": round(items / per_call, 1),
+        "rounds": repeat,
+    }
+
+
+def _encode_benchmarks(batch_sizes: list[int], repeat: int, min_seconds: float) -> dict[str, Any]:
+    try:
+        from sentence_transformers import SentenceTransformer
+    except ImportError:
+        return {"encode": {"skipped": "sentence-transformers is not installed"}}
+
+    from app.services.embeddings import EMBEDDING_MODEL_NAME, textify
+
+    model = SentenceTransformer(EMBEDDING_MODEL_NAME)
+    texts = [textify(row) for row in wardrobe_rows("bench", max(batch_sizes))]
+    return {
+        f"encode_batch_{size}": _timed(
+            lambda size=size: model.encode(texts[:size], batch_size=size),
+            items=size,
+            repeat=repeat,
+            min_seconds=min_seconds,
+        )
+        for size in batch_sizes
+    }
+
+
+def run(*, quick: bool = False, encode: bool = True) -> dict[str, Any]:
+    repeat = 3 if quick else 7
+    min_seconds = 0.05 if quick else 0.3
+
+    payload = onecall_payload(38.88, -77.1, "metric")
+    requests = weather_tag_requests(1000)
+    rows = wardrobe_rows("bench", 64)
+    context = {
+        "temp_c": 8.5,
+        "description": "light rain",
+        "precip": "60% precip",
+        "wind": 9.2,
+        "style": "casual",
+        "occasion": "commute",
+    }
+    reranked = rerank(rows, context)
+    explanation = ExplanationRequest(
+        weather_context=context,
+        selected_items=[item for item in reranked["outfit"].values() if item],
+        missing_categories=reranked["missing_categories"],
+    ).model_dump()
+
+    results = {
+        "shape": _timed(
+            lambda: _shape(payload, 38.88, -77.1, "metric"), items=1, repeat=repeat, min_seconds=min_seconds
+        ),
+        "estimate_weather_tags": _timed(
+            lambda: [_estimate_weather_tags(request) for request in requests[:100]],
+            items=100,
+            repeat=repeat,
+            min_seconds=min_seconds,
+        ),
+        "estimate_weather_tags_batch_1000": _timed(
+            lambda: estimate_weather_tags_batch(requests), items=1000, repeat=repeat, min_seconds=min_seconds
+        ),
+        "rerank_64": _timed(lambda: rerank(rows, context), items=64, repeat=repeat, min_seconds=min_seconds),
+        "build_query_text": _timed(
+            lambda: build_query_text(context), items=1, repeat=repeat, min_seconds=min_seconds
+        ),
+        "compact_explanation_text": _timed(
+            lambda: compact_explanation_text(explanation), items=1, repeat=repeat, min_seconds=min_seconds
+        ),
+    }
+    if encode:
+        results.update(_encode_benchmarks([1, 32] if quick else [1, 32, 128], repeat, min_seconds))
+    return results
@@ -0,0 +1,159 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from app.services.admission import AdmissionMiddleware, EndpointPool, request_degraded
+
+
+@pytest.fixture
+def small_pools(monkeypatch):
+    for name in ("DEFAULT", "LLM"):
+        monkeypatch.setenv(f"ADMISSION_{name}_CONCURRENCY", "1")
+        monkeypatch.setenv(f"ADMISSION_{name}_QUEUE_SIZE", "2")
+        monkeypatch.setenv(f"ADMISSION_{name}_QUEUE_TIMEOUT_SECONDS", "0.05")
+
+
+async def test_slots_are_handed_to_waiters_in_order(small_pools):
+    pool = EndpointPool("default")
+    pool.queue_timeout_s = 1.0
+    assert await pool.acquire() == "ok"
+    order: list[str] = []
+
+    async def wait(name: str) -> None:
+        assert await pool.acquire() == "ok"
+        order.append(name)
+
+    first = asyncio.create_task(wait("first"))
+    await asyncio.sleep(0)
+    second = asyncio.create_task(wait("second"))
+    await asyncio.sleep(0)
+
+    # A newcomer can't barge ahead of the queue.
+    assert pool.active == 1 and len(pool._waiters) == 2
+    pool.release()
+    await first
+    assert order == ["first"] and pool.active == 1
+    pool.release()
+    await second
+    assert order == ["first", "second"]
+    pool.release()
+    assert pool.active == 0
+
+
+async def test_full_queue_is_rejected(small_pools):
+    pool = EndpointPool("default")
+    await pool.acquire()
+    waiters = [asyncio.create_task(pool.acquire()) for _ in range(2)]
+    await asyncio.sleep(0)
+    assert await pool.acquire() == "queue_full"
+    for waiter in waiters:
+        waiter.cancel()
+    await asyncio.gather(*waiters, return_exceptions=True)
+
+
+async def test_queue_timeout_frees_the_queue_position(small_pools):
+    pool = EndpointPool("default")
+    await pool.acquire()
+    assert await pool.acquire() == "queue_timeout"
+    assert not pool._waiters
+    pool.release()
+    assert pool.active == 0
+
+
+async def test_cancelled_waiter_leaves_the_queue(small_pools):
+    pool = EndpointPool("default")
+    pool.queue_timeout_s = 1.0
+    await pool.acquire()
+    waiter = asyncio.create_task(pool.acquire())
+    await asyncio.sleep(0)
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+    assert not pool._waiters
+    pool.release()
+    assert pool.active == 0
+
+
+async def test_cancel_after_handoff_keeps_one_holder(small_pools):
+    pool = EndpointPool("default")
+    pool.queue_timeout_s = 0.05
+    await pool.acquire()
+    first = asyncio.create_task(pool.acquire())
+    second = asyncio.create_task(pool.acquire())
+    await asyncio.sleep(0)
+
+    pool.release()  # hands the slot to `first` ...
+    first.cancel()  # ... which is cancelled before it resumes
+    results = await asyncio.gather(first, second, return_exceptions=True)
+
+    # Depending on the Python version wait_for either keeps the handed-over
+    # slot or passes it on; either way exactly one request holds it.
+    assert [result == "ok" for result in results].count(True) == 1
+    assert pool.active == 1 and not pool._waiters
+
+
+def _app(gate: asyncio.Event) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(AdmissionMiddleware)
+
+    @app.post("/outfit/explain")
+    async def explain():
+        degraded = request_degraded()
+        if not degraded:
+            await gate.wait()
+        return {"degraded": degraded}
+
+    @app.post("/outfit/recommend")
+    async def recommend():
+        await gate.wait()
+        return {"degraded": request_degraded()}
+
+    @app.get("/items/{item_id}")
+    async def item(item_id: str):
+        return {"id": item_id}
+
+    return app
+
+
+async def _busy(path: str) -> list[httpx.Response]:
+    gate = asyncio.Event()
+    transport = httpx.ASGITransport(app=_app(gate))
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        holders = [asyncio.create_task(client.post(path)) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        shed = await client.post(path)
+        gate.set()
+        return [shed, *await asyncio.gather(*holders)]
+
+
+async def test_llm_explanations_degrade_when_busy(small_pools):
+    shed, *served = await _busy("/outfit/explain")
+    assert shed.status_code == 200 and shed.json() == {"degraded": True}
+    assert all(response.status_code == 200 for response in served)
+
+
+async def test_recommend_is_shed_instead_of_degraded(small_pools):
+    shed, *served = await _busy("/outfit/recommend")
+    assert shed.status_code == 503
+    assert shed.headers["retry-after"] == "2"
+    assert all(not response.json()["degraded"] for response in served)
+
+
+async def test_only_static_routes_are_cached():
+    app = _app(asyncio.Event())
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        await client.get("/items/1")
+        await client.get("/items/2")
+        await client.get("/missing")
+    middleware = app.middleware_stack
+    while not isinstance(middleware, AdmissionMiddleware):
+        middleware = middleware.app
+    assert middleware._static_routes == {}
+
+    scope = {"type": "http", "method": "POST", "path": "/outfit/explain", "app": app}
+    route = middleware._match_route(scope)
+    assert middleware._static_routes == {("POST", "/outfit/explain"): route}
+    assert middleware._match_route(dict(scope)) is route
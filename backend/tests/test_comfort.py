@@ -0,0 +1,143 @@
+import asyncio
+import logging
+
+import pytest
+
+from app.services import comfort
+from app.services.comfort import ComfortModel, FeedbackBuffer, FeedbackBufferFull
+
+
+@pytest.fixture(params=["local", "redis"])
+async def model(request, monkeypatch, fake_redis):
+    monkeypatch.setenv("COMFORT_EWMA_ALPHA", "0.5")
+    monkeypatch.setenv("COMFORT_MAX_OFFSET_C", "5")
+    redis = fake_redis if request.param == "redis" else None
+    monkeypatch.setattr(comfort, "redis_client", lambda: redis)
+    return ComfortModel()
+
+
+async def test_first_report_is_taken_as_is(model):
+    assert await model.observe("u1", 2.0) == pytest.approx(2.0)
+    assert await model.offset("u1") == pytest.approx(2.0)
+
+
+async def test_later_reports_move_by_alpha(model):
+    await model.observe("u1", 2.0)
+    assert await model.observe("u1", 4.0) == pytest.approx(3.0)
+    assert await model.observe("u1", -1.0) == pytest.approx(1.0)
+    assert await model.offset("u1") == pytest.approx(1.0)
+
+
+async def test_offsets_are_clamped(model):
+    assert await model.observe("u1", 12.0) == pytest.approx(5.0)
+    assert await model.observe("u1", -40.0) == pytest.approx(-5.0)
+
+
+async def test_unknown_user_has_no_offset(model):
+    assert await model.offset("nobody") == 0.0
+
+
+async def test_workers_read_each_others_updates(monkeypatch, fake_redis):
+    monkeypatch.setattr(comfort, "redis_client", lambda: fake_redis)
+    worker_a, worker_b = ComfortModel(), ComfortModel()
+    await worker_b.observe("u1", 1.0)
+    assert await worker_b.offset("u1") == pytest.approx(1.0)
+
+    await worker_a.observe("u1", 3.0)
+    assert await worker_b.offset("u1") == await worker_a.offset("u1")
+
+
+async def test_local_fallback_when_redis_fails(monkeypatch, fake_redis):
+    monkeypatch.setattr(comfort, "redis_client", lambda: fake_redis)
+    model = ComfortModel()
+    await model.observe("u1", 2.0)
+
+    class Broken:
+        async def hmget(self, *args):
+            raise ConnectionError("redis down")
+
+    monkeypatch.setattr(comfort, "redis_client", lambda: Broken())
+    assert await model.offset("u1") == pytest.approx(2.0)
+
+
+class FakeInsert:
+    def __init__(self, failures: int = 0) -> None:
+        self.failures = failures
+        self.batches: list[list[dict]] = []
+
+    async def __call__(self, pool, rows):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("database unavailable")
+        self.batches.append(list(rows))
+        return len(rows)
+
+
+@pytest.fixture
+def buffer(monkeypatch):
+    monkeypatch.setenv("FEEDBACK_BATCH_SIZE", "2")
+    monkeypatch.setenv("FEEDBACK_BUFFER_MAX_ROWS", "4")
+    monkeypatch.setenv("FEEDBACK_FLUSH_INTERVAL_SECONDS", "60")
+    real_sleep = asyncio.sleep
+    monkeypatch.setattr(comfort.asyncio, "sleep", lambda delay: real_sleep(0))
+    return FeedbackBuffer()
+
+
+def _install(monkeypatch, insert: FakeInsert) -> FakeInsert:
+    monkeypatch.setattr(comfort, "insert_feedback", insert)
+    return insert
+
+
+async def test_flush_writes_one_batch_at_a_time(monkeypatch, buffer):
+    insert = _install(monkeypatch, FakeInsert())
+    buffer._pool = object()
+    for index in range(3):
+        buffer.add({"user_id": f"u{index}"})
+    assert await buffer.flush() == 2
+    assert buffer.pending == 1
+    assert [len(batch) for batch in insert.batches] == [2]
+
+
+async def test_failed_flush_keeps_rows_for_retry(monkeypatch, buffer):
+    insert = _install(monkeypatch, FakeInsert(failures=1))
+    buffer._pool = object()
+    buffer.add({"user_id": "u1"})
+    assert await buffer.flush() == 0
+    assert buffer.pending == 1
+    assert await buffer.flush() == 1
+    assert insert.batches == [[{"user_id": "u1"}]]
+
+
+async def test_full_buffer_rejects_rows(buffer):
+    for index in range(4):
+        buffer.add({"user_id": f"u{index}"})
+    with pytest.raises(FeedbackBufferFull):
+        buffer.add({"user_id": "u5"})
+
+
+async def test_close_retries_failed_batches(monkeypatch, buffer):
+    insert = _install(monkeypatch, FakeInsert(failures=2))
+    buffer.start(object())
+    for index in range(3):
+        buffer.add({"user_id": f"u{index}"})
+    await buffer.close()
+    assert buffer.pending == 0
+    assert sum(len(batch) for batch in insert.batches) == 3
+
+
+async def test_close_logs_rows_it_gives_up_on(monkeypatch, buffer, caplog):
+    monkeypatch.setenv("FEEDBACK_CLOSE_RETRIES", "2")
+    _install(monkeypatch, FakeInsert(failures=100))
+    buffer.start(object())
+    for index in range(3):
+        buffer.add({"user_id": f"u{index}"})
+    with caplog.at_level(logging.ERROR, logger=comfort.__name__):
+        await buffer.close()
+    assert buffer.pending == 0
+    assert "Dropped 3 feedback rows" in caplog.text
+
+
+def test_buffer_is_ready_once_started_with_a_pool(buffer):
+    assert not buffer.ready
+    buffer._pool = object()
+    assert buffer.ready
@@ -0,0 +1,112 @@
+import asyncio
+import time
+
+import pytest
+
+from app.services import image_jobs
+from app.services.image_jobs import (
+    ImageAnalysisJobCreate,
+    get_image_analysis_job,
+    submit_image_analysis_job,
+)
+from app.services.outfit_langchain import ImageAnalysisRequest, fallback_image_analysis
+
+
+@pytest.fixture(autouse=True)
+async def local_jobs(monkeypatch):
+    monkeypatch.setattr(image_jobs, "redis_client", lambda: None)
+    monkeypatch.setattr(image_jobs, "openai_enabled", lambda: True)
+    monkeypatch.setattr(image_jobs, "_job_semaphore", None)
+    monkeypatch.setenv("IMAGE_JOB_CONCURRENCY", "1")
+    yield
+    for task in list(image_jobs._job_tasks) + [image_jobs._heartbeat_task]:
+        if task is not None:
+            task.cancel()
+    await asyncio.sleep(0)
+    image_jobs._local_jobs.clear()
+    image_jobs._active_jobs.clear()
+
+
+def _request(label: str) -> ImageAnalysisRequest:
+    return ImageAnalysisRequest(label=label, image_url=f"https://images.example.com/{label}.jpg")
+
+
+async def _wait_completed(job_id: str, timeout: float = 2.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        job = await get_image_analysis_job(job_id)
+        if job.status == "completed" or time.monotonic() > deadline:
+            return job
+        await asyncio.sleep(0.01)
+
+
+async def test_retry_backoff_does_not_hold_a_slot(monkeypatch):
+    calls: list[str] = []
+    real_sleep = asyncio.sleep
+
+    async def analyze(request, admission_wait_s=0.0):
+        calls.append(request.label)
+        result = fallback_image_analysis(request)
+        if request.label == "b" or calls.count("a") > 1:
+            result = result.model_copy(update={"source": "vision"})
+        return result
+
+    async def short_sleep(delay, *args, **kwargs):
+        await real_sleep(min(delay, 0.05), *args, **kwargs)
+
+    monkeypatch.setattr(image_jobs, "analyze_outfit_image", analyze)
+    monkeypatch.setattr(image_jobs.asyncio, "sleep", short_sleep)
+
+    job = await submit_image_analysis_job(ImageAnalysisJobCreate(items=[_request("a"), _request("b")]))
+    job = await _wait_completed(job.job_id)
+
+    # "b" runs while "a" is backing off, with IMAGE_JOB_CONCURRENCY=1.
+    assert calls == ["a", "b", "a"]
+    assert job.status == "completed" and job.fallback == 0
+
+
+async def test_items_of_a_dead_worker_are_resolved(monkeypatch):
+    async def hang(request, admission_wait_s=0.0):
+        await asyncio.Event().wait()
+
+    monkeypatch.setattr(image_jobs, "analyze_outfit_image", hang)
+    job = await submit_image_analysis_job(ImageAnalysisJobCreate(items=[_request("a"), _request("b")]))
+    await asyncio.sleep(0.01)
+    assert (await get_image_analysis_job(job.job_id)).status == "running"
+
+    # The worker dies: its tasks and heartbeat stop.
+    for task in list(image_jobs._job_tasks) + [image_jobs._heartbeat_task]:
+        task.cancel()
+    await asyncio.sleep(0)
+    await image_jobs._save(job.job_id, {"heartbeat": str(time.time() - 120)})
+
+    job = await get_image_analysis_job(job.job_id)
+    assert job.status == "completed"
+    assert job.fallback == 2
+    assert [item.status for item in job.items] == ["fallback", "fallback"]
+
+
+async def test_heartbeat_keeps_a_slow_job_running(monkeypatch):
+    monkeypatch.setenv("IMAGE_JOB_HEARTBEAT_SECONDS", "0.01")
+    monkeypatch.setenv("IMAGE_JOB_STALE_SECONDS", "0.2")
+
+    async def hang(request, admission_wait_s=0.0):
+        await asyncio.Event().wait()
+
+    monkeypatch.setattr(image_jobs, "analyze_outfit_image", hang)
+    job = await submit_image_analysis_job(ImageAnalysisJobCreate(items=[_request("a")]))
+    await asyncio.sleep(0.4)
+    assert (await get_image_analysis_job(job.job_id)).status == "running"
+
+
+async def test_local_jobs_expire_like_redis_jobs(monkeypatch):
+    async def analyze(request, admission_wait_s=0.0):
+        return fallback_image_analysis(request).model_copy(update={"source": "vision"})
+
+    monkeypatch.setattr(image_jobs, "analyze_outfit_image", analyze)
+    old = await submit_image_analysis_job(ImageAnalysisJobCreate(items=[_request("a")]))
+    await _wait_completed(old.job_id)
+    image_jobs._local_jobs[old.job_id]["created_at"] = str(time.time() - image_jobs._JOB_TTL_SECONDS - 1)
+
+    new = await submit_image_analysis_job(ImageAnalysisJobCreate(items=[_request("b")]))
+    assert list(image_jobs._local_jobs) == [new.job_id]
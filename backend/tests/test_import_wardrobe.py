@@ -0,0 +1,98 @@
+import asyncio
+import csv
+from contextlib import asynccontextmanager
+
+import pytest
+
+pytest.importorskip("sentence_transformers")
+
+from app.script import import_wardrobe  # noqa: E402
+from app.script.import_wardrobe import run_import  # noqa: E402
+
+
+class FakePool:
+    def __init__(self, fail: bool = False) -> None:
+        self.fail = fail
+        self.records: list[tuple] = []
+        self.acquire_timeouts: list[float | None] = []
+        self.closed = False
+
+    @asynccontextmanager
+    async def acquire(self, timeout=None):
+        self.acquire_timeouts.append(timeout)
+        yield self
+
+    async def copy_records_to_table(self, table, *, records, columns):
+        await asyncio.sleep(0)
+        if self.fail:
+            raise RuntimeError('duplicate key value violates unique constraint "outfit_items_pkey"')
+        self.records.extend(records)
+
+    async def close(self) -> None:
+        self.closed = True
+
+
+@pytest.fixture
+def use_pool(monkeypatch):
+    monkeypatch.setenv("DATABASE_URL", "postgresql://import-test")
+
+    def install(pool: FakePool) -> FakePool:
+        async def create_pool(*args, **kwargs):
+            return pool
+
+        monkeypatch.setattr(import_wardrobe.asyncpg, "create_pool", create_pool)
+        return pool
+
+    return install
+
+
+def _write_csv(path, rows: list[dict]) -> str:
+    with open(path, "w", newline="", encoding="utf-8") as fh:
+        writer = csv.DictWriter(fh, fieldnames=sorted({key for row in rows for key in row}))
+        writer.writeheader()
+        writer.writerows(rows)
+    return str(path)
+
+
+def _items(count: int) -> list[dict]:
+    return [
+        {"id": f"00000000-0000-0000-0000-{index:012d}", "label": f"Rain jacket {index}",
+         "category": "upper"}
+        for index in range(count)
+    ]
+
+
+async def test_writes_every_row_with_several_writers(tmp_path, use_pool):
+    pool = use_pool(FakePool())
+    path = _write_csv(tmp_path / "items.csv", _items(25))
+    report = await asyncio.wait_for(
+        run_import(path, user_key="guest", embed=False, chunk_size=4, queue_size=1, writers=3), 5
+    )
+    assert report["rows_written"] == 25
+    assert len(pool.records) == 25
+    assert pool.closed
+    assert all(timeout is not None for timeout in pool.acquire_timeouts)
+
+
+async def test_copy_failure_fails_the_import_instead_of_hanging(tmp_path, use_pool):
+    pool = use_pool(FakePool(fail=True))
+    path = _write_csv(tmp_path / "items.csv", _items(200))
+    with pytest.raises(RuntimeError, match="duplicate key"):
+        await asyncio.wait_for(
+            run_import(path, user_key="guest", embed=False, chunk_size=5, queue_size=1, writers=2), 5
+        )
+    assert pool.closed
+
+
+async def test_invalid_rows_are_skipped(tmp_path):
+    rows = _items(3) + [
+        {"id": "not-a-uuid", "label": "Wool coat", "category": "upper"},
+        {"label": "Linen shorts", "category": "lower", "warmth_score": "warm"},
+        {"label": "Boots", "category": "shoes", "min_temp_c": "nan"},
+        {"label": "", "category": "upper"},
+    ]
+    path = _write_csv(tmp_path / "items.csv", rows)
+    report = await run_import(path, user_key="guest", dry_run=True, embed=False)
+    assert report["rows_read"] == 7
+    assert report["rows_skipped"] == 4
+    assert report["rows_tagged"] == 3
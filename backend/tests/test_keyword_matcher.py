@@ -0,0 +1,57 @@
+import random
+
+import pytest
+
+from app.services.keyword_matcher import KeywordMatcher
+from app.services.outfit_langchain import _WEATHER_TAG_KEYWORDS, _WEATHER_TAG_MATCHER
+
+
+def _substring_groups(groups: dict[str, tuple[str, ...]], text: str) -> frozenset[str]:
+    """The per-group `any(keyword in text ...)` scans the matcher replaced."""
+    return frozenset(
+        group for group, keywords in groups.items() if any(keyword in text for keyword in keywords)
+    )
+
+
+def _fuzzed_texts(keywords: list[str], alphabet: str, count: int, seed: int):
+    rng = random.Random(seed)
+    for _ in range(count):
+        parts = []
+        for _ in range(rng.randint(0, 6)):
+            choice = rng.random()
+            keyword = rng.choice(keywords)
+            if choice < 0.4:
+                parts.append(keyword)
+            elif choice < 0.7:
+                # Prefixes and suffixes make hits that overlap or straddle others.
+                cut = rng.randint(1, len(keyword))
+                parts.append(keyword[:cut] if rng.random() < 0.5 else keyword[-cut:])
+            else:
+                parts.append("".join(rng.choice(alphabet) for _ in range(rng.randint(1, 5))))
+        yield rng.choice(["", " ", "-"]).join(parts)
+
+
+def test_weather_tag_groups_match_substring_semantics():
+    keywords = sorted({keyword for group in _WEATHER_TAG_KEYWORDS.values() for keyword in group})
+    for text in _fuzzed_texts(keywords, "abcdeilnorst -", 20_000, seed=1):
+        assert _WEATHER_TAG_MATCHER.groups(text) == _substring_groups(_WEATHER_TAG_KEYWORDS, text), text
+
+
+@pytest.mark.parametrize(
+    "groups",
+    [
+        {"a": ("abc",), "b": ("bcd",), "c": ("cd", "b")},
+        {"x": ("aa", "aaa"), "y": ("aab",), "z": ("ba", "a")},
+        {"p": ("rain", "raincoat", "rain boot"), "q": ("coat", "boots", "in")},
+    ],
+)
+def test_overlapping_keywords_match_substring_semantics(groups):
+    matcher = KeywordMatcher(groups)
+    keywords = sorted({keyword for group in groups.values() for keyword in group})
+    for text in _fuzzed_texts(keywords, "abcdr ", 5_000, seed=2):
+        assert matcher.groups(text) == _substring_groups(groups, text), text
+
+
+def test_no_keywords_found():
+    assert _WEATHER_TAG_MATCHER.groups("") == frozenset()
+    assert _WEATHER_TAG_MATCHER.groups("plain merino crew") == frozenset()
@@ -0,0 +1,140 @@
+import pytest
+
+from app.services import openai_limiter as limiter_module
+from app.services.openai_limiter import OpenAILimiter, classify_openai_error
+
+
+@pytest.fixture(params=["local", "redis"])
+async def limiter(request, monkeypatch, clock, fake_redis):
+    monkeypatch.setenv("OPENAI_REQUESTS_PER_MINUTE", "6000")
+    monkeypatch.setenv("OPENAI_INITIAL_CONCURRENCY", "2")
+    monkeypatch.setenv("OPENAI_MIN_CONCURRENCY", "1")
+    monkeypatch.setenv("OPENAI_MAX_CONCURRENCY", "4")
+    monkeypatch.setenv("OPENAI_CIRCUIT_FAILURE_THRESHOLD", "2")
+    monkeypatch.setenv("OPENAI_CIRCUIT_OPEN_SECONDS", "1")
+    monkeypatch.setenv("OPENAI_RATE_LIMIT_COOLDOWN_SECONDS", "10")
+    redis = fake_redis if request.param == "redis" else None
+    monkeypatch.setattr(limiter_module, "redis_client", lambda: redis)
+    monkeypatch.setattr(limiter_module, "time", clock)
+    return OpenAILimiter()
+
+
+async def test_concurrency_cap(limiter):
+    first, _ = await limiter.acquire()
+    second, _ = await limiter.acquire()
+    third, reason = await limiter.acquire()
+    assert first and second and third is None
+    assert reason == "concurrency"
+
+    await first.release("success")
+    again, reason = await limiter.acquire()
+    assert again is not None and reason == "ok"
+
+
+async def test_release_is_idempotent(limiter):
+    first, _ = await limiter.acquire()
+    second, _ = await limiter.acquire()
+    assert first is not None and second is not None
+    await first.release("neutral")
+    await first.release("neutral")
+    third, _ = await limiter.acquire()
+    fourth, reason = await limiter.acquire()
+    assert third is not None and fourth is None
+    assert reason == "concurrency"
+
+
+async def test_failures_halve_the_limit(limiter):
+    permit, _ = await limiter.acquire()
+    await permit.release("failure")
+    # limit 2 -> 1: one call in flight blocks the next
+    held, _ = await limiter.acquire()
+    blocked, reason = await limiter.acquire()
+    assert held is not None and blocked is None
+    assert reason == "concurrency"
+
+
+async def test_rate_limit(limiter, clock):
+    limiter.capacity = 1
+    limiter.refill_per_ms = 1 / 1000
+    permit, _ = await limiter.acquire()
+    await permit.release("neutral")
+    _, reason = await limiter.acquire()
+    assert reason == "rate"
+    clock.advance(1.0)
+    permit, reason = await limiter.acquire()
+    assert permit is not None and reason == "ok"
+
+
+async def test_circuit_opens_probes_and_closes(limiter, clock):
+    for _ in range(2):
+        permit, _ = await limiter.acquire()
+        await permit.release("failure")
+    _, reason = await limiter.acquire()
+    assert reason == "open"
+
+    clock.advance(1.1)
+    probe, _ = await limiter.acquire()
+    assert probe is not None and probe.probe
+    _, reason = await limiter.acquire()
+    assert reason == "half_open"
+
+    await probe.release("success")
+    permit, reason = await limiter.acquire()
+    assert reason == "ok" and not permit.probe
+
+
+async def test_failed_probe_doubles_open_time(limiter, clock):
+    for _ in range(2):
+        permit, _ = await limiter.acquire()
+        await permit.release("failure")
+    clock.advance(1.1)
+    probe, _ = await limiter.acquire()
+    await probe.release("failure")
+
+    clock.advance(1.5)
+    _, reason = await limiter.acquire()
+    assert reason == "open"
+    clock.advance(0.6)
+    probe, _ = await limiter.acquire()
+    assert probe is not None and probe.probe
+
+
+async def test_release_without_state_starts_from_initial_limit(monkeypatch, clock, fake_redis):
+    monkeypatch.setenv("OPENAI_INITIAL_CONCURRENCY", "4")
+    monkeypatch.setenv("OPENAI_MAX_CONCURRENCY", "8")
+    monkeypatch.setattr(limiter_module, "redis_client", lambda: fake_redis)
+    monkeypatch.setattr(limiter_module, "time", clock)
+    limiter = OpenAILimiter()
+
+    permit, _ = await limiter.acquire()
+    await fake_redis.delete(limiter_module._STATE_KEY)
+    await permit.release("success")
+    assert float(await fake_redis.hget(limiter_module._STATE_KEY, "limit")) == pytest.approx(4.25)
+
+    monkeypatch.setattr(limiter_module, "redis_client", lambda: None)
+    permit, _ = await limiter.acquire()
+    await permit.release("success")
+    assert limiter._local["limit"] == pytest.approx(4.25)
+
+
+class _StatusError(Exception):
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+
+class APITimeoutError(Exception):
+    pass
+
+
+@pytest.mark.parametrize(
+    ("exc", "outcome"),
+    [
+        (_StatusError(429), "failure"),
+        (_StatusError(503), "failure"),
+        (_StatusError(400), "neutral"),
+        (APITimeoutError(), "failure"),
+        (ValueError(), "neutral"),
+    ],
+)
+def test_classify_openai_error(exc, outcome):
+    assert classify_openai_error(exc) == outcome
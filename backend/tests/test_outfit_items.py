@@ -0,0 +1,51 @@
+from contextlib import asynccontextmanager
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from app.deps.db import get_db_pool
+from app.routers import outfit
+from app.services.wardrobe_store import WARDROBE_SQL
+
+
+class FakePool:
+    def __init__(self, rows: list[dict]) -> None:
+        self.rows = rows
+        self.queries: list[tuple] = []
+
+    @asynccontextmanager
+    async def acquire(self, timeout=None):
+        yield self
+
+    async def fetch(self, sql, *args):
+        self.queries.append((sql, *args))
+        return self.rows
+
+
+@pytest.fixture
+def pool():
+    return FakePool([{"id": "item-1", "user_key": "u1", "category": "upper", "label": "Tee"}])
+
+
+@pytest.fixture
+async def client(pool):
+    app = FastAPI()
+    app.include_router(outfit.router)
+    app.dependency_overrides[get_db_pool] = lambda: pool
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+
+
+async def test_lists_the_users_items(client, pool):
+    response = await client.get("/outfit/items", params={"user_key": " u1 ", "category": "upper"})
+    assert response.status_code == 200
+    assert response.json() == {"items": pool.rows}
+    assert pool.queries == [(WARDROBE_SQL, "u1", "upper", 500)]
+
+
+async def test_requires_a_user_key(client, pool):
+    response = await client.get("/outfit/items", params={"user_key": "  "})
+    assert response.status_code == 400
+    assert pool.queries == []
@@ -0,0 +1,126 @@
+from datetime import date, datetime, timezone
+
+import pytest
+
+from app.schemas.weather import WeatherResponse
+from app.services import precompute
+from app.services.precompute import PrecomputeScheduler, _due_date, daily_contexts, record_activity
+
+
+@pytest.fixture(autouse=True)
+def morning_window(monkeypatch):
+    monkeypatch.setenv("PRECOMPUTE_WINDOW_START_HOUR", "6")
+    monkeypatch.setenv("PRECOMPUTE_LEAD_MINUTES", "45")
+
+
+NEW_YORK = {"lat": "40.7128", "lon": "-74.006", "tz": "America/New_York"}
+
+
+@pytest.mark.parametrize(
+    ("utc", "expected"),
+    [
+        (datetime(2026, 1, 15, 10, 0, tzinfo=timezone.utc), None),  # 05:00, before the lead
+        (datetime(2026, 1, 15, 10, 15, tzinfo=timezone.utc), date(2026, 1, 15)),  # 05:15
+        (datetime(2026, 1, 15, 10, 59, tzinfo=timezone.utc), date(2026, 1, 15)),  # 05:59
+        (datetime(2026, 1, 15, 11, 0, tzinfo=timezone.utc), None),  # 06:00, window open
+    ],
+)
+def test_due_date_in_the_lead_before_the_window(utc, expected):
+    assert _due_date(NEW_YORK, utc) == expected
+
+
+def test_due_date_is_the_users_local_date():
+    tokyo = {"lat": "35.68", "lon": "139.69", "tz": "Asia/Tokyo"}
+    # 20:30 UTC on the 14th is 05:30 on the 15th in Tokyo.
+    assert _due_date(tokyo, datetime(2026, 1, 14, 20, 30, tzinfo=timezone.utc)) == date(2026, 1, 15)
+
+
+def test_due_date_without_timezone_uses_longitude():
+    profile = {"lat": "40.7128", "lon": "-74.006"}
+    assert _due_date(profile, datetime(2026, 1, 15, 10, 30, tzinfo=timezone.utc)) == date(2026, 1, 15)
+
+
+def test_due_date_needs_a_location():
+    assert _due_date({"tz": "America/New_York"}, datetime(2026, 1, 15, 10, 30, tzinfo=timezone.utc)) is None
+
+
+def _weather(units: str, description: str | None = "light rain") -> WeatherResponse:
+    return WeatherResponse(
+        source="openweather",
+        coords={"lat": 40.7, "lon": -74.0},
+        units=units,
+        current={"dt": 0, "wind_speed": 10.0, "description": description},
+        daily=[
+            {"dt": 0, "min": 41.0, "max": 59.0, "pop": 0.6},
+            {"dt": 1, "min": None, "max": 59.0, "pop": None},
+            {"dt": 2, "min": 50.0, "max": 68.0, "pop": 0.0},
+        ],
+    )
+
+
+def test_daily_contexts_match_the_weekly_panel():
+    contexts = daily_contexts(_weather("imperial"), "imperial", "casual", "everyday", days=2)
+    assert contexts == [
+        {
+            "temp_c": pytest.approx(10.0),
+            "description": "light rain",
+            "precip": "60% precip",
+            "wind": pytest.approx(4.4704),
+            "style": "casual",
+            "occasion": "everyday",
+        },
+        {
+            "temp_c": None,
+            "description": "light rain",
+            "precip": None,
+            "wind": pytest.approx(4.4704),
+            "style": "casual",
+            "occasion": "everyday",
+        },
+    ]
+
+
+def test_daily_contexts_keep_metric_values():
+    contexts = daily_contexts(_weather("metric", description=None), "metric", None, None, days=7)
+    assert len(contexts) == 3
+    assert contexts[2]["temp_c"] == pytest.approx(59.0)
+    assert contexts[2]["wind"] == pytest.approx(10.0)
+    assert contexts[2]["precip"] == "0% precip"
+    assert contexts[2]["description"] == "weather-based outfit"
+    assert contexts[2]["style"] is None
+
+
+@pytest.fixture
+def few_users(monkeypatch):
+    monkeypatch.setenv("PRECOMPUTE_MAX_USERS", "2")
+    monkeypatch.setattr(precompute, "_local_profiles", precompute.OrderedDict())
+    monkeypatch.setattr(precompute, "_last_written", precompute.OrderedDict())
+    monkeypatch.setattr(precompute, "_local_done", {})
+
+
+async def test_local_profiles_keep_the_most_recent_users(monkeypatch, few_users):
+    monkeypatch.setattr(precompute, "redis_client", lambda: None)
+    for index, user_key in enumerate(["u1", "u2", "u1", "u3"]):
+        await record_activity(user_key, lat=40.7, lon=-74.0, style=f"style-{index}")
+    assert list(precompute._local_profiles) == ["u1", "u3"]
+    assert list(precompute._last_written) == ["u1", "u3"]
+
+
+async def test_active_index_is_capped_on_write(monkeypatch, few_users, fake_redis, clock):
+    monkeypatch.setattr(precompute, "redis_client", lambda: fake_redis)
+    monkeypatch.setattr(precompute, "time", clock)
+    await fake_redis.zadd(precompute._ACTIVE_KEY, {"gone": clock.time() - precompute._PROFILE_TTL_SECONDS - 1})
+    for user_key in ("u1", "u2", "u3"):
+        clock.advance(1)
+        await record_activity(user_key, lat=40.7, lon=-74.0)
+    assert await fake_redis.zrange(precompute._ACTIVE_KEY, 0, -1) == ["u2", "u3"]
+
+
+async def test_local_claims_are_dropped_after_the_ttl(monkeypatch, few_users):
+    monkeypatch.setattr(precompute, "redis_client", lambda: None)
+    scheduler = PrecomputeScheduler()
+    assert await scheduler._claim("u1", date(2026, 1, 15))
+    assert not await scheduler._claim("u1", date(2026, 1, 15))
+    assert await scheduler._claim("u1", date(2026, 1, 16))
+    assert await scheduler._claim("u2", date(2026, 1, 17))
+    assert list(precompute._local_done) == [date(2026, 1, 16), date(2026, 1, 17)]
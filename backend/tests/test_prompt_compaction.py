@@ -0,0 +1,92 @@
+import json
+
+import pytest
+
+from app.services import prompt_compaction
+from app.services.prompt_compaction import (
+    compact_explanation_payload,
+    compact_explanation_text,
+    prompt_token_report,
+)
+
+
+def _item(category: str, index: int) -> dict:
+    """A selected item as the recommend route sends it to /outfit/explain."""
+    return {
+        "id": f"00000000-0000-0000-0000-{index:012d}",
+        "label": f"Merino {category} layer",
+        "category": category,
+        "image_url": f"https://images.example.com/{index}.jpg",
+        "brand": "Northwind",
+        "color": "navy",
+        "description": "Thick knit, warm for cold mornings",
+        "similarity": 0.81234,
+        "scores": {"vector": 0.81234, "temp": 0.9, "rain": 0.85, "wind": 0.75, "comfort": 1.0,
+                   "final": 0.8612400000000001},
+        "reasons": ["Temperature range matches", "Dry-weather ready",
+                    "No strong wind adjustment needed", "warm for cold weather"],
+        "metadata": {"warmth_score": 8, "water_resistance": "none", "wind_block": "medium",
+                     "breathability": "high", "coverage_top": "long_sleeve",
+                     "coverage_bottom": None, "footwear_type": None,
+                     "min_temp_c": -2, "max_temp_c": 12},
+    }
+
+
+def _payload(items: int) -> dict:
+    return {
+        "weather_context": {"temp_c": 4.25, "description": "light rain", "precip": "60% precip",
+                            "wind": 6.04, "style": "casual", "occasion": None},
+        "selected_items": [_item(category, index) for index, category in
+                           enumerate(["upper", "lower", "shoes", "accessories"][:items])],
+        "missing_categories": [],
+    }
+
+
+@pytest.fixture(autouse=True)
+def char_estimate(monkeypatch):
+    # Deterministic ~4 chars/token estimate instead of a downloaded tokenizer.
+    monkeypatch.setattr(prompt_compaction, "_encoding", lambda model: None)
+
+
+@pytest.mark.parametrize("items", [1, 2, 4])
+def test_compaction_reduces_prompt_tokens(items):
+    payload = _payload(items)
+    report = prompt_token_report(json.dumps(payload), compact_explanation_text(payload), "gpt-4o-mini")
+    assert report["reduction"] >= 0.4
+
+
+def test_minimal_item_is_never_larger():
+    payload = {"weather_context": {"temp_c": 20}, "selected_items": [{"label": "Tee", "category": "upper"}]}
+    assert len(compact_explanation_text(payload)) < len(json.dumps(payload))
+
+
+def test_projection_keeps_explanation_fields_only():
+    compact = compact_explanation_payload(_payload(1))
+    assert compact["weather"] == {"temp_c": 4.2, "desc": "light rain", "precip": "60% precip",
+                                  "wind_ms": 6, "style": "casual"}
+    assert "missing" not in compact
+    assert compact["items"] == [
+        {
+            "category": "upper",
+            "item": "Merino upper layer",
+            "brand": "Northwind",
+            "color": "navy",
+            "desc": "Thick knit, warm for cold mornings",
+            "reasons": ["Temperature range matches", "Dry-weather ready",
+                        "No strong wind adjustment needed"],
+            "score": 0.86,
+            "warmth": 8,
+            "water": "none",
+            "wind": "medium",
+            "breathable": "high",
+            "top": "long_sleeve",
+            "comfort_c": "-2..12",
+        }
+    ]
+
+
+def test_long_descriptions_are_truncated():
+    item = _item("upper", 0) | {"description": "word " * 100}
+    compact = compact_explanation_payload({"weather_context": {}, "selected_items": [item]})
+    assert len(compact["items"][0]["desc"]) <= 120
+    assert compact["items"][0]["desc"].endswith("...")
@@ -0,0 +1,13 @@
+create table if not exists public.feedback (
+  id bigint generated always as identity primary key,
+  user_id text,
+  comfort_offset numeric,
+  outfit_id text,
+  thumbs_up boolean,
+  created_at timestamptz not null default now()
+);
+
+grant select, insert on public.feedback to anon, authenticated;
+
+create index if not exists feedback_user_id_created_at_idx
+  on public.feedback (user_id, created_at desc);
@@ -11,6 +11,10 @@ module.exports = {
         source: '/api/weather/:path*',
         destination: `${BACKEND_URL}/weather/:path*`,
       },
+      {
+        source: '/api/outfits/items',
+        destination: `${BACKEND_URL}/outfit/items`,
+      },
     ]
   },
 }
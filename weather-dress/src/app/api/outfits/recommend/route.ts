@@ -496,6 +496,33 @@ async function generateExplanationDetails(params: {
   }
 }
 
+// The backend serves reranked results the precompute scheduler warmed before
+// the user's morning peak, and records their style/occasion for the next run.
+async function recommendFromBackend(userKey: string, weather_context: WeatherContext, limit: number) {
+  try {
+    const resp = await fetch(backendUrl("/outfit/recommend"), {
+      method: "POST",
+      headers: {
+        "Content-Type": "application/json",
+      },
+      body: JSON.stringify({ user_key: userKey, ...weather_context, limit }),
+    });
+
+    if (!resp.ok) {
+      const errTxt = await resp.text();
+      throw new Error(`Backend recommend failed: ${resp.status} ${errTxt}`);
+    }
+
+    const body = await resp.json();
+    return body?.outfit && body?.alternatives && isExplanationDetails(body?.explanation_details)
+      ? body
+      : null;
+  } catch (err) {
+    console.error("Backend recommend fallback", err);
+    return null;
+  }
+}
+
 export async function POST(req: NextRequest) {
   try {
     const body = (await req.json().catch(() => ({}))) as RecommendRequest;
@@ -513,6 +540,11 @@ export async function POST(req: NextRequest) {
       occasion: body.occasion?.trim() || null,
     };
     const matchCount = clampLimit(body.limit);
+    const fromBackend = await recommendFromBackend(userKey, weather_context, matchCount);
+    if (fromBackend) {
+      return NextResponse.json(fromBackend, { status: 200 });
+    }
+
     const queryText = buildQueryText(weather_context);
     const embedding = await embedQuery(queryText);
 
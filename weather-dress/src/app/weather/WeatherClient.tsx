@@ -263,6 +263,18 @@ function cloudsOptionsForWeather(w: WeatherRes | null) {
 
 // ----------- HOOK HELPERS FOR SUPABASE OUTFIT STORAGE -----------
 async function fetchOutfits(userKey: string) {
+  // The backend lists the wardrobe over its pooled, prepared query; read
+  // straight from Supabase only when it is unavailable.
+  try {
+    const params = new URLSearchParams({ user_key: userKey });
+    const res = await fetch(`/api/outfits/items?${params.toString()}`, { cache: "no-store" });
+    if (!res.ok) throw new Error(`Request failed: ${res.status}`);
+    const body = await res.json();
+    if (Array.isArray(body?.items)) return body.items;
+  } catch (err) {
+    console.error("backend wardrobe fallback", err);
+  }
+
   if (!supabase) throw new Error(supabaseStorageMessage("load wardrobe"));
 
   const { data, error } = await supabase
@@ -654,7 +666,14 @@ export default function WeatherClient() {
         const url = `/api/weather/openweather?${params.toString()}`;
         console.log("Requesting weather from:", url);
 
-        const res = await fetch(url, { cache: "no-store" });
+        // Lets the backend warm this user's caches before their morning peak.
+        const headers: Record<string, string> = {
+          "X-Timezone": Intl.DateTimeFormat().resolvedOptions().timeZone,
+        };
+        const storedUserKey = localStorage.getItem("outfit_user_key");
+        if (storedUserKey) headers["X-User-Key"] = storedUserKey;
+
+        const res = await fetch(url, { cache: "no-store", headers });
         if (!res.ok) throw new Error(`Request failed: ${res.status}`);
 
         const data: WeatherRes = await res.json();